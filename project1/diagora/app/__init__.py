@@ -1,12 +1,154 @@
+import importlib
+import importlib.util
+import os
+import time
 from flask import Flask
 from app.config import Config
+from app.services.warmup import startup
 
 
-def create_app(config_class=Config):
+def _install_backends(oracle_pool_factory=None, llm_client=None, async_llm_client=None):
+    if oracle_pool_factory is not None:
+        from app.routes.main import instance_registry
+        for name, service in instance_registry.services.items():
+            service.use_pool(oracle_pool_factory(name))
+
+    if llm_client is not None or async_llm_client is not None:
+        from app.routes.main import llm_service
+        llm_service.use_client(llm_client or llm_service.client, async_llm_client)
+
+
+def _start_background(config):
+    if config.get('HEALTH_MONITOR_ENABLED'):
+        from app.routes.main import health_monitor
+        health_monitor.start()
+
+    if config.get('SNAPSHOT_COLLECTOR_ENABLED'):
+        from app.routes.main import snapshot_collector
+        snapshot_collector.start()
+
+    if config.get('METRICS_DIR'):
+        from app.services.metrics import metrics
+        metrics.start()
+
+
+def _import_if_installed(name: str):
+    if importlib.util.find_spec(name) is not None:
+        importlib.import_module(name)
+
+
+def _load_routes(module: str):
+    """Import a routes module (which builds the services and the query registry), timed once"""
+    started = time.perf_counter()
+    routes = importlib.import_module(module)
+    if 'services' not in startup.stages.get('preload', {}):
+        startup.record('preload', 'services', time.perf_counter() - started)
+    return routes
+
+
+def _preload(async_mode: bool = False):
+    """Fork-safe start-up work: imports and files only, no threads or sockets"""
+    if 'system_prompt' in startup.stages.get('preload', {}):
+        return
+    from app.routes.main import llm_service
+
+    steps = []
+    if startup.enabled:
+        steps.append(('openai', lambda: _import_if_installed('openai')))
+        steps.append(('oracle_driver', lambda: _import_if_installed('oracledb' if async_mode else 'cx_Oracle')))
+    steps.append(('system_prompt', lambda: llm_service.system_prompt))
+    startup.run('preload', steps)
+    startup.report('preload')
+
+
+def start_worker(app, async_mode: bool = False):
+    """Per-process start-up: warm clients and Oracle sessions, then start the background threads
+
+    gunicorn.conf.py calls this from post_fork; otherwise create_app() does.
+    """
+    if 'worker' in startup.stages:
+        return
+    from app.routes.main import instance_registry, llm_service, snapshot_collector
+
+    steps = []
+    if startup.enabled:
+        steps.append(('llm_client', lambda: llm_service.client))
+        if async_mode:
+            steps.append(('async_llm_client', lambda: llm_service.async_client))
+        if startup.oracle and not async_mode:
+            # The asyncio pools belong to the serving loop: create_async_app opens them there
+            steps.append(('oracle', instance_registry.warm_up))
+        if startup.prime_caches and app.config.get('SNAPSHOT_COLLECTOR_ENABLED'):
+            steps.append(('snapshots', snapshot_collector.prime))
+    steps.append(('background', lambda: _start_background(app.config)))
+
+    startup.stages['worker'] = {}
+    startup.run('worker', steps)
+    startup.report('worker')
+
+
+async def _warm_async_pools():
+    """Open the async Oracle pools on the serving event loop (sync pools are left to first use)"""
+    from app.routes.main import instance_registry
+    started = time.perf_counter()
+    try:
+        await instance_registry.warm_up_async()
+    except Exception as e:
+        print(f"Warm-up error (worker/oracle): {e}")
+    startup.record('worker', 'oracle', time.perf_counter() - started)
+
+
+def _defer_worker_start() -> bool:
+    # Set by gunicorn.conf.py: with preload_app this process is the master and must not start threads
+    return os.getenv('DIAGORA_DEFER_WORKER_START', 'False').lower() == 'true'
+
+
+def create_app(config_class=Config, oracle_pool_factory=None, llm_client=None):
+    """Build the app; the optional backends replace the real Oracle pools and Azure client
+
+    oracle_pool_factory is called with each instance name and must return an
+    object with the cx_Oracle SessionPool interface (used by the benchmarks).
+    """
     app = Flask(__name__)
     app.config.from_object(config_class)
 
-    from app.routes.main import main_bp
-    app.register_blueprint(main_bp)
+    app.register_blueprint(_load_routes('app.routes.main').main_bp)
+
+    _install_backends(oracle_pool_factory, llm_client)
+    _preload()
+    if not _defer_worker_start():
+        start_worker(app)
+
+    app.before_request(startup.request_started)
+    app.after_request(startup.request_finished)
+
+    return app
+
+
+def create_async_app(config_class=Config, oracle_pool_factory=None, llm_client=None, async_llm_client=None):
+    """asyncio (ASGI) variant of create_app, served by asgi.py; needs requirements-async.txt"""
+    from quart import Quart
+
+    app = Quart(__name__)
+    app.config.from_object(config_class)
+
+    app.register_blueprint(_load_routes('app.routes.async_main').async_bp)
+
+    _install_backends(oracle_pool_factory, llm_client, async_llm_client)
+    _preload(async_mode=True)
+
+    @app.before_serving
+    async def start_background():
+        start_worker(app, async_mode=True)
+        if startup.enabled and startup.oracle:
+            await _warm_async_pools()
+
+    @app.before_request
+    async def request_started():
+        startup.request_started()
+
+    @app.after_request
+    async def request_finished(response):
+        return startup.request_finished(response)
 
     return app
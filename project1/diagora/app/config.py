@@ -19,6 +19,169 @@ class Config:
     ORACLE_SERVICE_NAME = os.getenv('ORACLE_SERVICE_NAME')
     ORACLE_USER = os.getenv('ORACLE_USER')
     ORACLE_PASSWORD = os.getenv('ORACLE_PASSWORD')
+    # 'synthetic' runs EBS_QUERIES against a generated SQLite EBS (SYNTHETIC_* below)
+    ORACLE_BACKEND = os.getenv('ORACLE_BACKEND', 'oracle')
+    SYNTHETIC_SCALE = float(os.getenv('SYNTHETIC_SCALE', 1))
+    SYNTHETIC_ROWS = os.getenv('SYNTHETIC_ROWS')
+    SYNTHETIC_SEED = int(os.getenv('SYNTHETIC_SEED', 42))
+    SYNTHETIC_DB_PATH = os.getenv('SYNTHETIC_DB_PATH')
+
+    # Multiple EBS instances: ORACLE_INSTANCES=PROD,TEST1,DR with ORACLE_<NAME>_HOST,
+    # ORACLE_<NAME>_SERVICE_NAME etc. (port, user and password fall back to ORACLE_*)
+    ORACLE_INSTANCES = os.getenv('ORACLE_INSTANCES', '')
+    ORACLE_DEFAULT_INSTANCE = os.getenv('ORACLE_DEFAULT_INSTANCE')
+    ORACLE_INSTANCE_TIMEOUT = float(os.getenv('ORACLE_INSTANCE_TIMEOUT', 15))
+    ORACLE_FANOUT_MAX_WORKERS = int(os.getenv('ORACLE_FANOUT_MAX_WORKERS', 8))
+
+    # Oracle Session Pool (per gunicorn worker)
+    ORACLE_POOL_MIN = int(os.getenv('ORACLE_POOL_MIN', 1))
+    ORACLE_POOL_MAX = int(os.getenv('ORACLE_POOL_MAX', 4))
+    ORACLE_POOL_INCREMENT = int(os.getenv('ORACLE_POOL_INCREMENT', 1))
+    ORACLE_POOL_WAIT_TIMEOUT_MS = int(os.getenv('ORACLE_POOL_WAIT_TIMEOUT_MS', 5000))
+    ORACLE_POOL_PING_INTERVAL = int(os.getenv('ORACLE_POOL_PING_INTERVAL', 60))
+    # python-oracledb asyncio pool used by asgi.py (see requirements-async.txt)
+    ORACLE_ASYNC_POOL_MAX = int(os.getenv('ORACLE_ASYNC_POOL_MAX', os.getenv('ORACLE_POOL_MAX', 4)))
+    ORACLE_STMT_CACHE_SIZE = int(os.getenv('ORACLE_STMT_CACHE_SIZE', 40))
+
+    # Fetch defaults (overridden per query by 'fetch' in queries/ebs_queries.py)
+    ORACLE_FETCH_ARRAYSIZE = int(os.getenv('ORACLE_FETCH_ARRAYSIZE', 200))
+    ORACLE_MAX_ROWS = int(os.getenv('ORACLE_MAX_ROWS', 10000))
+    EXPORT_MAX_ROWS = int(os.getenv('EXPORT_MAX_ROWS', 100000))
+
+    # Full system check (/api/report)
+    REPORT_MAX_WORKERS = int(os.getenv('REPORT_MAX_WORKERS', 4))
+    REPORT_QUERY_TIMEOUT = float(os.getenv('REPORT_QUERY_TIMEOUT', 30))
+
+    # Background health prober (/api/health serves its cached state)
+    HEALTH_MONITOR_ENABLED = os.getenv('HEALTH_MONITOR_ENABLED', 'True').lower() == 'true'
+    HEALTH_PROBE_INTERVAL = float(os.getenv('HEALTH_PROBE_INTERVAL', 30))
+    HEALTH_PROBE_TIMEOUT = float(os.getenv('HEALTH_PROBE_TIMEOUT', 5))
+
+    # Background snapshot collector (schedule is refresh_interval in queries/ebs_queries.py)
+    SNAPSHOT_COLLECTOR_ENABLED = os.getenv('SNAPSHOT_COLLECTOR_ENABLED', 'False').lower() == 'true'
+    SNAPSHOT_JITTER = float(os.getenv('SNAPSHOT_JITTER', 0.2))
+    SNAPSHOT_STALENESS_FACTOR = float(os.getenv('SNAPSHOT_STALENESS_FACTOR', 2))
+    SNAPSHOT_COLLECTOR_LOCK = os.getenv('SNAPSHOT_COLLECTOR_LOCK')
+    SNAPSHOT_STORE_PATH = os.getenv('SNAPSHOT_STORE_PATH')
+    SNAPSHOT_ELECTION_RETRY = float(os.getenv('SNAPSHOT_ELECTION_RETRY', 30))
+
+    # Local metric history recorded from snapshot collections (answers 'trend' questions;
+    # only the collector writes it, so it defaults to SNAPSHOT_COLLECTOR_ENABLED)
+    HISTORY_ENABLED = os.getenv('HISTORY_ENABLED', os.getenv('SNAPSHOT_COLLECTOR_ENABLED', 'False')).lower() == 'true'
+    HISTORY_DB_PATH = os.getenv('HISTORY_DB_PATH')
+    HISTORY_RAW_RETENTION_HOURS = float(os.getenv('HISTORY_RAW_RETENTION_HOURS', 48))
+    HISTORY_HOURLY_RETENTION_DAYS = float(os.getenv('HISTORY_HOURLY_RETENTION_DAYS', 30))
+    HISTORY_DAILY_RETENTION_DAYS = float(os.getenv('HISTORY_DAILY_RETENTION_DAYS', 365))
+
+    # Prometheus /metrics (set METRICS_DIR to a directory cleared on deploy when
+    # running several gunicorn workers so any worker can serve the merged values)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    METRICS_DIR = os.getenv('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+
+    # Worker start-up (gunicorn -c gunicorn.conf.py run:app preloads the app in the
+    # master and warms each worker in post_fork; timings on /api/health and /metrics)
+    WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'True').lower() == 'true'
+    WARMUP_ORACLE = os.getenv('WARMUP_ORACLE', 'True').lower() == 'true'
+    WARMUP_PRIME_CACHES = os.getenv('WARMUP_PRIME_CACHES', 'False').lower() == 'true'
+
+    # Query result cache (TTL per query is set in queries/ebs_queries.py)
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', 256))
+
+    # Admission control per instance and worker: concurrency limit per cost
+    # class ('cost' in queries/ebs_queries.py), bounded queues served light
+    # first, stale cached results for rejected queries
+    ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'True').lower() == 'true'
+    ADMISSION_MAX_ACTIVE = int(os.getenv('ADMISSION_MAX_ACTIVE', os.getenv('ORACLE_POOL_MAX', 4)))
+    ADMISSION_LIGHT_LIMIT = int(os.getenv('ADMISSION_LIGHT_LIMIT', 4))
+    ADMISSION_LIGHT_QUEUE = int(os.getenv('ADMISSION_LIGHT_QUEUE', 50))
+    ADMISSION_LIGHT_MAX_WAIT_SECONDS = float(os.getenv('ADMISSION_LIGHT_MAX_WAIT_SECONDS', 10))
+    ADMISSION_MEDIUM_LIMIT = int(os.getenv('ADMISSION_MEDIUM_LIMIT', 2))
+    ADMISSION_MEDIUM_QUEUE = int(os.getenv('ADMISSION_MEDIUM_QUEUE', 20))
+    ADMISSION_MEDIUM_MAX_WAIT_SECONDS = float(os.getenv('ADMISSION_MEDIUM_MAX_WAIT_SECONDS', 10))
+    ADMISSION_HEAVY_LIMIT = int(os.getenv('ADMISSION_HEAVY_LIMIT', 1))
+    ADMISSION_HEAVY_QUEUE = int(os.getenv('ADMISSION_HEAVY_QUEUE', 10))
+    ADMISSION_HEAVY_MAX_WAIT_SECONDS = float(os.getenv('ADMISSION_HEAVY_MAX_WAIT_SECONDS', 20))
+    ADMISSION_REPORT_LIMIT = int(os.getenv('ADMISSION_REPORT_LIMIT', 3))
+    ADMISSION_REPORT_QUEUE = int(os.getenv('ADMISSION_REPORT_QUEUE', 20))
+    ADMISSION_REPORT_MAX_WAIT_SECONDS = float(os.getenv('ADMISSION_REPORT_MAX_WAIT_SECONDS', 30))
+    ADMISSION_EXPORT_LIMIT = int(os.getenv('ADMISSION_EXPORT_LIMIT', 1))
+    ADMISSION_EXPORT_QUEUE = int(os.getenv('ADMISSION_EXPORT_QUEUE', 5))
+    ADMISSION_EXPORT_MAX_WAIT_SECONDS = float(os.getenv('ADMISSION_EXPORT_MAX_WAIT_SECONDS', 5))
+    ADMISSION_STALE_MAX_AGE = float(os.getenv('ADMISSION_STALE_MAX_AGE', 3600))
+
+    # LLM intent cache (set INTENT_CACHE_PATH to persist across worker restarts)
+    INTENT_CACHE_MAX_ENTRIES = int(os.getenv('INTENT_CACHE_MAX_ENTRIES', 1024))
+    INTENT_CACHE_PATH = os.getenv('INTENT_CACHE_PATH')
+    INTENT_CACHE_SAVE_DELAY = float(os.getenv('INTENT_CACHE_SAVE_DELAY', 5))
+
+    # Run the keyword-detected query while the LLM intent call is in flight
+    SPECULATIVE_EXECUTION = os.getenv('SPECULATIVE_EXECUTION', 'False').lower() == 'true'
+    SPECULATION_MAX_WORKERS = int(os.getenv('SPECULATION_MAX_WORKERS', 4))
+
+    # Local intent classifier (train with train_classifier.py)
+    INTENT_MODEL_PATH = os.getenv('INTENT_MODEL_PATH')
+    LOCAL_INTENT_THRESHOLD = float(os.getenv('LOCAL_INTENT_THRESHOLD', 0.9))
+    INTENT_LOG_PATH = os.getenv('INTENT_LOG_PATH')
+
+    # Rule-based answers: intents listed here skip the LLM formatting call
+    # (supported: tablespace, invalid_objects, concurrent_manager); with
+    # ANSWER_ENGINE_FALLBACK they also answer when the LLM is down or slower
+    # than ANSWER_ENGINE_LLM_TIMEOUT seconds
+    ANSWER_ENGINE_INTENTS = os.getenv('ANSWER_ENGINE_INTENTS', '')
+    ANSWER_ENGINE_FALLBACK = os.getenv('ANSWER_ENGINE_FALLBACK', 'True').lower() == 'true'
+    ANSWER_ENGINE_LLM_TIMEOUT = float(os.getenv('ANSWER_ENGINE_LLM_TIMEOUT', 10))
+
+    # Token budget: prompts are counted locally (tiktoken if installed) and
+    # max_tokens per call/intent follows observed completion lengths, starting
+    # from (and never above) the LLM_MAX_TOKENS_* values
+    LLM_CONTEXT_WINDOW = int(os.getenv('LLM_CONTEXT_WINDOW', 8192))
+    LLM_CONTEXT_SAFETY_TOKENS = int(os.getenv('LLM_CONTEXT_SAFETY_TOKENS', 256))
+    LLM_TOKENIZER_ENCODING = os.getenv('LLM_TOKENIZER_ENCODING', 'cl100k_base')
+    LLM_MAX_TOKENS_INTENT = int(os.getenv('LLM_MAX_TOKENS_INTENT', 500))
+    LLM_MAX_TOKENS_FORMAT = int(os.getenv('LLM_MAX_TOKENS_FORMAT', 1000))
+    LLM_MAX_TOKENS_REPORT = int(os.getenv('LLM_MAX_TOKENS_REPORT', 1500))
+    LLM_MAX_TOKENS_MIN = int(os.getenv('LLM_MAX_TOKENS_MIN', 64))
+    LLM_MAX_TOKENS_HEADROOM = float(os.getenv('LLM_MAX_TOKENS_HEADROOM', 1.25))
+    LLM_MAX_TOKENS_MIN_SAMPLES = int(os.getenv('LLM_MAX_TOKENS_MIN_SAMPLES', 20))
+    LLM_USAGE_LOG_PATH = os.getenv('LLM_USAGE_LOG_PATH')
+
+    # Azure OpenAI deadlines: request timeout per call, total time of a stream
+    LLM_INTENT_DEADLINE = float(os.getenv('LLM_INTENT_DEADLINE', 5))
+    LLM_FORMAT_DEADLINE = float(os.getenv('LLM_FORMAT_DEADLINE', 30))
+    LLM_REPORT_DEADLINE = float(os.getenv('LLM_REPORT_DEADLINE', 60))
+    LLM_STREAM_DEADLINE = float(os.getenv('LLM_STREAM_DEADLINE', 90))
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 0))
+    # Hedging: after these seconds the local intent / rule answer is used
+    LLM_HEDGE = os.getenv('LLM_HEDGE', 'True').lower() == 'true'
+    LLM_HEDGE_INTENT_SECONDS = float(os.getenv('LLM_HEDGE_INTENT_SECONDS', 1.5))
+    LLM_HEDGE_FORMAT_SECONDS = float(os.getenv('LLM_HEDGE_FORMAT_SECONDS', 15))
+    LLM_HEDGE_WORKERS = int(os.getenv('LLM_HEDGE_WORKERS', 8))
+    # Circuit breaker over the last WINDOW_SECONDS of calls (per worker)
+    LLM_BREAKER_ENABLED = os.getenv('LLM_BREAKER_ENABLED', 'True').lower() == 'true'
+    LLM_BREAKER_WINDOW_SECONDS = float(os.getenv('LLM_BREAKER_WINDOW_SECONDS', 60))
+    LLM_BREAKER_MIN_CALLS = int(os.getenv('LLM_BREAKER_MIN_CALLS', 10))
+    LLM_BREAKER_ERROR_RATE = float(os.getenv('LLM_BREAKER_ERROR_RATE', 0.5))
+    LLM_BREAKER_P95_SECONDS = float(os.getenv('LLM_BREAKER_P95_SECONDS', 10))
+    LLM_BREAKER_P95_INTENT_SECONDS = float(os.getenv('LLM_BREAKER_P95_INTENT_SECONDS', 3))
+    LLM_BREAKER_OPEN_SECONDS = float(os.getenv('LLM_BREAKER_OPEN_SECONDS', 30))
+
+    # Conversation state: the last results of each chat session (per worker)
+    # answer filter / sort / top-N follow-ups without a new query
+    CONVERSATION_ENABLED = os.getenv('CONVERSATION_ENABLED', 'True').lower() == 'true'
+    CONVERSATION_MAX_SESSIONS = int(os.getenv('CONVERSATION_MAX_SESSIONS', 1000))
+    CONVERSATION_MAX_RESULTS = int(os.getenv('CONVERSATION_MAX_RESULTS', 3))
+    CONVERSATION_MAX_ROWS = int(os.getenv('CONVERSATION_MAX_ROWS', 5000))
+    CONVERSATION_MAX_MB = int(os.getenv('CONVERSATION_MAX_MB', 64))
+    CONVERSATION_IDLE_SECONDS = int(os.getenv('CONVERSATION_IDLE_SECONDS', 1800))
+    CONVERSATION_MAX_AGE_SECONDS = int(os.getenv('CONVERSATION_MAX_AGE_SECONDS', 600))
+
+    # Query results are held column-wise (NumPy arrays for numbers and dates)
+    RESULT_COLUMNAR = os.getenv('RESULT_COLUMNAR', 'True').lower() == 'true'
+
+    # Result compaction before rows are sent to the LLM
+    LLM_CONTEXT_TOKEN_BUDGET = int(os.getenv('LLM_CONTEXT_TOKEN_BUDGET', 3000))
+    RESULT_SAMPLE_ROWS = int(os.getenv('RESULT_SAMPLE_ROWS', 50))
 
     @property
     def oracle_dsn(self):
@@ -0,0 +1,301 @@
+"""Quart (asyncio) versions of the routes in app.routes.main
+
+The services are shared with the sync app. LLM calls and Oracle queries are
+awaited, so one worker process holds many in-flight questions without a
+thread each. The report and export endpoints reuse the sync implementation
+in worker threads.
+"""
+import asyncio
+import time
+from quart import Blueprint, Response, render_template, request, jsonify
+
+from app.routes.main import (
+    ERROR_ANSWER, EXPORT_FORMATS, UNKNOWN_ANSWER, _build_report, _export_query, _health_payload,
+    _follow_up, _local_result, _remember, _result_meta, _rule_answer, _same_query, _sse, health_monitor,
+    instance_registry, llm_service, oracle_service, query_mapper, result_cache, result_compactor, speculator
+)
+from app.services.admission import AdmissionRejected
+from app.services.metrics import metrics
+from app.services.oracle_service import PoolExhaustedError
+from app.services.result_cache import BUSY_ERROR
+
+async_bp = Blueprint('async_main', __name__)
+
+
+@async_bp.route('/')
+async def index():
+    return await render_template('index.html')
+
+
+async def _run_query(query_info: dict, intent: str = None) -> dict:
+    local = _local_result(query_info, intent)
+    if local is not None:
+        return local
+
+    return await result_cache.execute_query_async(
+        query_info['query'],
+        query_info.get('params', {}),
+        query_info.get('cache_ttl', 0),
+        query_info.get('fetch'),
+        query_info.get('cost'),
+        query_info.get('max_wait')
+    )
+
+
+def _start_speculative_query(question: str):
+    if not speculator.enabled or not llm_service.async_client:
+        return None, None
+    if llm_service.intent_cache.contains(question):
+        return None, None
+
+    guess = llm_service.local_intent(question)
+    guess_query = query_mapper.get_query(guess.get('intent'), guess.get('entities', {}))
+    if not guess_query:
+        return None, None
+
+    return guess_query, speculator.start_task(_run_query(guess_query, guess.get('intent')))
+
+
+async def _analyze_and_query(question: str, targets=None):
+    instances = instance_registry.resolve(targets, question)
+    fan_out = instances != [instance_registry.default]
+
+    guess_query, speculative = (None, None) if fan_out else _start_speculative_query(question)
+
+    started = time.perf_counter()
+    intent_result = await llm_service.analyze_question_async(question)
+
+    if not intent_result.get('success'):
+        if speculative:
+            await speculator.resolve_async(speculative, False)
+        metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'analyze', 'unknown')
+        return intent_result, 'unknown', None
+
+    intent = intent_result.get('intent', 'general')
+    entities = intent_result.get('entities', {})
+    metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'analyze', intent)
+
+    started = time.perf_counter()
+    query_info = query_mapper.get_query(intent, entities)
+    metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'map', intent)
+
+    started = time.perf_counter()
+    db_result = None
+    if speculative:
+        db_result = await speculator.resolve_async(speculative, _same_query(guess_query, query_info))
+
+    if query_info and db_result is None:
+        if fan_out and query_info.get('source') != 'history':
+            db_result = await asyncio.to_thread(instance_registry.execute_many, instances, query_info)
+        else:
+            db_result = await _run_query(query_info, intent)
+    if query_info:
+        metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'query', intent)
+
+    return intent_result, intent, db_result
+
+
+async def _resolve(question: str, data: dict):
+    resolved = _follow_up(question, data) or await _analyze_and_query(question, data.get('instances'))
+    _remember(question, data, *resolved)
+    return resolved
+
+
+def _compact(intent: str, db_result: dict) -> dict:
+    started = time.perf_counter()
+    compacted = result_compactor.compact(intent, db_result)
+    metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'compact', intent)
+    return compacted
+
+
+@async_bp.route('/api/ask', methods=['POST'])
+async def ask():
+    try:
+        data = await request.get_json()
+        question = data.get('question', '').strip()
+
+        if not question:
+            return jsonify({'error': 'Soru boş olamaz'}), 400
+
+        intent_result, intent, db_result = await _resolve(question, data)
+
+        if not intent_result.get('success'):
+            return jsonify({
+                'answer': UNKNOWN_ANSWER,
+                'intent': 'unknown',
+                'query_executed': False
+            })
+
+        started = time.perf_counter()
+        rule_answer, reason = _rule_answer(intent, db_result)
+        if reason:
+            compacted = None
+            response = rule_answer
+        else:
+            compacted = _compact(intent, db_result)
+            started = time.perf_counter()
+            response = await llm_service.format_response_async(question, intent, compacted, fallback=rule_answer)
+        metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'format', intent)
+
+        result = {'answer': response}
+        result.update(_result_meta(intent, db_result, compacted))
+        if reason:
+            result['answered_by'] = 'rules'
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({
+            'error': f'Bir hata oluştu: {str(e)}',
+            'answer': ERROR_ANSWER
+        }), 500
+
+
+@async_bp.route('/api/ask/stream', methods=['POST'])
+async def ask_stream():
+    data = await request.get_json(silent=True) or {}
+    question = data.get('question', '').strip()
+
+    if not question:
+        return jsonify({'error': 'Soru boş olamaz'}), 400
+
+    async def generate():
+        try:
+            intent_result, intent, db_result = await _resolve(question, data)
+
+            if not intent_result.get('success'):
+                yield _sse('meta', _result_meta('unknown', None))
+                yield _sse('token', {'text': UNKNOWN_ANSWER})
+                yield _sse('done', {})
+                return
+
+            rule_answer, reason = _rule_answer(intent, db_result)
+            if reason:
+                yield _sse('meta', dict(_result_meta(intent, db_result), answered_by='rules'))
+                yield _sse('token', {'text': rule_answer})
+                yield _sse('done', {})
+                return
+
+            compacted = _compact(intent, db_result)
+            yield _sse('meta', _result_meta(intent, db_result, compacted))
+
+            started = time.perf_counter()
+            first_token = True
+            async for text in llm_service.format_response_stream_async(question, intent, compacted,
+                                                                        fallback=rule_answer):
+                if first_token:
+                    first_token = False
+                    metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'first_token', intent)
+                yield _sse('token', {'text': text})
+            metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'format', intent)
+
+            yield _sse('done', {})
+
+        except Exception as e:
+            yield _sse('error', {
+                'error': f'Bir hata oluştu: {str(e)}',
+                'answer': ERROR_ANSWER
+            })
+
+    response = Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+    response.timeout = None
+    return response
+
+
+@async_bp.route('/api/report', methods=['POST'])
+async def report():
+    try:
+        payload, status = await asyncio.to_thread(_build_report, await request.get_json(silent=True) or {})
+        return jsonify(payload), status
+
+    except Exception as e:
+        return jsonify({
+            'error': f'Bir hata oluştu: {str(e)}',
+            'answer': ERROR_ANSWER
+        }), 500
+
+
+class _ExportBody:
+    """Export chunks fetched in worker threads
+
+    Quart closes the body with aclose() once the response is done, which
+    runs the cleanup even when iteration never started (HEAD requests).
+    """
+
+    def __init__(self, chunks, cleanup):
+        self.chunks = chunks
+        self.cleanup = cleanup
+        self._closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        # Each fetch round-trip runs in a worker thread
+        chunk = await asyncio.to_thread(next, self.chunks, None)
+        if chunk is None:
+            raise StopAsyncIteration
+        return chunk
+
+    async def aclose(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.chunks.close()
+        await asyncio.to_thread(self.cleanup)
+
+
+@async_bp.route('/api/export/<intent>', methods=['GET'])
+async def export(intent):
+    args = request.args.to_dict()
+    export_format = args.pop('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Bilinmeyen format: {export_format}'}), 400
+    query_info, fetch = _export_query(intent, args)
+    if not query_info:
+        return jsonify({'error': f'Bilinmeyen sorgu: {intent}'}), 404
+
+    try:
+        cost = await result_cache.admission.acquire_async('export')
+    except AdmissionRejected:
+        return jsonify({'error': BUSY_ERROR}), 503, {'Retry-After': '10'}
+    try:
+        stream = await asyncio.to_thread(
+            oracle_service.iter_query, query_info['query'], query_info.get('params', {}), fetch
+        )
+    except PoolExhaustedError:
+        result_cache.admission.release(cost)
+        return jsonify({'error': BUSY_ERROR}), 503, {'Retry-After': '10'}
+    except Exception as e:
+        result_cache.admission.release(cost)
+        return jsonify({'error': f'Sorgu hatası: {str(e)}'}), 500
+    stream.add_close_callback(lambda: result_cache.admission.release(cost))
+
+    response = Response(
+        _ExportBody(EXPORT_FORMATS[export_format][0](stream), stream.close),
+        mimetype=EXPORT_FORMATS[export_format][1],
+        headers={'Content-Disposition': f'attachment; filename={intent}.{export_format}'}
+    )
+    response.timeout = None
+    return response
+
+
+@async_bp.route('/metrics', methods=['GET'])
+async def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@async_bp.route('/api/health', methods=['GET'])
+async def health():
+    return jsonify(_health_payload(health_monitor.get_state()))
+
+
+@async_bp.route('/api/health/deep', methods=['GET'])
+async def health_deep():
+    return jsonify(_health_payload(await asyncio.to_thread(health_monitor.probe)))
@@ -1,13 +1,73 @@
-from flask import Blueprint, render_template, request, jsonify
+import csv
+import io
+import json
+import os
+import time
+from flask import Blueprint, Response, render_template, request, jsonify, stream_with_context
+from app.services import columnar
+from app.services.admission import AdmissionRejected
+from app.services.answer_engine import AnswerEngine
+from app.services.conversation_store import ConversationStore
+from app.services.health_monitor import HealthMonitor
+from app.services.history_store import HistoryStore
+from app.services.instance_registry import InstanceRegistry
 from app.services.llm_service import LLMService
-from app.services.oracle_service import OracleService
+from app.services.metrics import metrics
+from app.services.oracle_service import PoolExhaustedError
 from app.services.query_mapper import QueryMapper
+from app.services.report_runner import ReportRunner
+from app.services.result_cache import BUSY_ERROR, ResultCache
+from app.services.result_compactor import ResultCompactor
+from app.services.snapshot_collector import SnapshotCollector, SnapshotStore
+from app.services.speculation import SpeculativeExecutor
+from app.services.warmup import startup
 
 main_bp = Blueprint('main', __name__)
 
 llm_service = LLMService()
-oracle_service = OracleService()
+instance_registry = InstanceRegistry.from_env()
+oracle_service = instance_registry.default_service
 query_mapper = QueryMapper()
+result_cache = instance_registry.default_cache
+speculator = SpeculativeExecutor()
+result_compactor = ResultCompactor()
+answer_engine = AnswerEngine()
+snapshot_store = SnapshotStore()
+snapshot_collector = SnapshotCollector(oracle_service, snapshot_store, query_mapper.queries, result_cache.admission)
+history_store = HistoryStore()
+conversation_store = ConversationStore()
+health_monitor = HealthMonitor(oracle_service, llm_service)
+
+report_runner = ReportRunner(lambda query_info, intent: _run_query(query_info, intent))
+
+# History is only fed by the snapshot collector, so it follows SNAPSHOT_COLLECTOR_ENABLED by default
+history_enabled = os.getenv('HISTORY_ENABLED', os.getenv('SNAPSHOT_COLLECTOR_ENABLED', 'False')).lower() == 'true'
+if history_enabled:
+    snapshot_collector.add_listener(history_store.record)
+
+
+def _collect_gauges():
+    """Pool and cache sizes of this worker for /metrics"""
+    gauges = []
+    for name, stats in instance_registry.get_pool_stats().items():
+        for state in ('open', 'busy', 'max'):
+            if state in stats:
+                gauges.append(('diagora_oracle_pool_sessions', (name, state), stats[state]))
+    for cache in instance_registry.caches.values():
+        gauges.extend(cache.admission.gauges())
+    gauges.append(('diagora_cache_entries', ('result',), result_cache.get_stats()['entries']))
+    gauges.append(('diagora_cache_entries', ('intent',), llm_service.intent_cache.get_stats()['entries']))
+    gauges.append(('diagora_cache_entries', ('snapshot',), snapshot_store.get_stats()['snapshots']))
+    gauges.append(('diagora_cache_entries', ('conversation',), conversation_store.get_stats()['results']))
+    return gauges
+
+
+metrics.add_collector(_collect_gauges)
+metrics.add_collector(startup.gauges)
+metrics.add_collector(llm_service.breaker.gauges)
+
+UNKNOWN_ANSWER = 'Sorunuzu anlayamadım. Lütfen Oracle EBS ile ilgili bir soru sorun.'
+ERROR_ANSWER = 'İsteğiniz işlenirken bir hata oluştu. Lütfen tekrar deneyin.'
 
 
 @main_bp.route('/')
@@ -15,6 +75,202 @@ def index():
     return render_template('index.html')
 
 
+def _local_result(query_info: dict, intent: str = None):
+    """History or fresh snapshot result for a mapped query, None when the database is needed"""
+    if query_info.get('source') == 'history':
+        # Trend questions never touch Oracle
+        if not history_enabled:
+            return {
+                'success': False,
+                'error': 'Metrik geçmişi kapalı: trend soruları için SNAPSHOT_COLLECTOR_ENABLED=True ayarlayın',
+                'columns': [],
+                'data': [],
+                'source': 'history'
+            }
+        return history_store.query_trend(
+            query_info['metric'],
+            query_info.get('series'),
+            query_info.get('window_hours', 7 * 24)
+        )
+
+    if intent and snapshot_collector.schedule:
+        snapshot = snapshot_store.get(
+            query_info['query'],
+            query_info.get('params', {}),
+            snapshot_collector.max_age(intent)
+        )
+        if snapshot is not None:
+            metrics.inc('diagora_cache_requests_total', 'snapshot', 'hit')
+            return snapshot
+
+    return None
+
+
+def _run_query(query_info: dict, intent: str = None) -> dict:
+    """Execute a mapped query (served from a snapshot or cache while fresh)"""
+    local = _local_result(query_info, intent)
+    if local is not None:
+        return local
+
+    return result_cache.execute_query(
+        query_info['query'],
+        query_info.get('params', {}),
+        query_info.get('cache_ttl', 0),
+        query_info.get('fetch'),
+        query_info.get('cost'),
+        query_info.get('max_wait')
+    )
+
+
+def _start_speculative_query(question: str):
+    """Start the query for the keyword-detected intent before the LLM answers"""
+    if not speculator.enabled or not llm_service.is_configured():
+        return None, None
+    # A cached intent makes the LLM step instant, so there is nothing to hide
+    if llm_service.intent_cache.contains(question):
+        return None, None
+
+    guess = llm_service.local_intent(question)
+    guess_query = query_mapper.get_query(guess.get('intent'), guess.get('entities', {}))
+    if not guess_query:
+        return None, None
+
+    return guess_query, speculator.submit(_run_query, guess_query, guess.get('intent'))
+
+
+def _same_query(left: dict, right: dict) -> bool:
+    if not left or not right:
+        return False
+    if left.get('source') == 'history' or right.get('source') == 'history':
+        return all(left.get(key) == right.get(key) for key in ('source', 'metric', 'series', 'window_hours'))
+    if 'query' not in left or 'query' not in right:
+        return False
+    return (ResultCache.make_key(left['query'], left.get('params'))
+            == ResultCache.make_key(right['query'], right.get('params')))
+
+
+def _analyze_and_query(question: str, targets=None):
+    """Run intent detection and the mapped database query for a question"""
+    instances = instance_registry.resolve(targets, question)
+    fan_out = instances != [instance_registry.default]
+
+    guess_query, speculative = (None, None) if fan_out else _start_speculative_query(question)
+
+    # Step 1: Analyze question with LLM to detect intent
+    started = time.perf_counter()
+    intent_result = llm_service.analyze_question(question)
+
+    if not intent_result.get('success'):
+        if speculative:
+            speculator.resolve(speculative, False)
+        metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'analyze', 'unknown')
+        return intent_result, 'unknown', None
+
+    intent = intent_result.get('intent', 'general')
+    entities = intent_result.get('entities', {})
+    metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'analyze', intent)
+
+    # Step 2: Map intent to SQL query
+    started = time.perf_counter()
+    query_info = query_mapper.get_query(intent, entities)
+    metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'map', intent)
+
+    started = time.perf_counter()
+    db_result = None
+    if speculative:
+        db_result = speculator.resolve(speculative, _same_query(guess_query, query_info))
+
+    if query_info and db_result is None:
+        # Step 3: Execute Oracle query (concurrently on every targeted instance)
+        if fan_out and query_info.get('source') != 'history':
+            db_result = instance_registry.execute_many(instances, query_info)
+        else:
+            db_result = _run_query(query_info, intent)
+    if query_info:
+        metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'query', intent)
+
+    return intent_result, intent, db_result
+
+
+def _follow_up(question: str, data: dict):
+    """(intent_result, intent, db_result) answered from the session's previous rows, or None"""
+    session_id = data.get('session_id')
+    # Explicit instance targets ask for fresh rows from those instances
+    if not conversation_store.enabled or not session_id or data.get('instances'):
+        return None
+
+    started = time.perf_counter()
+    found = conversation_store.follow_up(session_id, question, llm_service.local_intent(question).get('intent'))
+    if found is None:
+        return None
+    intent, db_result, _ = found
+    metrics.inc('diagora_follow_ups_total', intent)
+    metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'follow_up', intent)
+    return {'success': True, 'intent': intent, 'source': 'conversation'}, intent, db_result
+
+
+def _remember(question: str, data: dict, intent_result: dict, intent: str, db_result: dict):
+    if intent_result.get('success') and data.get('session_id'):
+        conversation_store.remember(data['session_id'], question, intent, db_result)
+
+
+def _resolve(question: str, data: dict):
+    """Follow-up over the previous result, or intent detection and the database query"""
+    resolved = _follow_up(question, data) or _analyze_and_query(question, data.get('instances'))
+    _remember(question, data, *resolved)
+    return resolved
+
+
+def _compact(intent: str, db_result: dict) -> dict:
+    started = time.perf_counter()
+    compacted = result_compactor.compact(intent, db_result)
+    metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'compact', intent)
+    return compacted
+
+
+def _result_meta(intent: str, db_result: dict, compacted: dict = None) -> dict:
+    compacted = compacted or {}
+    return {
+        'intent': intent,
+        'query_executed': db_result is not None,
+        'row_count': len(db_result.get('data', [])) if db_result else 0,
+        'rows_sent': compacted.get('rows_sent', 0),
+        'rows_summarized': compacted.get('rows_summarized', 0),
+        'truncated': db_result.get('truncated', False) if db_result else False,
+        'cached': db_result.get('cached', False) if db_result else False,
+        'cache_age': db_result.get('cache_age') if db_result else None,
+        'stale': db_result.get('stale', False) if db_result else False,
+        'instances': db_result.get('instances') if db_result else None,
+        'follow_up': db_result.get('follow_up') if db_result else None
+    }
+
+
+def _rule_answer(intent: str, db_result: dict):
+    """(answer, reason) from the rule engine
+
+    reason is set ('selected' or 'llm_down') when the answer replaces the LLM
+    call; otherwise the answer, if any, is only the fallback for a failing LLM.
+    """
+    answer = answer_engine.answer(intent, db_result)
+    if answer is None:
+        return None, None
+    if answer_engine.selected(intent):
+        reason = 'selected'
+    elif answer_engine.fallback and (
+            not llm_service.is_configured() or health_monitor.llm.status == 'unreachable'
+            or llm_service.breaker.is_open()):
+        reason = 'llm_down'
+    else:
+        return (answer if answer_engine.fallback else None), None
+
+    metrics.inc('diagora_rule_answers_total', intent, reason)
+    return answer, reason
+
+
+def _sse(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n"
+
+
 @main_bp.route('/api/ask', methods=['POST'])
 def ask():
     try:
@@ -24,53 +280,283 @@ def ask():
         if not question:
             return jsonify({'error': 'Soru boş olamaz'}), 400
 
-        # Step 1: Analyze question with LLM to detect intent
-        intent_result = llm_service.analyze_question(question)
+        intent_result, intent, db_result = _resolve(question, data)
 
         if not intent_result.get('success'):
             return jsonify({
-                'answer': 'Sorunuzu anlayamadım. Lütfen Oracle EBS ile ilgili bir soru sorun.',
+                'answer': UNKNOWN_ANSWER,
                 'intent': 'unknown',
                 'query_executed': False
             })
 
-        intent = intent_result.get('intent', 'general')
-        entities = intent_result.get('entities', {})
+        # Step 4: Answer from the rules, or compact the rows and format the response with LLM
+        started = time.perf_counter()
+        rule_answer, reason = _rule_answer(intent, db_result)
+        if reason:
+            compacted = None
+            response = rule_answer
+        else:
+            compacted = _compact(intent, db_result)
+            started = time.perf_counter()
+            response = llm_service.format_response(question, intent, compacted, fallback=rule_answer)
+        metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'format', intent)
+
+        result = {'answer': response}
+        result.update(_result_meta(intent, db_result, compacted))
+        if reason:
+            result['answered_by'] = 'rules'
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({
+            'error': f'Bir hata oluştu: {str(e)}',
+            'answer': ERROR_ANSWER
+        }), 500
+
+
+@main_bp.route('/api/ask/stream', methods=['POST'])
+def ask_stream():
+    """Server-Sent Events variant of /api/ask
+
+    Emits a `meta` event once the database step finishes, `token` events while
+    the answer is generated and a final `done` (or `error`) event.
+    """
+    data = request.get_json(silent=True) or {}
+    question = data.get('question', '').strip()
+
+    if not question:
+        return jsonify({'error': 'Soru boş olamaz'}), 400
+
+    def generate():
+        try:
+            intent_result, intent, db_result = _resolve(question, data)
+
+            if not intent_result.get('success'):
+                yield _sse('meta', _result_meta('unknown', None))
+                yield _sse('token', {'text': UNKNOWN_ANSWER})
+                yield _sse('done', {})
+                return
+
+            rule_answer, reason = _rule_answer(intent, db_result)
+            if reason:
+                yield _sse('meta', dict(_result_meta(intent, db_result), answered_by='rules'))
+                yield _sse('token', {'text': rule_answer})
+                yield _sse('done', {})
+                return
+
+            compacted = _compact(intent, db_result)
+            yield _sse('meta', _result_meta(intent, db_result, compacted))
+
+            started = time.perf_counter()
+            first_token = True
+            for text in llm_service.format_response_stream(question, intent, compacted, fallback=rule_answer):
+                if first_token:
+                    first_token = False
+                    metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'first_token', intent)
+                yield _sse('token', {'text': text})
+            metrics.observe('diagora_ask_stage_seconds', time.perf_counter() - started, 'format', intent)
+
+            yield _sse('done', {})
+
+        except Exception as e:
+            yield _sse('error', {
+                'error': f'Bir hata oluştu: {str(e)}',
+                'answer': ERROR_ANSWER
+            })
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
 
-        # Step 2: Map intent to SQL query
-        query_info = query_mapper.get_query(intent, entities)
 
-        db_result = None
-        if query_info:
-            # Step 3: Execute Oracle query
-            db_result = oracle_service.execute_query(
-                query_info['query'],
-                query_info.get('params', {})
-            )
+def _build_report(data: dict):
+    """Run the requested checks and summarize them; returns (payload, status)"""
+    requested = data.get('intents') or 'all'
+    if requested == 'all':
+        requested = list(query_mapper.queries.keys())
+    elif isinstance(requested, str):
+        requested = [requested]
+    elif not isinstance(requested, list):
+        return {'error': "intents bir liste veya 'all' olmalı"}, 400
 
-        # Step 4: Format response with LLM
-        response = llm_service.format_response(question, intent, db_result)
+    unknown = [str(intent) for intent in requested
+               if not isinstance(intent, str) or intent not in query_mapper.queries]
+    if unknown:
+        return {'error': f"Bilinmeyen kontrol: {', '.join(unknown)}"}, 400
 
-        return jsonify({
-            'answer': response,
-            'intent': intent,
-            'query_executed': db_result is not None,
-            'row_count': len(db_result.get('data', [])) if db_result else 0
-        })
+    try:
+        timeout = float(data.get('timeout') or report_runner.timeout)
+    except (TypeError, ValueError):
+        return {'error': 'timeout saniye cinsinden bir sayı olmalı'}, 400
+    if timeout <= 0:
+        return {'error': 'timeout sıfırdan büyük olmalı'}, 400
+    timeout = min(timeout, report_runner.timeout)
+
+    queries = {intent: query_mapper.get_query(intent) for intent in dict.fromkeys(requested)}
+
+    started = time.perf_counter()
+    results = report_runner.run(queries, timeout)
+    query_elapsed = time.perf_counter() - started
+
+    # All intents go into one prompt, so they share one context budget
+    share = result_compactor.token_budget // max(len(results), 1)
+    compacted = {intent: result_compactor.compact(intent, result, share) for intent, result in results.items()}
+    fallbacks = {intent: answer_engine.answer(intent, result) for intent, result in results.items()}
+    answer = llm_service.format_report(compacted, fallbacks)
+
+    return {
+        'answer': answer,
+        'intents': {
+            intent: {
+                'success': result.get('success', False),
+                'row_count': len(result.get('data', [])),
+                'elapsed_ms': result.get('elapsed_ms'),
+                'cached': result.get('cached', False),
+                'timed_out': result.get('timed_out', False),
+                'error': result.get('error')
+            }
+            for intent, result in results.items()
+        },
+        'partial': any(result.get('timed_out') for result in results.values()),
+        'query_elapsed_ms': round(query_elapsed * 1000, 1),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    }, 200
+
+
+@main_bp.route('/api/report', methods=['POST'])
+def report():
+    """Run several EBS checks concurrently and summarize them in one answer"""
+    try:
+        payload, status = _build_report(request.get_json(silent=True) or {})
+        return jsonify(payload), status
 
     except Exception as e:
         return jsonify({
             'error': f'Bir hata oluştu: {str(e)}',
-            'answer': 'İsteğiniz işlenirken bir hata oluştu. Lütfen tekrar deneyin.'
+            'answer': ERROR_ANSWER
         }), 500
 
 
+def _export_query(intent: str, args: dict):
+    """Mapped query and fetch settings for an export, None for unknown or non-SQL intents"""
+    query_info = query_mapper.get_query(intent, args)
+    if not query_info or 'query' not in query_info:
+        # Trend answers come from the local history store; there is no SQL to stream
+        return None, None
+    fetch = dict(query_info.get('fetch') or {})
+    fetch['max_rows'] = int(os.getenv('EXPORT_MAX_ROWS', 100000))
+    return query_info, fetch
+
+
+def _csv_chunks(stream):
+    """CSV text for a QueryStream, one chunk per fetch batch"""
+    with stream:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(stream.columns)
+        for batch in stream.batches():
+            writer.writerows(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+
+def _ndjson_chunks(stream):
+    """NDJSON text for a QueryStream (one object per row), one chunk per fetch batch"""
+    with stream:
+        for batch in stream.batches():
+            if columnar.enabled():
+                # Encoded column-wise: dates are rendered once per column, not per cell
+                yield ''.join(columnar.ColumnarResult.from_batches(stream.columns, [batch]).iter_ndjson())
+            else:
+                yield ''.join(json.dumps(dict(zip(stream.columns, row)), ensure_ascii=False, default=str) + '\n'
+                              for row in batch)
+
+
+# format query parameter -> (chunk generator, mimetype)
+EXPORT_FORMATS = {
+    'csv': (_csv_chunks, 'text/csv'),
+    'ndjson': (_ndjson_chunks, 'application/x-ndjson')
+}
+
+
+@main_bp.route('/api/export/<intent>', methods=['GET'])
+def export(intent):
+    """Stream the full result of an EBS query as CSV (or ?format=ndjson), one fetch batch at a time"""
+    args = request.args.to_dict()
+    export_format = args.pop('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Bilinmeyen format: {export_format}'}), 400
+    query_info, fetch = _export_query(intent, args)
+    if not query_info:
+        return jsonify({'error': f'Bilinmeyen sorgu: {intent}'}), 404
+
+    try:
+        cost = result_cache.admission.acquire('export')
+    except AdmissionRejected:
+        return jsonify({'error': BUSY_ERROR}), 503, {'Retry-After': '10'}
+    try:
+        stream = oracle_service.iter_query(query_info['query'], query_info.get('params', {}), fetch)
+    except PoolExhaustedError:
+        result_cache.admission.release(cost)
+        return jsonify({'error': BUSY_ERROR}), 503, {'Retry-After': '10'}
+    except Exception as e:
+        result_cache.admission.release(cost)
+        return jsonify({'error': f'Sorgu hatası: {str(e)}'}), 500
+    # The slot is freed as soon as the last batch is fetched (or the response is closed)
+    stream.add_close_callback(lambda: result_cache.admission.release(cost))
+
+    chunks, mimetype = EXPORT_FORMATS[export_format]
+    response = Response(
+        chunks(stream),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={intent}.{export_format}'}
+    )
+    # The chunk generator only closes the stream once it has started (not for HEAD
+    # or a client gone before the first chunk); closing the response always does
+    response.call_on_close(stream.close)
+    return response
+
+
+def _health_payload(state: dict) -> dict:
+    return {
+        'status': 'healthy',
+        'database': state['database']['status'],
+        'llm': state['llm']['status'],
+        'checks': state,
+        'pool': oracle_service.get_pool_stats(),
+        'instances': instance_registry.get_pool_stats() if instance_registry.is_multi else None,
+        'result_cache': result_cache.get_stats(),
+        'admission': instance_registry.get_admission_stats(),
+        'intent_cache': llm_service.intent_cache.get_stats(),
+        'conversations': conversation_store.get_stats(),
+        'llm_tokens': llm_service.token_budget.get_stats(),
+        'llm_breaker': llm_service.breaker.get_stats(),
+        'speculation': speculator.get_stats(),
+        'snapshots': dict(snapshot_store.get_stats(), collector=snapshot_collector.get_stats()),
+        'startup': startup.get_stats()
+    }
+
+
+@main_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus text exposition of all workers' metrics"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 @main_bp.route('/api/health', methods=['GET'])
 def health():
-    """Health check endpoint"""
-    db_status = oracle_service.test_connection()
-    return jsonify({
-        'status': 'healthy',
-        'database': 'connected' if db_status else 'disconnected',
-        'llm': 'configured' if llm_service.is_configured() else 'not configured'
-    })
+    """Health check endpoint (cached probe state, no network I/O)"""
+    return jsonify(_health_payload(health_monitor.get_state()))
+
+
+@main_bp.route('/api/health/deep', methods=['GET'])
+def health_deep():
+    """Health check that probes Oracle and Azure OpenAI right now"""
+    return jsonify(_health_payload(health_monitor.probe()))
@@ -0,0 +1,240 @@
+"""Admission control for Oracle queries
+
+Every EBS_QUERIES entry has a cost class ('cost': light, medium or heavy).
+Per instance and worker process, at most ADMISSION_MAX_ACTIVE queries run at
+once, and at most ADMISSION_<CLASS>_LIMIT of one class. Queries over the
+limit wait in a bounded per-class queue; when a slot frees up, waiting light
+queries go first, then medium, then heavy, then report checks, then exports.
+Reports and exports have classes of their own: a slow download never holds
+a heavy query's slot, and a report's checks run side by side (up to
+ADMISSION_REPORT_LIMIT) instead of one heavy query at a time. A query that
+finds its queue full, or waits longer than ADMISSION_<CLASS>_MAX_WAIT_SECONDS, is
+rejected with AdmissionRejected so the caller can answer from a stale result
+instead.
+
+Threads and asyncio tasks share the same slots.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from app.services.metrics import metrics
+
+# Highest priority first
+COST_CLASSES = ('light', 'medium', 'heavy', 'report', 'export')
+DEFAULT_COST = 'medium'
+DEFAULTS = {
+    # limit, queue size, max wait seconds
+    'light': (4, 50, 10),
+    'medium': (2, 20, 10),
+    'heavy': (1, 10, 20),
+    # Below max_active, so a report leaves room for interactive questions
+    'report': (3, 20, 30),
+    'export': (1, 5, 5)
+}
+
+
+class AdmissionRejected(Exception):
+    """The query was not admitted (queue full or waited too long)"""
+
+    def __init__(self, cost: str, reason: str):
+        super().__init__(f'{cost} query rejected: {reason}')
+        self.cost = cost
+        self.reason = reason
+
+
+class _Waiter:
+    """One queued query, woken by a thread event or an asyncio future"""
+
+    __slots__ = ('cost', 'granted', 'event', 'loop', 'future')
+
+    def __init__(self, cost: str):
+        self.cost = cost
+        self.granted = False
+        self.event = None
+        self.loop = None
+        self.future = None
+
+    def grant(self):
+        self.granted = True
+        if self.future is not None:
+            self.loop.call_soon_threadsafe(self._resolve)
+        else:
+            self.event.set()
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+
+class AdmissionController:
+    """Per-class concurrency limits with bounded priority queues for one instance"""
+
+    def __init__(self, name: str = 'default'):
+        self.name = name
+        self.enabled = os.getenv('ADMISSION_ENABLED', 'True').lower() == 'true'
+        self.max_active = int(os.getenv('ADMISSION_MAX_ACTIVE', os.getenv('ORACLE_POOL_MAX', 4)))
+        self.limits, self.queue_sizes, self.max_waits = {}, {}, {}
+        for cost, (limit, queue_size, max_wait) in DEFAULTS.items():
+            prefix = f'ADMISSION_{cost.upper()}_'
+            self.limits[cost] = int(os.getenv(f'{prefix}LIMIT', limit))
+            self.queue_sizes[cost] = int(os.getenv(f'{prefix}QUEUE', queue_size))
+            self.max_waits[cost] = float(os.getenv(f'{prefix}MAX_WAIT_SECONDS', max_wait))
+        self._active = {cost: 0 for cost in COST_CLASSES}
+        self._waiting = {cost: deque() for cost in COST_CLASSES}
+        self._lock = threading.Lock()
+        self.admitted = {cost: 0 for cost in COST_CLASSES}
+        self.rejected = {cost: 0 for cost in COST_CLASSES}
+        self.wait_total = {cost: 0.0 for cost in COST_CLASSES}
+        self.wait_max = {cost: 0.0 for cost in COST_CLASSES}
+
+    @staticmethod
+    def cost_class(cost: str = None) -> str:
+        return cost if cost in COST_CLASSES else DEFAULT_COST
+
+    def _has_room(self, cost: str) -> bool:
+        return (sum(self._active.values()) < self.max_active
+                and self._active[cost] < self.limits[cost])
+
+    def _enter(self, cost: str):
+        """Take a slot now (None) or queue a waiter (call with the lock held)"""
+        # Queries already waiting in this class go first
+        if not self._waiting[cost] and self._has_room(cost):
+            self._active[cost] += 1
+            return None
+        if len(self._waiting[cost]) >= self.queue_sizes[cost]:
+            self._reject(cost, 'queue_full')
+        waiter = _Waiter(cost)
+        self._waiting[cost].append(waiter)
+        return waiter
+
+    def _dispatch(self):
+        """Hand free slots to waiters, cheapest class first (call with the lock held)"""
+        for cost in COST_CLASSES:
+            queue = self._waiting[cost]
+            while queue and self._has_room(cost):
+                self._active[cost] += 1
+                queue.popleft().grant()
+
+    def _settle(self, waiter: _Waiter, started: float):
+        """After waking up or timing out: keep the granted slot or leave the queue"""
+        with self._lock:
+            if not waiter.granted:
+                self._waiting[waiter.cost].remove(waiter)
+                self._reject(waiter.cost, 'timeout')
+        self._admitted(waiter.cost, time.perf_counter() - started)
+
+    def _abandon(self, waiter: _Waiter):
+        """The waiting caller was cancelled"""
+        with self._lock:
+            if waiter.granted:
+                self._active[waiter.cost] -= 1
+                self._dispatch()
+            else:
+                self._waiting[waiter.cost].remove(waiter)
+
+    def _reject(self, cost: str, reason: str):
+        self.rejected[cost] += 1
+        metrics.inc('diagora_admission_total', self.name, cost, reason)
+        raise AdmissionRejected(cost, reason)
+
+    def _admitted(self, cost: str, waited: float):
+        with self._lock:
+            self.admitted[cost] += 1
+            self.wait_total[cost] += waited
+            self.wait_max[cost] = max(self.wait_max[cost], waited)
+        metrics.inc('diagora_admission_total', self.name, cost, 'admitted')
+        metrics.observe('diagora_admission_wait_seconds', waited, self.name, cost)
+
+    def _max_wait(self, cost: str, max_wait: float = None) -> float:
+        # A caller with its own deadline (a report) never waits past it
+        return self.max_waits[cost] if max_wait is None else max(0.0, min(max_wait, self.max_waits[cost]))
+
+    def acquire(self, cost: str = None, max_wait: float = None) -> str:
+        """Block until a slot of the query's class is free; returns the class to release"""
+        cost = self.cost_class(cost)
+        if not self.enabled:
+            return cost
+        started = time.perf_counter()
+        with self._lock:
+            waiter = self._enter(cost)
+            if waiter is not None:
+                waiter.event = threading.Event()
+        if waiter is None:
+            self._admitted(cost, 0.0)
+            return cost
+
+        waiter.event.wait(self._max_wait(cost, max_wait))
+        self._settle(waiter, started)
+        return cost
+
+    async def acquire_async(self, cost: str = None, max_wait: float = None) -> str:
+        """acquire() for asyncio tasks; waiting does not block the event loop"""
+        cost = self.cost_class(cost)
+        if not self.enabled:
+            return cost
+        started = time.perf_counter()
+        with self._lock:
+            waiter = self._enter(cost)
+            if waiter is not None:
+                waiter.loop = asyncio.get_running_loop()
+                waiter.future = waiter.loop.create_future()
+        if waiter is None:
+            self._admitted(cost, 0.0)
+            return cost
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self._max_wait(cost, max_wait))
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        self._settle(waiter, started)
+        return cost
+
+    def release(self, cost: str):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._active[cost] -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, cost: str = None, max_wait: float = None):
+        cost = self.acquire(cost, max_wait)
+        try:
+            yield
+        finally:
+            self.release(cost)
+
+    def gauges(self) -> list:
+        """Metrics collector: running and queued queries per class"""
+        with self._lock:
+            return ([('diagora_admission_active', (self.name, cost), self._active[cost]) for cost in COST_CLASSES]
+                    + [('diagora_admission_queue_depth', (self.name, cost), len(self._waiting[cost]))
+                       for cost in COST_CLASSES])
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'max_active': self.max_active,
+                'classes': {
+                    cost: {
+                        'limit': self.limits[cost],
+                        'active': self._active[cost],
+                        'queued': len(self._waiting[cost]),
+                        'queue_size': self.queue_sizes[cost],
+                        'admitted': self.admitted[cost],
+                        'rejected': self.rejected[cost],
+                        'wait_avg_ms': round(self.wait_total[cost] / self.admitted[cost] * 1000, 2)
+                        if self.admitted[cost] else 0.0,
+                        'wait_max_ms': round(self.wait_max[cost] * 1000, 2)
+                    }
+                    for cost in COST_CLASSES
+                }
+            }
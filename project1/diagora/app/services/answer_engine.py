@@ -0,0 +1,268 @@
+"""Rule-based Turkish answers for data-only intents
+
+For tablespace usage, invalid objects and concurrent managers the LLM mostly
+restates the numbers. These answers are built from the rows instead: a
+severity, the counts and the worst offenders, in the layout the system
+prompt asks the model for. They replace the LLM call for the intents in
+ANSWER_ENGINE_INTENTS and stand in for it whenever the LLM is down, slow or
+fails (ANSWER_ENGINE_FALLBACK).
+"""
+import os
+from collections import Counter
+
+SEVERITY_MARKS = {'critical': '❌', 'warning': '⚠️', 'ok': '✅'}
+SEVERITY_LABELS = {'critical': 'Kritik', 'warning': 'Uyarı', 'ok': 'Normal'}
+
+# Thresholds and list sizes per intent
+RULES = {
+    'tablespace': {
+        'critical_percent': 90,
+        'warning_percent': 80,
+        'top': 5
+    },
+    'invalid_objects': {
+        # Object count at which the whole check is critical
+        'critical_count': 50,
+        'top': 5,
+        'examples': 5
+    },
+    'concurrent_manager': {
+        # A stopped one of these is critical, any other stopped manager a warning
+        'critical_managers': ['FNDICM', 'STANDARD', 'FNDCRM'],
+        'top': 8
+    }
+}
+
+# FND_CONCURRENT_QUEUES.CONTROL_CODE values
+CONTROL_CODES = {
+    'A': 'Başlatılıyor',
+    'D': 'Devre dışı bırakılıyor',
+    'E': 'Devre dışı',
+    'H': 'Beklemede',
+    'N': 'Hedef node kullanılamıyor',
+    'O': 'Askıya alınıyor',
+    'P': 'Askıda',
+    'Q': 'Devam ettiriliyor',
+    'R': 'Yeniden başlatılıyor',
+    'T': 'Sonlandırılıyor',
+    'U': 'Doğrulanıyor',
+    'V': 'Doğrulanacak',
+    'X': 'Sonlandırıldı'
+}
+STOPPED_CODES = {'D', 'E', 'N', 'P', 'T', 'X'}
+
+
+def _number(value, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _records(db_result: dict) -> list:
+    columns = [c.upper() for c in db_result.get('columns', [])]
+    return [dict(zip(columns, row)) for row in db_result.get('data', [])]
+
+
+def _name(record: dict, column: str) -> str:
+    # Merged multi-instance results carry an INSTANCE column
+    if record.get('INSTANCE'):
+        return f"{record['INSTANCE']}/{record.get(column)}"
+    return str(record.get(column))
+
+
+def _header(title: str, severity: str) -> str:
+    return f"**{title}:** {SEVERITY_MARKS[severity]} {SEVERITY_LABELS[severity]}"
+
+
+def _table(headers: list, rows: list) -> list:
+    lines = ['| ' + ' | '.join(headers) + ' |', '|' + '|'.join('---' for _ in headers) + '|']
+    lines += ['| ' + ' | '.join(str(value) for value in row) + ' |' for row in rows]
+    return lines
+
+
+class AnswerEngine:
+    """Per-intent templates that answer from the result set without an LLM call"""
+
+    def __init__(self):
+        self.intents = {
+            intent.strip() for intent in os.getenv('ANSWER_ENGINE_INTENTS', '').split(',') if intent.strip()
+        }
+        self.fallback = os.getenv('ANSWER_ENGINE_FALLBACK', 'True').lower() == 'true'
+        self.builders = {
+            'tablespace': self._tablespace,
+            'invalid_objects': self._invalid_objects,
+            'concurrent_manager': self._concurrent_manager
+        }
+
+    def supports(self, intent: str) -> bool:
+        return intent in self.builders
+
+    def selected(self, intent: str) -> bool:
+        """True when the intent is always answered by rules"""
+        return intent in self.intents and self.supports(intent)
+
+    def answer(self, intent: str, db_result: dict):
+        """Markdown answer built from the rows, or None (no rules for the intent, or no data)"""
+        builder = self.builders.get(intent)
+        if builder is None or not db_result or db_result.get('error') or not db_result.get('success', True):
+            return None
+
+        lines = builder(_records(db_result), RULES[intent])
+        if db_result.get('truncated'):
+            lines.append(f"\n_Not: Sonuç satır limitine takıldı, değerlendirme ilk "
+                         f"{len(db_result.get('data', []))} satırı kapsıyor._")
+        failed = [name for name, status in (db_result.get('instances') or {}).items() if not status.get('success')]
+        if failed:
+            lines.append(f"\n_Not: {', '.join(failed)} instance'larından sonuç alınamadı._")
+        return '\n'.join(lines)
+
+    def _tablespace(self, records: list, rules: dict) -> list:
+        critical_limit, warning_limit = rules['critical_percent'], rules['warning_percent']
+        critical, warning = [], []
+        used_total = size_total = 0.0
+        for record in records:
+            used = _number(record.get('USED_PERCENT'))
+            used_total += _number(record.get('USED_GB'))
+            size_total += _number(record.get('TOTAL_GB'))
+            if used >= critical_limit:
+                critical.append(record)
+            elif used >= warning_limit:
+                warning.append(record)
+
+        severity = 'critical' if critical else 'warning' if warning else 'ok'
+        lines = [_header('Tablespace Durumu', severity), '']
+        if not records:
+            lines.append('Tablespace kullanım bilgisi bulunamadı.')
+            return lines
+
+        lines.append(
+            f"{len(records)} tablespace kontrol edildi: {len(critical)} kritik (%{critical_limit} ve üzeri), "
+            f"{len(warning)} uyarı (%{warning_limit}-{critical_limit}), "
+            f"{len(records) - len(critical) - len(warning)} normal."
+        )
+        if size_total:
+            lines.append(f"Toplam kullanım: {used_total:.2f} GB / {size_total:.2f} GB "
+                         f"(%{used_total / size_total * 100:.1f}).")
+
+        ranked = sorted(records, key=lambda r: -_number(r.get('USED_PERCENT')))
+        shown = (critical + warning) or ranked[:3]
+        shown = sorted(shown, key=lambda r: -_number(r.get('USED_PERCENT')))[:rules['top']]
+        lines += ['', '**En dolu tablespace\'ler:**' if critical or warning else '**En yüksek doluluk:**', '']
+
+        table = []
+        for record in shown:
+            used = _number(record.get('USED_PERCENT'))
+            level = 'critical' if used >= critical_limit else 'warning' if used >= warning_limit else 'ok'
+            free = _number(record.get('TOTAL_GB')) - _number(record.get('USED_GB'))
+            table.append([
+                _name(record, 'TABLESPACE_NAME'), record.get('USED_GB'), record.get('TOTAL_GB'),
+                f'{free:.2f}', f'%{used:.2f}', f'{SEVERITY_MARKS[level]} {SEVERITY_LABELS[level]}'
+            ])
+        lines += _table(['Tablespace', 'Kullanılan (GB)', 'Toplam (GB)', 'Boş (GB)', 'Doluluk', 'Durum'], table)
+        if len(critical) + len(warning) > len(shown):
+            lines.append(f"\n... ve eşik üzerinde {len(critical) + len(warning) - len(shown)} tablespace daha.")
+
+        lines += ['', '**Öneriler:**']
+        if critical:
+            worst = max(critical, key=lambda r: _number(r.get('USED_PERCENT')))
+            lines.append(f"1. Öncelik {_name(worst, 'TABLESPACE_NAME')}: datafile ekleyin veya "
+                         f"AUTOEXTEND/MAXSIZE ayarlarını kontrol edin.")
+            lines.append('2. Kritik tablespace\'lerdeki büyük segmentleri (DBA_SEGMENTS) inceleyin.')
+        elif warning:
+            lines.append('1. Uyarı seviyesindeki tablespace\'lerin büyüme hızını izleyin ve kapasite planlayın.')
+        else:
+            lines.append('Aksiyon gerekmiyor, tüm tablespace\'ler eşiklerin altında.')
+        return lines
+
+    def _invalid_objects(self, records: list, rules: dict) -> list:
+        count = len(records)
+        severity = 'critical' if count >= rules['critical_count'] else 'warning' if count else 'ok'
+        lines = [_header('Invalid Objeler', severity), '']
+        if not count:
+            lines.append('İzlenen şemalarda invalid obje bulunmuyor.')
+            return lines
+
+        owners = Counter(_name(record, 'OWNER') for record in records)
+        types = Counter(record.get('OBJECT_TYPE') for record in records)
+        pairs = Counter((_name(record, 'OWNER'), record.get('OBJECT_TYPE')) for record in records)
+
+        lines.append(f"Toplam {count} invalid obje var. Şemalara göre: "
+                     + ', '.join(f'{owner} {n}' for owner, n in owners.most_common()) + '.')
+        lines.append('Obje tiplerine göre: ' + ', '.join(f'{t} {n}' for t, n in types.most_common()) + '.')
+
+        lines += ['', '**En çok invalid obje olan şema / tipler:**', '']
+        lines += _table(['Şema', 'Obje Tipi', 'Adet'],
+                        [[owner, object_type, n] for (owner, object_type), n in pairs.most_common(rules['top'])])
+
+        examples = records[:rules['examples']]
+        lines += ['', '**Örnek objeler:** ' + ', '.join(
+            f"{_name(record, 'OWNER')}.{record.get('OBJECT_NAME')} ({record.get('OBJECT_TYPE')})"
+            for record in examples
+        ) + ('...' if count > len(examples) else '')]
+
+        lines += ['', '**Öneriler:**',
+                  '1. Objeleri `utlrp.sql` ya da adadmin "Compile APPS schema" ile yeniden derleyin.',
+                  '2. Derlemeden sonra invalid kalanların hatalarını DBA_ERRORS üzerinden kontrol edin.']
+        return lines
+
+    def _concurrent_manager(self, records: list, rules: dict) -> list:
+        critical_names = set(rules['critical_managers'])
+        stopped, degraded = [], []
+        running_total = max_total = 0
+        for record in records:
+            running = int(_number(record.get('RUNNING')))
+            maximum = int(_number(record.get('MAX_PROCESSES')))
+            running_total += running
+            max_total += maximum
+            if record.get('CONTROL_CODE') in STOPPED_CODES or (running == 0 and maximum > 0):
+                stopped.append(record)
+            elif running < maximum:
+                degraded.append(record)
+
+        severity = 'ok'
+        if stopped or degraded:
+            severity = 'warning'
+        if any(record.get('MANAGER_NAME') in critical_names for record in stopped):
+            severity = 'critical'
+
+        lines = [_header('Concurrent Manager Durumu', severity), '']
+        if not records:
+            lines.append('Aktif concurrent manager bulunamadı.')
+            return lines
+
+        lines.append(
+            f"{len(records)} aktif manager: {len(records) - len(stopped) - len(degraded)} tam kapasite, "
+            f"{len(degraded)} eksik kapasite, {len(stopped)} durmuş. "
+            f"Toplam {running_total} / {max_total} process çalışıyor."
+        )
+
+        problems = stopped + sorted(
+            degraded, key=lambda r: _number(r.get('RUNNING')) - _number(r.get('MAX_PROCESSES'))
+        )
+        if problems:
+            lines += ['', '**Dikkat gerektiren manager\'lar:**', '']
+            table = []
+            for record in problems[:rules['top']]:
+                code = record.get('CONTROL_CODE')
+                is_stopped = record in stopped
+                level = 'critical' if is_stopped and record.get('MANAGER_NAME') in critical_names else 'warning'
+                table.append([
+                    _name(record, 'MANAGER_NAME'), record.get('RUNNING'), record.get('MAX_PROCESSES'),
+                    CONTROL_CODES.get(code, code or '-'),
+                    f"{SEVERITY_MARKS[level]} {'Durmuş' if is_stopped else 'Eksik kapasite'}"
+                ])
+            lines += _table(['Manager', 'Çalışan', 'Max', 'Kontrol Kodu', 'Durum'], table)
+            if len(problems) > rules['top']:
+                lines.append(f"\n... ve {len(problems) - rules['top']} manager daha.")
+
+        lines += ['', '**Öneriler:**']
+        if stopped:
+            lines.append('1. Durmuş manager\'ları System Administrator > Concurrent > Manager > Administer '
+                         'ekranından yeniden başlatın; öncesinde $APPLCSF/$APPLLOG altındaki logları kontrol edin.')
+        if degraded:
+            lines.append(f"{2 if stopped else 1}. Eksik kapasiteli manager'ların node ve process durumunu "
+                         f"kontrol edin (Verify).")
+        if not problems:
+            lines.append("Aksiyon gerekmiyor, tüm manager'lar hedef process sayısında çalışıyor.")
+        return lines
@@ -0,0 +1,165 @@
+"""Circuit breaker for Azure OpenAI calls
+
+    closed     calls go through; their latency and outcome are kept for the
+               last LLM_BREAKER_WINDOW_SECONDS
+    open       entered when the window holds at least LLM_BREAKER_MIN_CALLS
+               and the failure rate reaches LLM_BREAKER_ERROR_RATE, or when
+               one call type's p95 latency (over at least MIN_CALLS of that
+               type) reaches its limit: LLM_BREAKER_P95_INTENT_SECONDS for
+               intent calls, LLM_BREAKER_P95_SECONDS otherwise. Calls are
+               refused, so requests are answered locally at once, for
+               LLM_BREAKER_OPEN_SECONDS.
+    half_open  a single probe call is let through; success closes the
+               breaker, failure opens it again.
+
+State is per worker process, like the caches.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+STATE_VALUES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+
+class CircuitOpenError(Exception):
+    """The breaker refused the call"""
+
+
+def provider_failure(error: Exception) -> bool:
+    """True for errors that say the provider is unhealthy, not for bad requests or unparsable answers"""
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return not isinstance(error, (ValueError, KeyError))
+
+
+class CircuitBreaker:
+    """Error rate and p95 latency breaker over a sliding time window"""
+
+    def __init__(self, name: str = 'llm'):
+        self.name = name
+        self.enabled = os.getenv('LLM_BREAKER_ENABLED', 'True').lower() == 'true'
+        self.window = float(os.getenv('LLM_BREAKER_WINDOW_SECONDS', 60))
+        self.min_calls = int(os.getenv('LLM_BREAKER_MIN_CALLS', 10))
+        self.error_rate = float(os.getenv('LLM_BREAKER_ERROR_RATE', 0.5))
+        self.p95_limit = float(os.getenv('LLM_BREAKER_P95_SECONDS', 10))
+        # Intent calls have a 5s deadline, so the general limit would never be reached
+        self.p95_limits = {'intent': float(os.getenv('LLM_BREAKER_P95_INTENT_SECONDS', 3))}
+        self.open_seconds = float(os.getenv('LLM_BREAKER_OPEN_SECONDS', 30))
+        self.state = 'closed'
+        self._outcomes = deque()
+        self._opened_at = None
+        self._probe_started = None
+        self._lock = threading.Lock()
+        self.trips = 0
+        self.rejected = 0
+        self.last_trip = None
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half_open this claims the probe slot"""
+        if not self.enabled:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            if self.state == 'open' and now - self._opened_at >= self.open_seconds:
+                self.state = 'half_open'
+                self._probe_started = None
+            if self.state == 'half_open':
+                # A probe that never reported back (worker thread died) frees the slot after a while
+                if self._probe_started is None or now - self._probe_started >= self.open_seconds:
+                    self._probe_started = now
+                    return True
+            if self.state == 'closed':
+                return True
+            self.rejected += 1
+            return False
+
+    def is_open(self) -> bool:
+        """Calls are being refused (no side effects, unlike allow())"""
+        with self._lock:
+            return self.enabled and self.state == 'open' and time.monotonic() - self._opened_at < self.open_seconds
+
+    def record(self, seconds: float, ok: bool, call: str = None):
+        """Outcome of a call that went out; call selects the p95 limit"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self.state == 'half_open':
+                if ok:
+                    self.state = 'closed'
+                    self._outcomes.clear()
+                else:
+                    self._trip(now, 'probe failed')
+                return
+            if self.state == 'open':
+                # Late answers of calls started before the trip
+                return
+
+            self._outcomes.append((now, seconds, ok, call))
+            self._prune(now)
+            reason = self._reason()
+            if reason:
+                self._trip(now, reason)
+
+    def _prune(self, now: float):
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    def _window_stats(self):
+        """(calls, error rate, {call: (calls, p95 seconds)}) over the window"""
+        calls = len(self._outcomes)
+        if not calls:
+            return 0, 0.0, {}
+        failures = sum(1 for _, _, ok, _ in self._outcomes if not ok)
+        latencies = {}
+        for _, seconds, _, call in self._outcomes:
+            latencies.setdefault(call, []).append(seconds)
+        p95 = {}
+        for call, values in latencies.items():
+            values.sort()
+            p95[call] = (len(values), values[min(len(values) - 1, int(len(values) * 0.95))])
+        return calls, failures / calls, p95
+
+    def _reason(self):
+        calls, error_rate, p95 = self._window_stats()
+        if calls >= self.min_calls and error_rate >= self.error_rate:
+            return f'error rate {error_rate:.0%} over {calls} calls'
+        for call, (count, seconds) in p95.items():
+            if count >= self.min_calls and seconds >= self.p95_limits.get(call, self.p95_limit):
+                return f'{call or "llm"} p95 latency {seconds:.1f}s over {count} calls'
+        return None
+
+    def _trip(self, now: float, reason: str):
+        self.state = 'open'
+        self._opened_at = now
+        self._outcomes.clear()
+        self.trips += 1
+        self.last_trip = {'reason': reason, 'at': round(time.time(), 3)}
+        print(f"LLM circuit breaker opened ({self.name}): {reason}")
+
+    def gauges(self) -> list:
+        """Metrics collector: 0 closed, 1 half_open, 2 open"""
+        return [('diagora_llm_breaker_state', (), STATE_VALUES[self.get_stats()['state']])]
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            state = self.state
+            if state == 'open' and now - self._opened_at >= self.open_seconds:
+                state = 'half_open'
+            calls, error_rate, p95 = self._window_stats()
+            return {
+                'enabled': self.enabled,
+                'state': state,
+                'retry_in_seconds': round(self.open_seconds - (now - self._opened_at), 1)
+                if state == 'open' else None,
+                'window_calls': calls,
+                'error_rate': round(error_rate, 3),
+                'p95_seconds': {call or 'llm': round(seconds, 3) for call, (_, seconds) in p95.items()},
+                'trips': self.trips,
+                'rejected': self.rejected,
+                'last_trip': self.last_trip
+            }
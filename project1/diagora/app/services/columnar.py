@@ -0,0 +1,242 @@
+"""Column-oriented query results
+
+OracleService fills a ColumnarResult straight from its fetchmany batches,
+one array per column: integer and float columns become NumPy arrays (NULLs
+kept in a mask), DATE/TIMESTAMP columns datetime64, everything else a plain
+list. It still behaves as a sequence of row tuples, so callers that index
+or iterate rows keep working, while the compactor, follow-ups and encoders
+work on whole columns. Set RESULT_COLUMNAR=False (or uninstall numpy) to
+get lists of tuples back.
+"""
+import json
+import os
+import sys
+from collections import Counter
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def enabled() -> bool:
+    return np is not None and os.getenv('RESULT_COLUMNAR', 'True').lower() == 'true'
+
+
+def collect(columns: list, batches):
+    """Result data from fetch batches: a ColumnarResult, or a list of tuples when disabled"""
+    if not enabled():
+        return [row for batch in batches for row in batch]
+    return ColumnarResult.from_batches(columns, batches)
+
+
+def json_default(value):
+    """json.dumps default= that also accepts ColumnarResult"""
+    if isinstance(value, ColumnarResult):
+        return value.to_rows()
+    return str(value)
+
+
+def _typed(values: list):
+    """(kind, array, null mask or None) for one column's Python values"""
+    types = set(map(type, values))
+    nullable = type(None) in types
+    types.discard(type(None))
+    if not types:
+        return 'object', values, None
+
+    try:
+        if types == {int}:
+            array = np.array([0 if v is None else v for v in values] if nullable else values, dtype=np.int64)
+            kind = 'int'
+        elif types <= {int, float}:
+            array = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            kind = 'float'
+        elif types == {datetime} and all(v.tzinfo is None for v in values if v is not None):
+            # Integer microseconds are several times faster than NumPy parsing datetime objects
+            array = np.array(
+                [0 if v is None else (v - EPOCH) // MICROSECOND for v in values], dtype=np.int64
+            ).view('datetime64[us]')
+            kind = 'datetime'
+        else:
+            return 'object', values, None
+    except (OverflowError, ValueError, TypeError):
+        # Integers wider than 64 bits and other odd values stay Python objects
+        return 'object', values, None
+
+    mask = np.fromiter((v is None for v in values), dtype=bool, count=len(values)) if nullable else None
+    return kind, array, mask
+
+
+class ColumnarResult:
+    """Typed column arrays with a read-only sequence-of-rows interface"""
+
+    def __init__(self, columns: list, kinds: list, arrays: list, masks: list):
+        self.columns = list(columns)
+        self.kinds = kinds
+        self.arrays = arrays
+        self.masks = masks
+        self._index = {name: i for i, name in enumerate(self.columns)}
+
+    @classmethod
+    def from_batches(cls, columns: list, batches):
+        """Transpose fetchmany batches into columns as they arrive"""
+        cells = [[] for _ in columns]
+        for batch in batches:
+            for column, values in zip(cells, zip(*batch)):
+                column.extend(values)
+        return cls.from_columns(columns, cells)
+
+    @classmethod
+    def from_rows(cls, columns: list, rows):
+        return cls.from_batches(columns, [rows])
+
+    @classmethod
+    def from_columns(cls, columns: list, cells: list):
+        typed = [_typed(values) for values in cells]
+        return cls(columns, [t[0] for t in typed], [t[1] for t in typed], [t[2] for t in typed])
+
+    def __len__(self) -> int:
+        return len(self.arrays[0]) if self.arrays else 0
+
+    def __iter__(self):
+        return zip(*self.python_columns())
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self._select(item)
+        if item < 0:
+            item += len(self)
+        return tuple(self._cell(i, item) for i in range(len(self.columns)))
+
+    def __repr__(self) -> str:
+        return f"ColumnarResult({len(self)} rows, columns={self.columns})"
+
+    def _cell(self, column: int, row: int):
+        mask = self.masks[column]
+        if mask is not None and mask[row]:
+            return None
+        value = self.arrays[column][row]
+        return value if self.kinds[column] == 'object' else value.item()
+
+    def _select(self, selector):
+        """Rows by slice, index array or boolean mask, as a new result"""
+        if np is not None and isinstance(selector, np.ndarray) and selector.dtype == bool:
+            selector = np.flatnonzero(selector)
+        arrays = []
+        for kind, array in zip(self.kinds, self.arrays):
+            if kind == 'object' and not isinstance(selector, slice):
+                arrays.append([array[i] for i in selector])
+            else:
+                arrays.append(array[selector])
+        masks = [None if mask is None else mask[selector] for mask in self.masks]
+        return ColumnarResult(self.columns, self.kinds, arrays, masks)
+
+    def take(self, indices):
+        return self._select(np.asarray(indices, dtype=np.int64))
+
+    def filter(self, mask):
+        return self._select(np.asarray(mask, dtype=bool))
+
+    def values(self, name: str) -> list:
+        """One column as Python values (None for NULL)"""
+        return self._python(self._index[name])
+
+    def _python(self, i: int, render_dates: bool = False) -> list:
+        kind, array, mask = self.kinds[i], self.arrays[i], self.masks[i]
+        if kind == 'object':
+            return array
+        if kind == 'datetime':
+            if render_dates:
+                # Same text as str(datetime), rendered for the whole column at once
+                present = array if mask is None else array[~mask]
+                unit = 'us' if (present.astype(np.int64) % 1_000_000).any() else 's'
+                text = np.char.replace(np.datetime_as_string(array, unit=unit), 'T', ' ')
+                if unit == 'us':
+                    # str(datetime) drops the fraction of whole seconds ('YYYY-MM-DD HH:MM:SS' is 19 characters)
+                    text = np.where(array.astype(np.int64) % 1_000_000 == 0, text.astype('U19'), text)
+                values = text.tolist()
+            else:
+                values = array.astype(datetime).tolist()
+        else:
+            values = array.tolist()
+        if mask is not None:
+            for row in np.flatnonzero(mask).tolist():
+                values[row] = None
+        return values
+
+    def python_columns(self, render_dates: bool = False) -> list:
+        return [self._python(i, render_dates) for i in range(len(self.columns))]
+
+    def numbers(self, name: str):
+        """(float64 values, valid mask) of a column; text that parses as a number counts"""
+        i = self._index[name]
+        kind, array, mask = self.kinds[i], self.arrays[i], self.masks[i]
+        if kind in ('int', 'float'):
+            values = array.astype(np.float64)
+            valid = ~np.isnan(values) if mask is None else ~mask & ~np.isnan(values)
+            return values, valid
+        if kind == 'datetime':
+            return np.zeros(len(self)), np.zeros(len(self), dtype=bool)
+
+        values = np.full(len(self), np.nan)
+        for row, value in enumerate(array):
+            if value is None:
+                continue
+            try:
+                values[row] = float(value)
+            except (TypeError, ValueError):
+                pass
+        return values, ~np.isnan(values)
+
+    def is_numeric(self, name: str) -> bool:
+        return self.kinds[self._index[name]] in ('int', 'float')
+
+    def top(self, name: str, n: int, descending: bool = True):
+        """Indices of the n rows with the highest (lowest) numeric values, earlier rows first on ties"""
+        values, valid = self.numbers(name)
+        rows = np.flatnonzero(valid)
+        keys = -values[rows] if descending else values[rows]
+        return rows[np.argsort(keys, kind='stable')[:n]]
+
+    def sum(self, name: str) -> float:
+        values, valid = self.numbers(name)
+        return float(values[valid].sum())
+
+    def count_by(self, name: str) -> Counter:
+        return Counter(self.values(name))
+
+    def to_rows(self, render_dates: bool = False) -> list:
+        return list(zip(*self.python_columns(render_dates)))
+
+    def to_json(self) -> str:
+        """JSON array of row arrays, dates rendered like str(datetime)"""
+        return json.dumps(self.to_rows(render_dates=True), ensure_ascii=False, default=str)
+
+    def iter_ndjson(self):
+        """One JSON object per row and line"""
+        encode = json.JSONEncoder(ensure_ascii=False, default=str).encode
+        for row in zip(*self.python_columns(render_dates=True)):
+            yield encode(dict(zip(self.columns, row))) + '\n'
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns"""
+        total = 0
+        for kind, array, mask in zip(self.kinds, self.arrays, self.masks):
+            if kind == 'object':
+                # Repeated values (status codes, owners) are usually one shared object
+                sample = array[:100]
+                shared = {id(value): value for value in sample}.values()
+                per_value = sum(sys.getsizeof(value) for value in shared) / max(len(sample), 1)
+                total += int((per_value + 8) * len(array))
+            else:
+                total += array.nbytes
+            if mask is not None:
+                total += mask.nbytes
+        return total
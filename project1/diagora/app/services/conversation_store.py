@@ -0,0 +1,403 @@
+"""Per-session conversation state for follow-up questions
+
+The last few results of each chat session (keyed by the session_id the page
+sends) stay in memory, so follow-ups such as "sadece APPS olanlar",
+"hangileri package body?" or "en dolu 3 tanesi" are answered by filtering,
+sorting and cutting the rows already in hand, without an intent call or a
+new Oracle query. State is per worker process: a follow-up that lands on
+another worker simply runs the full pipeline.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+from app.services.columnar import ColumnarResult, np
+from app.services.intent_cache import normalize_question
+from app.services.intent_classifier import METRIC_WORDS
+from app.services.result_compactor import INTENT_SUMMARIES
+
+# Words that point back at the previous answer's rows ("bunlardan", "3 tanesi",
+# "the critical ones"); they make a follow-up even when the question names a subject
+REFERENCE_MARKERS = [
+    'bunlar', 'bunlardan', 'bunlarin', 'bunlari', 'bunlarda', 'olanlar', 'olanlari', 'olanlarin',
+    'icinden', 'arasindan', 'tanesi', 'tanesini', 'these', 'those', 'them', 'ones', 'among'
+]
+# Filter words that only refine a question without a subject of its own ("sadece warning")
+FILTER_MARKERS = [
+    'sadece', 'yalnizca', 'yalniz', 'hangileri', 'hangisi', 'filtrele', 'only', 'just', 'which', 'filter'
+]
+# Local classifier answers that name no subject of their own
+VAGUE_INTENTS = (None, 'general', 'unknown')
+ASCENDING_WORDS = [
+    'en dusuk', 'en az', 'en kucuk', 'en bos', 'artan', 'kucukten buyuge',
+    'lowest', 'smallest', 'least', 'ascending'
+]
+DESCENDING_WORDS = [
+    'en yuksek', 'en fazla', 'en cok', 'en buyuk', 'en dolu', 'en uzun', 'en eski', 'azalan',
+    'buyukten kucuge', 'highest', 'largest', 'biggest', 'most', 'longest', 'descending', 'top'
+]
+ABOVE_WORDS = ['fazla', 'buyuk', 'uzeri', 'uzerinde', 'ustu', 'ustunde', 'yukari', 'above', 'over', 'greater than', 'more than']
+BELOW_WORDS = ['kucuk', 'alti', 'altinda', 'asagi', 'below', 'under', 'less than']
+
+# Columns with more distinct values than this are not offered as filters
+MAX_FILTER_VALUES = 200
+
+
+def _alternation(words) -> str:
+    return '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _singular(text: str) -> str:
+    # "package bodies" -> "package body", "procedures" -> "procedure"
+    words = []
+    for word in text.split():
+        if len(word) > 4 and word.endswith('ies'):
+            word = word[:-3] + 'y'
+        elif len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        words.append(word)
+    return ' '.join(words)
+
+
+class FollowUpParser:
+    """Turns a follow-up question into filter / sort / limit operations over a result"""
+
+    def __init__(self):
+        self._reference = re.compile(r"\b(?:" + _alternation(REFERENCE_MARKERS) + r")\b")
+        self._filter = re.compile(r"\b(?:" + _alternation(FILTER_MARKERS) + r")\b")
+        self._ascending = re.compile(r"\b(?:" + _alternation(ASCENDING_WORDS) + r")\b")
+        self._descending = re.compile(r"\b(?:" + _alternation(DESCENDING_WORDS) + r")\b")
+        self._sort = re.compile(r"\b(?:sirala\w*|sort\w*|order by)\b")
+        self._limit = re.compile(
+            r"\b(?:ilk|top|first|en \w+) (\d{1,4})\b|\b(\d{1,4}) (?:tane\w*|adet\w*)\b"
+        )
+        self._above = re.compile(
+            r"\b(\d+(?: \d+)?) (?:(?:den|dan|ten|tan) )?(?:" + _alternation(ABOVE_WORDS) + r")\b"
+            r"|\b(?:above|over|greater than|more than) (\d+(?: \d+)?)\b"
+        )
+        self._below = re.compile(
+            r"\b(\d+(?: \d+)?) (?:(?:den|dan|ten|tan) )?(?:" + _alternation(BELOW_WORDS) + r")\b"
+            r"|\b(?:below|under|less than) (\d+(?: \d+)?)\b"
+        )
+
+    def refers_back(self, text: str) -> bool:
+        return bool(self._reference.search(text))
+
+    def is_follow_up(self, text: str) -> bool:
+        return bool(self.refers_back(text) or self._filter.search(text)
+                    or self._limit.search(text) or self._sort.search(text))
+
+    def parse(self, question: str, intent: str, db_result: dict, new_subject: bool = False):
+        """Operations for the question over db_result, or None when it is not a follow-up of it
+
+        new_subject: the question names a subject of its own ("which tablespaces
+        are full"), so only a word pointing back at the rows makes it a follow-up.
+        """
+        text = normalize_question(question)
+        if not (self.refers_back(text) if new_subject else self.is_follow_up(text)):
+            return None
+
+        columns = db_result.get('columns', [])
+        rows = db_result.get('data', [])
+        numeric = self._numeric_columns(columns, rows)
+
+        operations = {}
+        filters = self._filters(text, columns, rows, numeric)
+        if filters:
+            operations['filters'] = filters
+
+        metric = self._metric_column(text, intent, columns, numeric)
+        thresholds = self._thresholds(text, metric)
+        if thresholds:
+            operations['thresholds'] = thresholds
+
+        limit = self._limit.search(text)
+        ascending = bool(self._ascending.search(text))
+        ranked = ascending or bool(self._descending.search(text) or self._sort.search(text))
+        if metric and (ranked or (limit and not re.search(r"\b(?:ilk|first)\b", text))):
+            operations['sort'] = {'column': metric, 'descending': not ascending}
+        if limit:
+            operations['limit'] = int(limit.group(1) or limit.group(2))
+
+        return operations or None
+
+    @staticmethod
+    def _numeric_columns(columns: list, rows) -> set:
+        if isinstance(rows, ColumnarResult):
+            return {column for column in columns if rows.is_numeric(column)}
+        numeric = set()
+        sample = rows[:50]
+        for index, column in enumerate(columns):
+            values = [row[index] for row in sample if row[index] is not None]
+            if values and all(isinstance(value, (int, float)) for value in values):
+                numeric.add(column)
+        return numeric
+
+    @staticmethod
+    def _filters(text: str, columns: list, rows: list, numeric: set) -> dict:
+        """{column: [values]} for the column values named in the question"""
+        texts = [text, _singular(text)]
+        matches = []
+        for index, column in enumerate(columns):
+            if column in numeric:
+                continue
+            if isinstance(rows, ColumnarResult):
+                values = set(rows.values(column))
+                values.discard(None)
+            else:
+                values = {row[index] for row in rows if row[index] is not None}
+            if len(values) > MAX_FILTER_VALUES:
+                continue
+            for value in values:
+                key = normalize_question(str(value))
+                if len(key) < 2:
+                    continue
+                pattern = re.compile(r"\b" + re.escape(key) + r"\b")
+                for candidate in texts:
+                    m = pattern.search(candidate)
+                    if m:
+                        # Spans in words: both texts have the same word positions
+                        start = candidate.count(' ', 0, m.start())
+                        matches.append((start, start + key.count(' ') + 1, column, value))
+                        break
+
+        # "package body" also contains "package": keep only the longest match for a span
+        filters = {}
+        for start, end, column, value in matches:
+            shadowed = any(
+                other[0] <= start and end <= other[1] and other[1] - other[0] > end - start
+                for other in matches
+            )
+            if not shadowed:
+                filters.setdefault(column, []).append(value)
+        return filters
+
+    @staticmethod
+    def _metric_column(text: str, intent: str, columns: list, numeric: set):
+        """Numeric column the question ranks or compares by"""
+        for column in columns:
+            if column in numeric and re.search(r"\b" + re.escape(column.lower().replace('_', ' ')) + r"\b", text):
+                return column
+        for column, words in METRIC_WORDS.items():
+            if column in numeric and re.search(r"\b(?:" + _alternation(words) + r")", text):
+                return column
+        for column, _ in INTENT_SUMMARIES.get(intent, {}).get('top', []):
+            if column in numeric:
+                return column
+        return next((column for column in columns if column in numeric), None)
+
+    def _thresholds(self, text: str, metric: str) -> list:
+        if not metric:
+            return []
+        thresholds = []
+        for operator, pattern in (('>', self._above), ('<', self._below)):
+            m = pattern.search(text)
+            if m:
+                value = (m.group(1) or m.group(2)).replace(' ', '.')
+                thresholds.append({'column': metric, 'operator': operator, 'value': float(value)})
+        return thresholds
+
+
+def apply_operations(db_result: dict, operations: dict) -> dict:
+    """New result with the follow-up filters, thresholds, sort and limit applied"""
+    columns = db_result.get('columns', [])
+    index = {column: i for i, column in enumerate(columns)}
+    rows = db_result.get('data', [])
+    if isinstance(rows, ColumnarResult):
+        rows = _apply_columnar(rows, operations)
+        operations = {}
+
+    for column, values in operations.get('filters', {}).items():
+        allowed = set(values)
+        rows = [row for row in rows if row[index[column]] in allowed]
+
+    for threshold in operations.get('thresholds', []):
+        i, limit = index[threshold['column']], threshold['value']
+        if threshold['operator'] == '>':
+            rows = [row for row in rows if (_number(row[i]) or 0) > limit]
+        else:
+            rows = [row for row in rows if _number(row[i]) is not None and _number(row[i]) < limit]
+
+    sort = operations.get('sort')
+    if sort:
+        i = index[sort['column']]
+        missing = float('-inf') if sort['descending'] else float('inf')
+        rows = sorted(rows, key=lambda row: _number(row[i]) if _number(row[i]) is not None else missing,
+                      reverse=sort['descending'])
+
+    if operations.get('limit'):
+        rows = rows[:operations['limit']]
+
+    return {
+        'success': True,
+        'columns': columns,
+        'data': rows,
+        'truncated': db_result.get('truncated', False),
+        'instances': db_result.get('instances')
+    }
+
+
+def _apply_columnar(rows: ColumnarResult, operations: dict) -> ColumnarResult:
+    keep = np.ones(len(rows), dtype=bool)
+    for column, values in operations.get('filters', {}).items():
+        allowed = set(values)
+        keep &= np.fromiter((value in allowed for value in rows.values(column)), dtype=bool, count=len(rows))
+    for threshold in operations.get('thresholds', []):
+        values, valid = rows.numbers(threshold['column'])
+        if threshold['operator'] == '>':
+            # NULL counts as 0 here, like the row-by-row filter
+            keep &= np.where(valid, values, 0) > threshold['value']
+        else:
+            keep &= valid & (values < threshold['value'])
+    rows = rows.filter(keep)
+
+    sort = operations.get('sort')
+    if sort:
+        _, valid = rows.numbers(sort['column'])
+        order = rows.top(sort['column'], len(rows), sort['descending'])
+        # Rows without a value go last, as in the row-by-row sort
+        rows = rows.take(np.concatenate([order, np.flatnonzero(~valid)]))
+    if operations.get('limit'):
+        rows = rows[:operations['limit']]
+    return rows
+
+
+class ConversationStore:
+    """Bounded in-memory store of each session's recent results"""
+
+    def __init__(self):
+        self.enabled = os.getenv('CONVERSATION_ENABLED', 'True').lower() == 'true'
+        self.max_sessions = int(os.getenv('CONVERSATION_MAX_SESSIONS', 1000))
+        self.max_results = int(os.getenv('CONVERSATION_MAX_RESULTS', 3))
+        self.max_rows = int(os.getenv('CONVERSATION_MAX_ROWS', 5000))
+        self.max_bytes = int(os.getenv('CONVERSATION_MAX_MB', 64)) * 1024 * 1024
+        self.idle_seconds = int(os.getenv('CONVERSATION_IDLE_SECONDS', 1800))
+        # Older results are not reused: the rows would be too stale to answer from
+        self.max_age = int(os.getenv('CONVERSATION_MAX_AGE_SECONDS', 600))
+        self.parser = FollowUpParser()
+        self._sessions = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.follow_ups = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _size(db_result: dict) -> int:
+        """Approximate memory of a result, from a JSON sample of its rows"""
+        rows = db_result.get('data', [])
+        if isinstance(rows, ColumnarResult):
+            return rows.nbytes + 512
+        sample = rows[:20]
+        per_row = len(json.dumps(sample, ensure_ascii=False, default=str)) / max(len(sample), 1)
+        return int(per_row * len(rows)) + 512
+
+    def remember(self, session_id: str, question: str, intent: str, db_result: dict):
+        """Keep a successful result as the newest turn of the session"""
+        if not self.enabled or not session_id or not db_result:
+            return
+        if db_result.get('error') or not db_result.get('success', True) or 'columns' not in db_result:
+            return
+        if len(db_result.get('data', [])) > self.max_rows:
+            return
+
+        turn = {
+            'question': question,
+            'intent': intent,
+            'result': {
+                'columns': list(db_result['columns']),
+                'data': db_result['data'],
+                'truncated': db_result.get('truncated', False),
+                'instances': db_result.get('instances')
+            },
+            'stored_at': time.time() - (db_result.get('cache_age') or 0),
+            'bytes': self._size(db_result)
+        }
+        with self._lock:
+            session = self._sessions.pop(session_id, None) or {'turns': deque(), 'bytes': 0}
+            session['turns'].append(turn)
+            session['bytes'] += turn['bytes']
+            self._bytes += turn['bytes']
+            while len(session['turns']) > self.max_results:
+                dropped = session['turns'].popleft()
+                session['bytes'] -= dropped['bytes']
+                self._bytes -= dropped['bytes']
+            session['touched'] = time.time()
+            self._sessions[session_id] = session
+            self._evict()
+
+    def follow_up(self, session_id: str, question: str, guessed_intent: str = None):
+        """(intent, result, operations) when the question refines a recent result, else None
+
+        guessed_intent is the local classifier's intent for the question; a
+        question about another intent is a new question, and one about the same
+        intent only counts as a follow-up when it points back at the rows.
+        """
+        if not self.enabled or not session_id:
+            return None
+        with self._lock:
+            self._evict()
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            self._sessions.move_to_end(session_id)
+            session['touched'] = time.time()
+            turns = list(session['turns'])
+
+        now = time.time()
+        new_subject = guessed_intent not in VAGUE_INTENTS
+        for turn in reversed(turns):
+            if now - turn['stored_at'] > self.max_age:
+                break
+            if new_subject and guessed_intent != turn['intent']:
+                continue
+            operations = self.parser.parse(question, turn['intent'], turn['result'], new_subject)
+            if operations is None:
+                continue
+            result = apply_operations(turn['result'], operations)
+            result['cached'] = True
+            result['cache_age'] = round(now - turn['stored_at'], 1)
+            result['follow_up'] = dict(operations, question=turn['question'], base_row_count=len(turn['result']['data']))
+            with self._lock:
+                self.follow_ups += 1
+            return turn['intent'], result, operations
+        return None
+
+    def forget(self, session_id: str):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session:
+                self._bytes -= session['bytes']
+
+    def _evict(self):
+        # Caller holds the lock; sessions are kept in least-recently-used order
+        now = time.time()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            idle = now - session['touched'] > self.idle_seconds
+            if not idle and len(self._sessions) <= self.max_sessions and self._bytes <= self.max_bytes:
+                break
+            self._sessions.popitem(last=False)
+            self._bytes -= session['bytes']
+            self.evictions += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'sessions': len(self._sessions),
+                'results': sum(len(session['turns']) for session in self._sessions.values()),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'follow_ups': self.follow_ups,
+                'evictions': self.evictions
+            }
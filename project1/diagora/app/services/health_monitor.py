@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+
+
+class ComponentHealth:
+    """Rolling probe state for one dependency"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.status = 'unknown'
+        self.latency_ms = None
+        self.last_checked = None
+        self.last_ok = None
+        self.consecutive_failures = 0
+        self.last_error = None
+
+    def record(self, status: str, ok: bool, latency: float = None, error: str = None):
+        now = time.time()
+        self.status = status
+        self.latency_ms = round(latency * 1000, 1) if latency is not None else None
+        self.last_checked = now
+        if ok is None:
+            # Not configured: neither a success nor a failure
+            return
+        if ok:
+            self.last_ok = now
+            self.consecutive_failures = 0
+            self.last_error = None
+        else:
+            self.consecutive_failures += 1
+            self.last_error = error
+
+    def to_dict(self) -> dict:
+        now = time.time()
+        return {
+            'status': self.status,
+            'latency_ms': self.latency_ms,
+            'checked_ago': round(now - self.last_checked, 1) if self.last_checked else None,
+            'last_ok_ago': round(now - self.last_ok, 1) if self.last_ok else None,
+            'consecutive_failures': self.consecutive_failures,
+            'last_error': self.last_error
+        }
+
+
+class HealthMonitor:
+    """Probes Oracle and Azure OpenAI in the background and caches the result
+
+    Serving /api/health only reads this cached state, so health polling never
+    opens a database session or makes an HTTP call.
+    """
+
+    def __init__(self, oracle_service, llm_service, interval: float = None):
+        self.oracle_service = oracle_service
+        self.llm_service = llm_service
+        self.interval = interval or float(os.getenv('HEALTH_PROBE_INTERVAL', 30))
+        self.probe_timeout = float(os.getenv('HEALTH_PROBE_TIMEOUT', 5))
+        self.database = ComponentHealth('database')
+        self.llm = ComponentHealth('llm')
+        self._probe_lock = threading.Lock()
+        self._probing = None
+        self._state_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='health-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.probe()
+            self._stop.wait(self.interval)
+
+    def probe(self) -> dict:
+        """Probe both dependencies now and return the new state
+
+        Concurrent deep checks share one probe: a caller that finds a probe
+        running waits for it and returns its state.
+        """
+        with self._probe_lock:
+            probing = self._probing
+            leader = probing is None
+            if leader:
+                probing = self._probing = threading.Event()
+
+        if not leader:
+            probing.wait()
+            return self.get_state()
+
+        try:
+            self._probe_database()
+            self._probe_llm()
+        finally:
+            with self._probe_lock:
+                self._probing = None
+            probing.set()
+        return self.get_state()
+
+    def _probe_database(self):
+        started = time.perf_counter()
+        try:
+            ok = self.oracle_service.test_connection()
+            error = None if ok else 'Bağlantı kurulamadı'
+        except Exception as e:
+            ok, error = False, str(e)
+        latency = time.perf_counter() - started
+        with self._state_lock:
+            self.database.record('connected' if ok else 'disconnected', ok, latency, error)
+
+    def _probe_llm(self):
+        client = self.llm_service.client
+        if client is None:
+            with self._state_lock:
+                self.llm.record('not configured', None)
+            return
+
+        started = time.perf_counter()
+        try:
+            client.with_options(timeout=self.probe_timeout, max_retries=0).models.list()
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, str(e)
+        latency = time.perf_counter() - started
+        with self._state_lock:
+            self.llm.record('configured' if ok else 'unreachable', ok, latency, error)
+
+    def get_state(self) -> dict:
+        with self._state_lock:
+            return {
+                'database': self.database.to_dict(),
+                'llm': self.llm.to_dict(),
+                'probe_interval': self.interval
+            }
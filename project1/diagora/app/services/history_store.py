@@ -0,0 +1,220 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# Intents whose numeric columns are recorded, with the column naming each series
+HISTORY_SERIES = {
+    'tablespace': ['TABLESPACE_NAME'],
+    'tablespace_detail': ['TABLESPACE_NAME'],
+    'workflow': ['ITEM_TYPE'],
+    'concurrent_manager': ['MANAGER_NAME', 'CONCURRENT_QUEUE_NAME']
+}
+
+RESOLUTIONS = [
+    # (name, bucket seconds, retention env var, default retention seconds)
+    ('raw', 0, 'HISTORY_RAW_RETENTION_HOURS', 48 * 3600),
+    ('hour', 3600, 'HISTORY_HOURLY_RETENTION_DAYS', 30 * 86400),
+    ('day', 86400, 'HISTORY_DAILY_RETENTION_DAYS', 365 * 86400)
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    ts REAL NOT NULL,
+    intent TEXT NOT NULL,
+    series TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_lookup ON samples (metric, series, ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    resolution TEXT NOT NULL,
+    bucket REAL NOT NULL,
+    intent TEXT NOT NULL,
+    series TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    min_value REAL NOT NULL,
+    max_value REAL NOT NULL,
+    last_value REAL NOT NULL,
+    PRIMARY KEY (resolution, metric, series, bucket, intent)
+);
+"""
+
+UPSERT_ROLLUP = """
+INSERT INTO rollups (resolution, bucket, intent, series, metric, count, total, min_value, max_value, last_value)
+VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?)
+ON CONFLICT (resolution, metric, series, bucket, intent) DO UPDATE SET
+    count = count + 1,
+    total = total + excluded.total,
+    min_value = MIN(min_value, excluded.min_value),
+    max_value = MAX(max_value, excluded.max_value),
+    last_value = excluded.last_value
+"""
+
+
+def _retention(env_var: str, default: int) -> int:
+    value = os.getenv(env_var)
+    if value is None:
+        return default
+    unit = 3600 if env_var.endswith('HOURS') else 86400
+    return int(float(value) * unit)
+
+
+class HistoryStore:
+    """Embedded SQLite time series of numeric EBS metrics with hourly/daily rollups"""
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv('HISTORY_DB_PATH') or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'history.db'
+        )
+        self._lock = threading.Lock()
+        self._connection = None
+        self._last_prune = 0.0
+
+    def _connect(self):
+        if self._connection is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    @staticmethod
+    def extract_samples(intent: str, result: dict):
+        """Yield (series, metric, value) for every numeric cell of a result"""
+        columns = [c.upper() for c in result.get('columns', [])]
+        series_col = next((c for c in HISTORY_SERIES.get(intent, []) if c in columns), None)
+        if series_col is None:
+            return
+        series_index = columns.index(series_col)
+
+        for row in result.get('data', []):
+            series = str(row[series_index])
+            for i, value in enumerate(row):
+                if i == series_index or isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                yield series, columns[i], float(value)
+
+    def record(self, intent: str, result: dict, ts: float = None):
+        """Store the numeric columns of one collection and update rollups"""
+        if intent not in HISTORY_SERIES or not result.get('success', True):
+            return
+        ts = ts or time.time()
+        samples = list(self.extract_samples(intent, result))
+        if not samples:
+            return
+
+        hour, day = ts - ts % 3600, ts - ts % 86400
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    'INSERT INTO samples (ts, intent, series, metric, value) VALUES (?, ?, ?, ?, ?)',
+                    [(ts, intent, series, metric, value) for series, metric, value in samples]
+                )
+                for resolution, bucket in (('hour', hour), ('day', day)):
+                    conn.executemany(UPSERT_ROLLUP, [
+                        (resolution, bucket, intent, series, metric, value, value, value, value)
+                        for series, metric, value in samples
+                    ])
+
+        if ts - self._last_prune > 3600:
+            self.prune(ts)
+
+    def prune(self, now: float = None):
+        """Drop raw samples and rollups older than their retention"""
+        now = now or time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                for resolution, _, env_var, default in RESOLUTIONS:
+                    cutoff = now - _retention(env_var, default)
+                    if resolution == 'raw':
+                        conn.execute('DELETE FROM samples WHERE ts < ?', (cutoff,))
+                    else:
+                        conn.execute('DELETE FROM rollups WHERE resolution = ? AND bucket < ?', (resolution, cutoff))
+            self._last_prune = now
+
+    def _resolution_for(self, window: float) -> str:
+        if window <= _retention('HISTORY_RAW_RETENTION_HOURS', 48 * 3600):
+            return 'raw'
+        if window <= _retention('HISTORY_HOURLY_RETENTION_DAYS', 30 * 86400):
+            return 'hour'
+        return 'day'
+
+    def query_trend(self, metric: str, series: str = None, window_hours: float = 24 * 7) -> dict:
+        """Return a metric's history in the result-dict shape OracleService uses"""
+        now = time.time()
+        window = window_hours * 3600
+        since = now - window
+        resolution = self._resolution_for(window)
+
+        if resolution == 'raw':
+            sql = 'SELECT series, ts, value FROM samples WHERE metric = ? AND ts >= ?'
+        else:
+            sql = ('SELECT series, bucket, total / count FROM rollups '
+                   f"WHERE resolution = '{resolution}' AND metric = ? AND bucket >= ?")
+        args = [metric.upper(), since]
+        if series:
+            sql += ' AND UPPER(series) = ?'
+            args.append(series.upper())
+        sql += ' ORDER BY series, 2'
+
+        try:
+            with self._lock:
+                rows = self._connect().execute(sql, args).fetchall()
+        except sqlite3.Error as e:
+            return {'success': False, 'error': str(e), 'columns': [], 'data': [], 'source': 'history'}
+
+        data = [
+            (name, datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M'), round(value, 2))
+            for name, ts, value in rows
+        ]
+        return {
+            'success': True,
+            'columns': ['SERIES', 'SAMPLED_AT', metric.upper()],
+            'data': data,
+            'row_count': len(data),
+            'source': 'history',
+            'resolution': resolution,
+            'window_hours': window_hours,
+            'trend': self._trend_summary(rows)
+        }
+
+    @staticmethod
+    def _trend_summary(rows) -> dict:
+        """First/last value and least-squares slope per day for each series"""
+        by_series = {}
+        for name, ts, value in rows:
+            by_series.setdefault(name, []).append((ts, value))
+
+        summary = {}
+        for name, points in by_series.items():
+            first, last = points[0][1], points[-1][1]
+            slope_per_day = None
+            if len(points) > 1:
+                mean_t = sum(t for t, _ in points) / len(points)
+                mean_v = sum(v for _, v in points) / len(points)
+                var_t = sum((t - mean_t) ** 2 for t, _ in points)
+                if var_t:
+                    cov = sum((t - mean_t) * (v - mean_v) for t, v in points)
+                    slope_per_day = round(cov / var_t * 86400, 4)
+            summary[name] = {
+                'points': len(points),
+                'first': round(first, 2),
+                'last': round(last, 2),
+                'change': round(last - first, 2),
+                'slope_per_day': slope_per_day
+            }
+        return summary
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            conn = self._connect()
+            samples = conn.execute('SELECT COUNT(*) FROM samples').fetchone()[0]
+            rollups = conn.execute('SELECT COUNT(*) FROM rollups').fetchone()[0]
+        return {'path': self.path, 'samples': samples, 'rollups': rollups}
@@ -0,0 +1,175 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from app.services.oracle_service import OracleService
+from app.services.result_cache import ResultCache
+
+DEFAULT_INSTANCE = 'default'
+ALL_INSTANCES_WORDS = re.compile(r"\b(tum|butun|all) (ortam|instance|sistem|veritaban)\w*")
+
+
+class InstanceRegistry:
+    """Named EBS instances, each with its own session pool and result cache"""
+
+    def __init__(self, services: dict, default: str = None):
+        self.services = services
+        self.default = default if default in services else next(iter(services))
+        self.caches = {name: ResultCache(service) for name, service in services.items()}
+        self.timeout = float(os.getenv('ORACLE_INSTANCE_TIMEOUT', 15))
+        self.max_workers = int(os.getenv('ORACLE_FANOUT_MAX_WORKERS', 8))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Build from ORACLE_INSTANCES=PROD,TEST1,DR and ORACLE_<NAME>_* settings
+
+        Without ORACLE_INSTANCES there is a single 'default' instance using
+        the plain ORACLE_* variables.
+        """
+        names = [n.strip().upper() for n in os.getenv('ORACLE_INSTANCES', '').split(',') if n.strip()]
+        if not names:
+            return cls({DEFAULT_INSTANCE: OracleService()})
+
+        services = {
+            name: OracleService(name, OracleService.env_settings(f'ORACLE_{name}_'))
+            for name in names
+        }
+        return cls(services, os.getenv('ORACLE_DEFAULT_INSTANCE', names[0]).upper())
+
+    @property
+    def default_service(self) -> OracleService:
+        return self.services[self.default]
+
+    @property
+    def default_cache(self) -> ResultCache:
+        return self.caches[self.default]
+
+    @property
+    def is_multi(self) -> bool:
+        return len(self.services) > 1
+
+    def resolve(self, targets=None, question: str = None) -> list:
+        """Turn 'all', a name or a list of names (or names in the question) into instance names"""
+        if isinstance(targets, str):
+            targets = list(self.services) if targets.lower() == 'all' else [targets]
+
+        if not targets and question and self.is_multi:
+            from app.services.intent_cache import normalize_question
+            if ALL_INSTANCES_WORDS.search(normalize_question(question)):
+                return list(self.services)
+            upper = question.upper()
+            targets = [name for name in self.services if re.search(rf"\b{re.escape(name)}\b", upper)]
+
+        names = [t.upper() for t in (targets or []) if t and t.upper() in self.services]
+        return names or [self.default]
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='fanout'
+                )
+            return self._executor
+
+    def _timed(self, name: str, query_info: dict):
+        started = time.perf_counter()
+        result = self.caches[name].execute_query(
+            query_info['query'],
+            query_info.get('params', {}),
+            query_info.get('cache_ttl', 0),
+            query_info.get('fetch'),
+            query_info.get('cost')
+        )
+        return result, time.perf_counter() - started
+
+    def execute_many(self, names: list, query_info: dict, timeout: float = None) -> dict:
+        """Run one query on several instances concurrently and merge the rows
+
+        The merged result has an INSTANCE column in front. Instances that
+        fail or miss the timeout are listed under `instances` and left out
+        of the rows instead of stalling the answer.
+        """
+        timeout = timeout or self.timeout
+        query_info = dict(query_info)
+        query_info['fetch'] = dict(query_info.get('fetch') or {}, call_timeout_ms=int(timeout * 1000))
+
+        executor = self._get_executor()
+        futures = {executor.submit(self._timed, name, query_info): name for name in names}
+        done, _ = wait(futures, timeout=timeout)
+
+        columns, data, statuses = None, [], {}
+        cached = True
+        for future, name in futures.items():
+            if future not in done:
+                future.cancel()
+                statuses[name] = {'success': False, 'timed_out': True,
+                                  'error': f'{timeout:g} saniye içinde yanıt vermedi'}
+                continue
+            try:
+                result, elapsed = future.result()
+            except Exception as e:
+                statuses[name] = {'success': False, 'error': str(e)}
+                continue
+
+            statuses[name] = {
+                'success': result.get('success', False),
+                'row_count': len(result.get('data', [])),
+                'elapsed_ms': round(elapsed * 1000, 1),
+                'cached': result.get('cached', False),
+                'truncated': result.get('truncated', False),
+                'error': result.get('error')
+            }
+            if not result.get('success'):
+                continue
+            cached = cached and result.get('cached', False)
+            if columns is None:
+                columns = ['INSTANCE'] + list(result.get('columns', []))
+            data.extend((name,) + tuple(row) for row in result.get('data', []))
+
+        succeeded = [name for name, status in statuses.items() if status['success']]
+        if not succeeded:
+            return {
+                'success': False,
+                'error': '; '.join(f"{name}: {status.get('error')}" for name, status in statuses.items()),
+                'columns': [],
+                'data': [],
+                'instances': statuses
+            }
+
+        return {
+            'success': True,
+            'columns': columns,
+            'data': data,
+            'row_count': len(data),
+            'cached': cached,
+            'cache_age': None,
+            'truncated': any(status.get('truncated') for status in statuses.values()),
+            'instances': statuses,
+            'partial': len(succeeded) < len(names)
+        }
+
+    def warm_up(self) -> dict:
+        """Open every instance's pool concurrently; {name: True when a session logged on}"""
+        if not self.is_multi:
+            return {self.default: self.default_service.warm_up()}
+        executor = self._get_executor()
+        futures = {name: executor.submit(service.warm_up) for name, service in self.services.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    async def warm_up_async(self) -> dict:
+        """warm_up() for the asyncio serving mode, one task per instance"""
+        names = list(self.services)
+        results = await asyncio.gather(*(self.services[name].warm_up_async() for name in names))
+        return dict(zip(names, results))
+
+    def get_pool_stats(self) -> dict:
+        return {name: service.get_pool_stats() for name, service in self.services.items()}
+
+    def get_admission_stats(self) -> dict:
+        return {name: cache.admission.get_stats() for name, cache in self.caches.items()}
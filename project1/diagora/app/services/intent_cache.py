@@ -0,0 +1,173 @@
+import atexit
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# Fold Turkish letters so "Tablespace doluluk oranı nedir?" and
+# "tablespace doluluk orani nedir" share a key regardless of keyboard layout.
+_TURKISH_FOLD = str.maketrans({
+    'İ': 'i', 'I': 'i', 'ı': 'i',
+    'Ş': 's', 'ş': 's',
+    'Ğ': 'g', 'ğ': 'g',
+    'Ü': 'u', 'ü': 'u',
+    'Ö': 'o', 'ö': 'o',
+    'Ç': 'c', 'ç': 'c',
+})
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question into its cache key"""
+    text = question.translate(_TURKISH_FOLD).lower()
+    text = _PUNCTUATION.sub(' ', text)
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+class IntentCache:
+    """Bounded LRU cache of intent classifications, optionally persisted to disk
+
+    Requests only mark the cache dirty; a background thread per process writes
+    the file at most every INTENT_CACHE_SAVE_DELAY seconds (and at exit),
+    merging the entries other workers saved meanwhile.
+    """
+
+    def __init__(self, max_entries: int = None, path: str = None, save_delay: float = None):
+        self.max_entries = max_entries or int(os.getenv('INTENT_CACHE_MAX_ENTRIES', 1024))
+        self.path = path if path is not None else os.getenv('INTENT_CACHE_PATH')
+        self.save_delay = save_delay if save_delay is not None else float(os.getenv('INTENT_CACHE_SAVE_DELAY', 5))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._dirty = threading.Event()
+        self._cleared = False
+        self._writer_pid = None
+        self._save_lock = threading.Lock()
+        self._load()
+        if self.path:
+            atexit.register(self.flush)
+
+    def get(self, question: str):
+        """Return a cached classification for the question, or None"""
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return {
+                'intent': entry['intent'],
+                'entities': dict(entry['entities']),
+                'confidence': entry['confidence']
+            }
+
+    def contains(self, question: str) -> bool:
+        """Check for a cached classification without touching LRU order or counters"""
+        key = normalize_question(question)
+        with self._lock:
+            return key in self._entries
+
+    def put(self, question: str, result: dict):
+        """Store the intent, entities and confidence of a classification"""
+        key = normalize_question(question)
+        if not key:
+            return
+
+        with self._lock:
+            self._entries[key] = {
+                'intent': result.get('intent', 'general'),
+                'entities': dict(result.get('entities') or {}),
+                'confidence': result.get('confidence')
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        self._schedule_save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._cleared = True
+        self._schedule_save()
+
+    def flush(self):
+        """Write pending changes now"""
+        if self.path and self._dirty.is_set():
+            self._dirty.clear()
+            self._save()
+
+    def _schedule_save(self):
+        if not self.path:
+            return
+        self._dirty.set()
+        with self._lock:
+            # Threads do not survive fork: a worker starts its own writer
+            if self._writer_pid == os.getpid():
+                return
+            self._writer_pid = os.getpid()
+        threading.Thread(target=self._write_loop, name='intent-cache-writer', daemon=True).start()
+
+    def _write_loop(self):
+        while True:
+            self._dirty.wait()
+            # Debounce: one write for every burst of puts
+            time.sleep(self.save_delay)
+            self.flush()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'persistent': bool(self.path)
+            }
+
+    def _load(self):
+        if not self.path:
+            return
+        for key, entry in self._read_file()[-self.max_entries:]:
+            self._entries[key] = entry
+
+    def _read_file(self) -> list:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            print(f"Intent cache load error: {e}")
+            return []
+
+    def _save(self):
+        with self._save_lock:
+            with self._lock:
+                items = list(self._entries.items())
+                merge = not self._cleared
+                self._cleared = False
+            if merge:
+                # Keep what other workers saved since, ours win and stay most recent
+                ours = set(key for key, _ in items)
+                items = [(key, entry) for key, entry in self._read_file() if key not in ours] + items
+            items = items[-self.max_entries:]
+
+            tmp_path = None
+            try:
+                fd, tmp_path = tempfile.mkstemp(prefix='.intent_cache.', suffix='.tmp',
+                                                dir=os.path.dirname(os.path.abspath(self.path)))
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(items, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Intent cache save error: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
@@ -0,0 +1,357 @@
+import json
+import os
+import re
+import zlib
+
+from app.services.intent_cache import normalize_question
+
+# Keywords are matched against normalize_question() output, so they are
+# written in folded form ("is akisi" matches "iş akışı").
+INTENT_KEYWORDS = {
+    'concurrent_manager': ['concurrent', 'manager', 'request', 'job', 'schedule', 'fnd_concurrent', 'icm', 'running request'],
+    'workflow': ['workflow', 'wf_', 'is akisi', 'stuck', 'notification'],
+    'invalid_objects': ['invalid', 'gecersiz', 'compile', 'dba_objects'],
+    'tablespace': ['tablespace', 'disk', 'alan', 'storage', 'space', 'dolu'],
+    'trend': ['trend', 'egilim', 'buyume', 'buyuyor', 'growing', 'growth', 'artis', 'artiyor', 'ne kadar hizli', 'gecmis']
+}
+
+# Intents that win whenever one of their keywords appears ("stuck workflow
+# trendi" is a trend question, not a workflow question)
+PRIORITY_INTENTS = ['trend']
+
+EBS_SCHEMAS = ['APPS', 'AR', 'AP', 'GL', 'INV', 'ONT', 'PO', 'HR']
+
+# Spoken manager names -> CONCURRENT_QUEUE_NAME
+MANAGER_NAMES = {
+    'standard manager': 'STANDARD',
+    'internal manager': 'FNDICM',
+    'icm': 'FNDICM',
+    'conflict resolution': 'FNDCRM',
+    'scheduler': 'FNDSCH',
+    'output post processor': 'FNDCPOPP',
+    'opp': 'FNDCPOPP',
+    'workflow mailer': 'WFMLRSVC'
+}
+
+STATUS_WORDS = {
+    'STUCK': ['stuck', 'takili', 'takilmis', 'takilan'],
+    'ACTIVE': ['active', 'aktif', 'bekleyen'],
+    'COMPLETED': ['completed', 'tamamlanan', 'tamamlanmis', 'biten'],
+    'RUNNING': ['running', 'calisan', 'calisiyor'],
+    'ERROR': ['error', 'hata', 'hatali', 'failed']
+}
+
+# Words -> history metric for trend questions
+METRIC_WORDS = {
+    'STUCK_COUNT': ['stuck', 'takili', 'takilan'],
+    'ACTIVE_COUNT': ['aktif', 'active'],
+    'USED_GB': ['gb', 'boyut', 'size'],
+    'RUNNING': ['calisan process', 'running process'],
+    'USED_PERCENT': ['doluluk', 'yuzde', 'percent']
+}
+
+
+def _alternation(words) -> str:
+    # Longest first so "running request" wins over "request"
+    return '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+class KeywordMatcher:
+    """Single compiled pattern over all intent keywords"""
+
+    def __init__(self, keywords: dict = None):
+        self.keywords = keywords or INTENT_KEYWORDS
+        self.intents = list(self.keywords)
+        self._pattern = re.compile('|'.join(
+            f"(?P<i{index}>{_alternation(words)})"
+            for index, words in enumerate(self.keywords.values())
+        ))
+
+    def match(self, text: str):
+        """Return (intent, hit_count) for the intent with the most keyword hits"""
+        counts = [0] * len(self.intents)
+        for m in self._pattern.finditer(text):
+            counts[int(m.lastgroup[1:])] += 1
+
+        for intent in PRIORITY_INTENTS:
+            if intent in self.intents and counts[self.intents.index(intent)]:
+                return intent, counts[self.intents.index(intent)]
+
+        best = max(range(len(counts)), key=lambda i: (counts[i], -i))
+        if counts[best] == 0:
+            return None, 0
+        return self.intents[best], counts[best]
+
+
+class EntityExtractor:
+    """Pulls schema_name, manager_name, status_filter and trend entities out of a question"""
+
+    def __init__(self):
+        self._schema_upper = re.compile(r"\b(" + '|'.join(EBS_SCHEMAS) + r")\b")
+        self._schema_named = re.compile(r"\b(\w+) (?:semasi\w*|sema|schema)\b")
+        self._manager = re.compile(r"\b(" + _alternation(MANAGER_NAMES) + r")\b")
+        self._status = {
+            status: re.compile(r"\b(?:" + _alternation(words) + r")")
+            for status, words in STATUS_WORDS.items()
+        }
+        # Oracle object names such as APPS_TS_TX_DATA
+        self._series = re.compile(r"\b([A-Z][A-Z0-9$#]*(?:_[A-Z0-9$#]+)+|SYSTEM|SYSAUX|UNDOTBS\d*|TEMP)\b")
+        self._metric = {
+            metric: re.compile(r"\b(?:" + _alternation(words) + r")")
+            for metric, words in METRIC_WORDS.items()
+        }
+        self._window = re.compile(r"\b(\d+) (?:gun|gunluk|day|days)\b")
+
+    def extract(self, question: str, text: str = None) -> dict:
+        text = text if text is not None else normalize_question(question)
+        entities = {}
+
+        m = self._schema_upper.search(question) or self._schema_named.search(text)
+        if m:
+            entities['schema_name'] = m.group(1).upper()
+
+        m = self._manager.search(text)
+        if m:
+            entities['manager_name'] = MANAGER_NAMES[m.group(1)]
+
+        for status, pattern in self._status.items():
+            if pattern.search(text):
+                entities['status_filter'] = status
+                break
+
+        m = self._series.search(question)
+        if m:
+            entities['series'] = m.group(1)
+
+        for metric, pattern in self._metric.items():
+            if pattern.search(text):
+                entities['metric'] = metric
+                break
+
+        m = self._window.search(text)
+        if m:
+            entities['window_days'] = int(m.group(1))
+
+        return entities
+
+
+class NgramModel:
+    """Hashed character n-gram TF-IDF with nearest-centroid scoring
+
+    Cosine similarities to each intent centroid are turned into probabilities
+    with a softmax whose temperature is fitted on the training data, so the
+    reported confidence is calibrated rather than a fixed constant.
+    """
+
+    def __init__(self, labels, idf, centroids, temperature, dim=2 ** 14, ngram_range=(2, 4)):
+        self.labels = list(labels)
+        self.idf = idf
+        self.centroids = centroids
+        self.temperature = float(temperature)
+        self.dim = int(dim)
+        self.ngram_range = tuple(int(n) for n in ngram_range)
+
+    @staticmethod
+    def _ngrams(text: str, ngram_range):
+        low, high = ngram_range
+        for word in text.split():
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                for i in range(max(len(padded) - n + 1, 1)):
+                    yield padded[i:i + n]
+
+    @classmethod
+    def _counts(cls, texts, dim, ngram_range):
+        import numpy as np
+
+        matrix = np.zeros((len(texts), dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for gram in cls._ngrams(text, ngram_range):
+                matrix[row, zlib.crc32(gram.encode('utf-8')) % dim] += 1.0
+        return matrix
+
+    @staticmethod
+    def _normalize_rows(matrix):
+        import numpy as np
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _vectorize(self, texts):
+        import numpy as np
+
+        counts = self._counts(texts, self.dim, self.ngram_range)
+        return self._normalize_rows(np.log1p(counts) * self.idf)
+
+    @staticmethod
+    def _softmax(scores, temperature):
+        import numpy as np
+
+        scaled = scores / temperature
+        scaled -= scaled.max(axis=1, keepdims=True)
+        exp = np.exp(scaled)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    @staticmethod
+    def _centroids(vectors, y, n_classes):
+        import numpy as np
+
+        centroids = np.zeros((n_classes, vectors.shape[1]), dtype=np.float32)
+        for k in range(n_classes):
+            members = vectors[y == k]
+            if len(members):
+                centroids[k] = members.mean(axis=0)
+        return NgramModel._normalize_rows(centroids)
+
+    @classmethod
+    def train(cls, texts, labels, dim=2 ** 14, ngram_range=(2, 4), folds=5):
+        import numpy as np
+
+        classes = sorted(set(labels))
+        counts = cls._counts(texts, dim, ngram_range)
+        document_freq = (counts > 0).sum(axis=0)
+        idf = (np.log((1 + len(texts)) / (1 + document_freq)) + 1).astype(np.float32)
+        vectors = cls._normalize_rows(np.log1p(counts) * idf)
+        y = np.array([classes.index(label) for label in labels])
+
+        # Score every question against centroids built without it, so the
+        # temperature is fitted on out-of-fold scores instead of memorized ones
+        folds = max(2, min(folds, len(texts)))
+        fold_of = np.arange(len(texts)) % folds
+        scores = np.zeros((len(texts), len(classes)), dtype=np.float32)
+        for fold in range(folds):
+            held_out = fold_of == fold
+            centroids = cls._centroids(vectors[~held_out], y[~held_out], len(classes))
+            scores[held_out] = vectors[held_out] @ centroids.T
+
+        best_t, best_nll = 1.0, float('inf')
+        for t in np.geomspace(0.005, 2.0, 60):
+            probs = cls._softmax(scores, t)
+            nll = -np.log(probs[np.arange(len(y)), y] + 1e-12).mean()
+            if nll < best_nll:
+                best_t, best_nll = float(t), nll
+
+        centroids = cls._centroids(vectors, y, len(classes))
+        return cls(classes, idf, centroids, best_t, dim, ngram_range)
+
+    def predict_proba(self, texts):
+        vectors = self._vectorize(texts)
+        return self._softmax(vectors @ self.centroids.T, self.temperature)
+
+    def save(self, path: str):
+        import numpy as np
+
+        np.savez_compressed(
+            path,
+            labels=np.array(self.labels),
+            idf=self.idf,
+            centroids=self.centroids,
+            temperature=self.temperature,
+            dim=self.dim,
+            ngram_range=np.array(self.ngram_range)
+        )
+
+    @classmethod
+    def load(cls, path: str):
+        import numpy as np
+
+        with np.load(path) as data:
+            return cls(
+                [str(label) for label in data['labels']],
+                data['idf'],
+                data['centroids'],
+                data['temperature'],
+                data['dim'],
+                data['ngram_range']
+            )
+
+
+class IntentClassifier:
+    """Local intent classification stage in front of the LLM"""
+
+    def __init__(self, model: NgramModel = None):
+        self.matcher = KeywordMatcher()
+        self.extractor = EntityExtractor()
+        self.model = model
+
+    @classmethod
+    def from_env(cls):
+        """Build a classifier, loading INTENT_MODEL_PATH when it exists"""
+        path = os.getenv('INTENT_MODEL_PATH')
+        if path and os.path.exists(path):
+            try:
+                return cls(NgramModel.load(path))
+            except ImportError:
+                print("numpy not installed. Local intent model disabled.")
+            except Exception as e:
+                print(f"Intent model load error: {e}")
+        return cls()
+
+    def classify(self, question: str) -> dict:
+        """Return intent, entities and confidence without calling the LLM"""
+        text = normalize_question(question)
+        entities = self.extractor.extract(question, text)
+
+        if self.model is not None:
+            probs = self.model.predict_proba([text])[0]
+            best = int(probs.argmax())
+            return {
+                'intent': self.model.labels[best],
+                'entities': entities,
+                'confidence': round(float(probs[best]), 3)
+            }
+
+        intent, _ = self.matcher.match(text)
+        if intent is None:
+            return {'intent': 'general', 'entities': entities, 'confidence': 0.5}
+        return {'intent': intent, 'entities': entities, 'confidence': 0.7}
+
+
+def load_labelled(path: str):
+    """Read question/intent pairs from a JSON Lines file"""
+    texts, labels = [], []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get('question') and record.get('intent'):
+                texts.append(normalize_question(record['question']))
+                labels.append(record['intent'])
+    return texts, labels
+
+
+def evaluate(model: NgramModel, texts, labels, threshold: float) -> dict:
+    """Accuracy, per-intent recall and coverage at the bypass threshold"""
+    import numpy as np
+
+    probs = model.predict_proba(texts)
+    predicted = [model.labels[i] for i in probs.argmax(axis=1)]
+    confidence = probs.max(axis=1)
+    correct = np.array([p == t for p, t in zip(predicted, labels)])
+    confident = confidence >= threshold
+
+    # Expected calibration error over 10 equal-width confidence bins
+    ece = 0.0
+    bins = np.minimum((confidence * 10).astype(int), 9)
+    for b in range(10):
+        mask = bins == b
+        if mask.any():
+            ece += mask.mean() * abs(correct[mask].mean() - confidence[mask].mean())
+
+    per_intent = {}
+    for intent in sorted(set(labels)):
+        mask = np.array([t == intent for t in labels])
+        per_intent[intent] = {'support': int(mask.sum()), 'recall': round(float(correct[mask].mean()), 3)}
+
+    return {
+        'samples': len(labels),
+        'accuracy': round(float(correct.mean()), 3),
+        'threshold': threshold,
+        'coverage': round(float(confident.mean()), 3),
+        'accuracy_above_threshold': round(float(correct[confident].mean()), 3) if confident.any() else None,
+        'ece': round(float(ece), 3),
+        'per_intent': per_intent
+    }
@@ -1,29 +1,101 @@
+import asyncio
+import copy
 import os
 import json
-from openai import AzureOpenAI
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from flask import current_app
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError, provider_failure
+from app.services.columnar import json_default
+from app.services.intent_cache import IntentCache
+from app.services.intent_classifier import IntentClassifier
+from app.services.metrics import metrics
+from app.services.result_compactor import fit_budget
+from app.services.token_budget import TokenBudget
+
+# Result keys that change between otherwise identical results; kept at the end
+# of the prompt payload so they do not break the cacheable prefix
+VOLATILE_RESULT_KEYS = ('cached', 'cache_age', 'elapsed_ms', 'rows_sent', 'rows_summarized', 'instances')
+STREAM_CUT_NOTE = '\n\n_(Yanıt süre sınırına ulaştığı için kesildi.)_'
+
+
+class HedgeTimeout(Exception):
+    """The LLM missed its hedge deadline; the local answer is used instead"""
 
 
 class LLMService:
     def __init__(self):
         self._client = None
+        self._async_client = None
         self._system_prompt = None
+        self.intent_cache = IntentCache()
+        self.local_classifier = IntentClassifier.from_env()
+        self.local_threshold = float(os.getenv('LOCAL_INTENT_THRESHOLD', 0.9))
+        self.intent_log_path = os.getenv('INTENT_LOG_PATH')
+        self.token_budget = TokenBudget()
+        # Request timeout for format calls that have a rule-based answer to fall back on
+        self.fallback_timeout = float(os.getenv('ANSWER_ENGINE_LLM_TIMEOUT', 10))
+        # Hard per-call deadlines (request timeout); a stream may run LLM_STREAM_DEADLINE in total
+        self.deadlines = {
+            'intent': float(os.getenv('LLM_INTENT_DEADLINE', 5)),
+            'format': float(os.getenv('LLM_FORMAT_DEADLINE', 30)),
+            'report': float(os.getenv('LLM_REPORT_DEADLINE', 60))
+        }
+        self.stream_deadline = float(os.getenv('LLM_STREAM_DEADLINE', 90))
+        self.max_retries = int(os.getenv('LLM_MAX_RETRIES', 0))
+        # Hedging: answer locally once these pass (intent calls keep running to fill the cache)
+        self.hedge = os.getenv('LLM_HEDGE', 'True').lower() == 'true'
+        self.hedge_intent = float(os.getenv('LLM_HEDGE_INTENT_SECONDS', 1.5))
+        self.hedge_format = float(os.getenv('LLM_HEDGE_FORMAT_SECONDS', 15))
+        self.hedge_workers = int(os.getenv('LLM_HEDGE_WORKERS', 8))
+        self.breaker = CircuitBreaker()
+        self._bounded_clients = {}
+        self._hedge_pool = None
+        self._hedge_lock = threading.Lock()
+        self._hedge_running = 0
+        self._background = set()
+
+    @staticmethod
+    def _client_settings():
+        endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
+        api_key = os.getenv('AZURE_OPENAI_API_KEY')
+        if not (endpoint and api_key):
+            return None
+        return {
+            'azure_endpoint': endpoint,
+            'api_key': api_key,
+            'api_version': os.getenv('AZURE_OPENAI_API_VERSION', '2024-02-15-preview')
+        }
 
     @property
     def client(self):
         if self._client is None:
-            endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
-            api_key = os.getenv('AZURE_OPENAI_API_KEY')
-            api_version = os.getenv('AZURE_OPENAI_API_VERSION', '2024-02-15-preview')
-
-            if endpoint and api_key:
-                self._client = AzureOpenAI(
-                    azure_endpoint=endpoint,
-                    api_key=api_key,
-                    api_version=api_version
-                )
+            settings = self._client_settings()
+            if settings:
+                # openai is imported on first use (or by the start-up preload); it is the slowest import here
+                from openai import AzureOpenAI
+                self._client = AzureOpenAI(**settings)
         return self._client
 
+    @property
+    def async_client(self):
+        """AsyncAzureOpenAI client for the asyncio serving mode"""
+        if self._async_client is None:
+            settings = self._client_settings()
+            if settings:
+                from openai import AsyncAzureOpenAI
+                self._async_client = AsyncAzureOpenAI(**settings)
+        return self._async_client
+
+    def use_client(self, client, async_client=None):
+        """Use existing (or stand-in) Azure OpenAI clients instead of building them"""
+        self._client = client
+        if async_client is not None:
+            self._async_client = async_client
+        self._bounded_clients = {}
+
     @property
     def system_prompt(self):
         if self._system_prompt is None:
@@ -59,37 +131,307 @@ class LLMService:
         if not self.client:
             return self._fallback_intent_detection(question)
 
+        known = self._known_intent(question)
+        if known is not None:
+            return known
+
         try:
-            deployment = os.getenv('AZURE_OPENAI_DEPLOYMENT_NAME', 'gpt-4')
-
-            response = self.client.chat.completions.create(
-                model=deployment,
-                messages=[
-                    {"role": "system", "content": self._get_intent_prompt()},
-                    {"role": "user", "content": question}
-                ],
-                temperature=0.1,
-                max_tokens=500
-            )
+            request, usage = self._intent_request(question)
+            client = self._bounded(self.client, 'intent')
+
+            def complete():
+                started = time.perf_counter()
+                response = client.chat.completions.create(**request)
+                self._record_call(usage, started, response)
+                return self._parse_intent(question, response)
 
-            content = response.choices[0].message.content
-            result = json.loads(content)
-            result['success'] = True
-            return result
+            return self._guarded('intent', complete, self._hedge_seconds('intent'))
 
         except Exception as e:
             print(f"LLM intent detection error: {e}")
             return self._fallback_intent_detection(question)
 
+    async def analyze_question_async(self, question: str) -> dict:
+        """analyze_question for the asyncio serving mode"""
+        if not self.async_client:
+            return self._fallback_intent_detection(question)
+
+        known = self._known_intent(question)
+        if known is not None:
+            return known
+
+        try:
+            request, usage = self._intent_request(question)
+            client = self._bounded(self.async_client, 'intent')
+
+            async def complete():
+                started = time.perf_counter()
+                response = await client.chat.completions.create(**request)
+                self._record_call(usage, started, response)
+                return self._parse_intent(question, response)
+
+            return await self._guarded_async('intent', complete, self._hedge_seconds('intent'))
+
+        except Exception as e:
+            print(f"LLM intent detection error: {e}")
+            return self._fallback_intent_detection(question)
+
+    def _bounded(self, client, call: str, fallback: str = None):
+        """client with the call's deadline as request timeout and the retry policy"""
+        timeout = self._deadline(call, fallback)
+        key = (id(client), timeout)
+        bounded = self._bounded_clients.get(key)
+        if bounded is None:
+            bounded = self._bounded_clients[key] = client.with_options(timeout=timeout, max_retries=self.max_retries)
+        return bounded
+
+    def _deadline(self, call: str, fallback: str = None) -> float:
+        deadline = self.deadlines[call]
+        if call == 'format' and self.hedge:
+            # Every format call has a local answer to return once this passes
+            deadline = min(deadline, self.hedge_format)
+        if call == 'format' and fallback is not None and self.fallback_timeout:
+            # With a ready rule-based answer, a slow model is not worth waiting for
+            deadline = min(deadline, self.fallback_timeout)
+        return deadline
+
+    def _hedge_seconds(self, call: str):
+        if not self.hedge or call != 'intent':
+            return None
+        return min(self.hedge_intent, self.deadlines['intent'])
+
+    def _admit(self, call: str):
+        if not self.breaker.allow():
+            metrics.inc('diagora_llm_calls_total', call, 'rejected')
+            raise CircuitOpenError(f'circuit open, {call} call skipped')
+
+    def _record_outcome(self, call: str, started: float, error: Exception = None):
+        """Feed the breaker with one call's latency and whether the provider failed"""
+        self.breaker.record(time.perf_counter() - started, error is None or not provider_failure(error), call)
+        if error is None:
+            outcome = 'success'
+        else:
+            outcome = 'timeout' if 'Timeout' in type(error).__name__ else 'error'
+        metrics.inc('diagora_llm_calls_total', call, outcome)
+
+    def _observed(self, call: str, function):
+        started = time.perf_counter()
+        try:
+            result = function()
+        except Exception as e:
+            self._record_outcome(call, started, e)
+            raise
+        self._record_outcome(call, started)
+        return result
+
+    async def _observed_async(self, call: str, function):
+        started = time.perf_counter()
+        try:
+            result = await function()
+        except Exception as e:
+            self._record_outcome(call, started, e)
+            raise
+        self._record_outcome(call, started)
+        return result
+
+    def _get_hedge_pool(self):
+        if self._hedge_pool is None:
+            self._hedge_pool = ThreadPoolExecutor(max_workers=self.hedge_workers, thread_name_prefix='llm-hedge')
+        return self._hedge_pool
+
+    def _guarded(self, call: str, function, hedge_seconds: float = None):
+        """Run one LLM call under the circuit breaker
+
+        With hedge_seconds the call runs in the hedge pool and HedgeTimeout is
+        raised once that time passes. The call itself goes on until its own
+        deadline, so a late intent still lands in the intent cache. When
+        LLM_HEDGE_WORKERS calls are already running, the call is not made at
+        all rather than queued behind them.
+        """
+        if not hedge_seconds:
+            self._admit(call)
+            return self._observed(call, function)
+
+        with self._hedge_lock:
+            saturated = self._hedge_running >= self.hedge_workers
+            if not saturated:
+                self._hedge_running += 1
+        if saturated:
+            self._hedge_dropped(call)
+        try:
+            self._admit(call)
+            future = self._get_hedge_pool().submit(self._observed, call, function)
+        except Exception:
+            self._hedge_done(None)
+            raise
+        future.add_done_callback(self._hedge_done)
+        try:
+            return future.result(timeout=hedge_seconds)
+        except FutureTimeout:
+            metrics.inc('diagora_llm_calls_total', call, 'hedged')
+            raise HedgeTimeout(f'no {call} answer within {hedge_seconds:g}s') from None
+
+    async def _guarded_async(self, call: str, function, hedge_seconds: float = None):
+        """_guarded for coroutines; a hedged call keeps running as a background task"""
+        if not hedge_seconds:
+            self._admit(call)
+            return await self._observed_async(call, function)
+
+        if len(self._background) >= self.hedge_workers:
+            self._hedge_dropped(call)
+        self._admit(call)
+        task = asyncio.ensure_future(self._observed_async(call, function))
+        self._background.add(task)
+        task.add_done_callback(self._task_done)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), hedge_seconds)
+        except asyncio.TimeoutError:
+            metrics.inc('diagora_llm_calls_total', call, 'hedged')
+            raise HedgeTimeout(f'no {call} answer within {hedge_seconds:g}s') from None
+
+    def _hedge_done(self, future):
+        with self._hedge_lock:
+            self._hedge_running -= 1
+
+    @staticmethod
+    def _hedge_dropped(call: str):
+        """Every hedge worker is busy with a slow call: answer locally without another one"""
+        metrics.inc('diagora_llm_calls_total', call, 'dropped')
+        raise HedgeTimeout(f'{call} hedge pool full, call skipped')
+
+    def _task_done(self, task):
+        self._background.discard(task)
+        if not task.cancelled():
+            # Retrieve a late failure so asyncio does not report it as unhandled
+            task.exception()
+
+    def _known_intent(self, question: str):
+        """Cached or confidently classified intent, None when the LLM has to decide"""
+        cached = self.intent_cache.get(question)
+        metrics.inc('diagora_cache_requests_total', 'intent', 'miss' if cached is None else 'hit')
+        if cached is not None:
+            cached['success'] = True
+            cached['cached'] = True
+            return cached
+
+        # Confident local classifications skip the LLM round-trip
+        local = self.local_classifier.classify(question)
+        if local['confidence'] >= self.local_threshold:
+            local['success'] = True
+            local['source'] = 'local'
+            return local
+
+        return None
+
+    def _intent_request(self, question: str) -> tuple:
+        # The static intent prompt comes first so it is a stable, cacheable prefix
+        return self._request('intent', None, [
+            {"role": "system", "content": self._get_intent_prompt()},
+            {"role": "user", "content": question}
+        ], 0.1)
+
+    def _request(self, call: str, intent, messages: list, temperature: float, stream: bool = False) -> tuple:
+        """(request kwargs, usage record) with max_tokens picked by the token budget
+
+        Raises TokenBudgetExceeded before any network call when the prompt
+        does not fit the context window.
+        """
+        max_tokens = self.token_budget.max_tokens(call, intent)
+        prompt_tokens = self.token_budget.count_messages(messages)
+        self.token_budget.check(prompt_tokens, max_tokens)
+        request = {
+            'model': os.getenv('AZURE_OPENAI_DEPLOYMENT_NAME', 'gpt-4'),
+            'messages': messages,
+            'temperature': temperature,
+            'max_tokens': max_tokens
+        }
+        usage = {
+            'call': f'{call}_stream' if stream else call,
+            'intent': intent,
+            'prompt_estimate': prompt_tokens,
+            'max_tokens': max_tokens
+        }
+        return request, usage
+
+    def _parse_intent(self, question: str, response) -> dict:
+        content = response.choices[0].message.content
+        result = json.loads(content)
+        self.intent_cache.put(question, result)
+        self._log_intent(question, result)
+        result['success'] = True
+        return result
+
+    def _record_call(self, usage: dict, started, response):
+        """Complete a usage record from a response and record it"""
+        self._read_usage(usage, response)
+        choices = getattr(response, 'choices', None)
+        if choices:
+            usage['finish_reason'] = getattr(choices[0], 'finish_reason', None)
+        self._finish_usage(usage, started)
+
+    @staticmethod
+    def _read_usage(usage: dict, response):
+        """Copy the token counts Azure OpenAI reports into the usage record"""
+        reported = getattr(response, 'usage', None)
+        if not reported:
+            return
+        usage['prompt_tokens'] = reported.prompt_tokens
+        usage['completion_tokens'] = reported.completion_tokens
+        details = getattr(reported, 'prompt_tokens_details', None)
+        if details is not None and getattr(details, 'cached_tokens', None) is not None:
+            usage['cached_tokens'] = details.cached_tokens
+
+    def _finish_usage(self, usage: dict, started):
+        """Record latency, token metrics and the observed completion length; log the request"""
+        call = usage['call']
+        if started is not None:
+            elapsed = time.perf_counter() - started
+            usage['latency_ms'] = round(elapsed * 1000, 1)
+            metrics.observe('diagora_llm_request_seconds', elapsed, call)
+
+        metrics.inc('diagora_llm_tokens_total', call, 'prompt', amount=usage.get('prompt_tokens') or 0)
+        metrics.inc('diagora_llm_tokens_total', call, 'completion', amount=usage.get('completion_tokens') or 0)
+        if usage.get('cached_tokens'):
+            metrics.inc('diagora_llm_tokens_total', call, 'cached', amount=usage['cached_tokens'])
+
+        self.token_budget.observe(
+            call.replace('_stream', ''), usage['intent'], usage.get('completion_tokens'),
+            usage['max_tokens'], usage.get('finish_reason') == 'length'
+        )
+        self.token_budget.log(usage)
+
+    def _log_intent(self, question: str, result: dict):
+        """Append an LLM-labelled question to the classifier training log"""
+        if not self.intent_log_path:
+            return
+        record = {
+            'question': question,
+            'intent': result.get('intent'),
+            'entities': result.get('entities', {}),
+            'confidence': result.get('confidence')
+        }
+        try:
+            with open(self.intent_log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"Intent log write error: {e}")
+
+    def local_intent(self, question: str) -> dict:
+        """Detect intent without calling the LLM"""
+        return self._fallback_intent_detection(question)
+
     def _get_intent_prompt(self):
         return """Kullanıcının Oracle EBS sorusunu analiz et ve aşağıdaki JSON formatında yanıt ver:
 
 {
-    "intent": "concurrent_manager|workflow|invalid_objects|tablespace|general",
+    "intent": "concurrent_manager|workflow|invalid_objects|tablespace|trend|general",
     "entities": {
         "manager_name": "optional - specific manager name if mentioned",
         "schema_name": "optional - specific schema if mentioned",
-        "status_filter": "optional - status filter like RUNNING, ERROR, etc."
+        "status_filter": "optional - status filter like RUNNING, ERROR, etc.",
+        "series": "optional - trend: tablespace name, workflow item type or manager name",
+        "metric": "optional - trend: USED_PERCENT, USED_GB, STUCK_COUNT, ACTIVE_COUNT or RUNNING",
+        "window_days": "optional - trend: number of days to look back"
     },
     "confidence": 0.0-1.0
 }
@@ -99,64 +441,283 @@ Intent açıklamaları:
 - workflow: Oracle Workflow, WF, iş akışı ile ilgili sorular
 - invalid_objects: Invalid object, compile, geçersiz obje ile ilgili sorular
 - tablespace: Tablespace, disk, alan, storage ile ilgili sorular
+- trend: Zaman içindeki değişim, büyüme hızı, artış/azalış eğilimi soruları
 - general: Diğer genel EBS soruları
 
 Sadece JSON döndür, başka bir şey yazma."""
 
     def _fallback_intent_detection(self, question: str) -> dict:
-        """Simple keyword-based intent detection as fallback"""
-        question_lower = question.lower()
-
-        intents = {
-            'concurrent_manager': ['concurrent', 'manager', 'request', 'job', 'schedule', 'fnd_concurrent', 'icm', 'running request'],
-            'workflow': ['workflow', 'wf_', 'iş akışı', 'stuck', 'notification'],
-            'invalid_objects': ['invalid', 'geçersiz', 'compile', 'dba_objects'],
-            'tablespace': ['tablespace', 'disk', 'alan', 'storage', 'space', 'dolu']
-        }
+        """Local classifier (keyword matcher or trained model) as fallback"""
+        result = self.local_classifier.classify(question)
+        result['success'] = True
+        return result
 
-        for intent, keywords in intents.items():
-            if any(keyword in question_lower for keyword in keywords):
-                return {
-                    'success': True,
-                    'intent': intent,
-                    'entities': {},
-                    'confidence': 0.7
-                }
+    def format_response(self, question: str, intent: str, db_result: dict, fallback: str = None) -> str:
+        """Format database results into natural language response
 
-        return {
-            'success': True,
-            'intent': 'general',
-            'entities': {},
-            'confidence': 0.5
-        }
+        fallback is a ready answer (from the rule engine) returned when the
+        LLM fails; the call then also gets the shorter fallback_timeout.
+        """
+        if not self.client:
+            return self._fallback_answer(intent, db_result, fallback)
+
+        try:
+            request, usage = self._format_request(question, intent, db_result)
+            client = self._bounded(self.client, 'format', fallback)
+
+            def complete():
+                started = time.perf_counter()
+                response = client.chat.completions.create(**request)
+                self._record_call(usage, started, response)
+                return response.choices[0].message.content
+
+            return self._guarded('format', complete)
+
+        except Exception as e:
+            print(f"LLM response formatting error: {e}")
+            return self._fallback_answer(intent, db_result, fallback, e)
+
+    async def format_response_async(self, question: str, intent: str, db_result: dict,
+                                    fallback: str = None) -> str:
+        """format_response for the asyncio serving mode"""
+        if not self.async_client:
+            return self._fallback_answer(intent, db_result, fallback)
+
+        try:
+            request, usage = self._format_request(question, intent, db_result)
+            client = self._bounded(self.async_client, 'format', fallback)
+
+            async def complete():
+                started = time.perf_counter()
+                response = await client.chat.completions.create(**request)
+                self._record_call(usage, started, response)
+                return response.choices[0].message.content
+
+            return await self._guarded_async('format', complete)
 
-    def format_response(self, question: str, intent: str, db_result: dict) -> str:
-        """Format database results into natural language response"""
+        except Exception as e:
+            print(f"LLM response formatting error: {e}")
+            return self._fallback_answer(intent, db_result, fallback, e)
+
+    def format_response_stream(self, question: str, intent: str, db_result: dict, fallback: str = None):
+        """Yield the formatted response in chunks as the model produces them"""
         if not self.client:
-            return self._fallback_format_response(intent, db_result)
+            yield self._fallback_answer(intent, db_result, fallback)
+            return
 
+        streamed = []
+        started = None
         try:
-            deployment = os.getenv('AZURE_OPENAI_DEPLOYMENT_NAME', 'gpt-4')
-
-            context = f"""Kullanıcı sorusu: {question}
-Tespit edilen intent: {intent}
-Veritabanı sonucu: {json.dumps(db_result, ensure_ascii=False, default=str) if db_result else 'Sorgu çalıştırılmadı'}"""
-
-            response = self.client.chat.completions.create(
-                model=deployment,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": context}
-                ],
-                temperature=0.3,
-                max_tokens=1000
+            request, usage = self._format_request(question, intent, db_result, stream=True)
+            self._admit('format_stream')
+            started = time.perf_counter()
+            stream = self._bounded(self.client, 'format', fallback).chat.completions.create(stream=True, **request)
+
+            for chunk in stream:
+                text = self._chunk_text(chunk, usage)
+                if not text:
+                    continue
+                if not streamed:
+                    # Streams are judged by time to first token
+                    self._record_outcome('format_stream', started)
+                streamed.append(text)
+                yield text
+                if time.perf_counter() - started > self.stream_deadline:
+                    stream.close()
+                    yield STREAM_CUT_NOTE
+                    break
+            if not streamed:
+                self._record_outcome('format_stream', started)
+            self._finish_stream(usage, started, streamed)
+
+        except Exception as e:
+            print(f"LLM response streaming error: {e}")
+            if not streamed:
+                if started is not None:
+                    self._record_outcome('format_stream', started, e)
+                yield self._fallback_answer(intent, db_result, fallback, e)
+
+    async def format_response_stream_async(self, question: str, intent: str, db_result: dict,
+                                           fallback: str = None):
+        """format_response_stream as an async generator"""
+        if not self.async_client:
+            yield self._fallback_answer(intent, db_result, fallback)
+            return
+
+        streamed = []
+        started = None
+        try:
+            request, usage = self._format_request(question, intent, db_result, stream=True)
+            self._admit('format_stream')
+            started = time.perf_counter()
+            stream = await self._bounded(self.async_client, 'format', fallback).chat.completions.create(
+                stream=True, **request
             )
 
-            return response.choices[0].message.content
+            async for chunk in stream:
+                text = self._chunk_text(chunk, usage)
+                if not text:
+                    continue
+                if not streamed:
+                    self._record_outcome('format_stream', started)
+                streamed.append(text)
+                yield text
+                if time.perf_counter() - started > self.stream_deadline:
+                    await (stream.aclose() if hasattr(stream, 'aclose') else stream.close())
+                    yield STREAM_CUT_NOTE
+                    break
+            if not streamed:
+                self._record_outcome('format_stream', started)
+            self._finish_stream(usage, started, streamed)
 
         except Exception as e:
-            print(f"LLM response formatting error: {e}")
+            print(f"LLM response streaming error: {e}")
+            if not streamed:
+                if started is not None:
+                    self._record_outcome('format_stream', started, e)
+                yield self._fallback_answer(intent, db_result, fallback, e)
+
+    def _fallback_answer(self, intent: str, db_result: dict, fallback: str = None, error: Exception = None) -> str:
+        if fallback is None:
             return self._fallback_format_response(intent, db_result)
+        if isinstance(error, CircuitOpenError):
+            reason = 'llm_breaker'
+        elif error is not None and 'Timeout' in type(error).__name__:
+            reason = 'llm_timeout'
+        else:
+            reason = 'llm_error'
+        metrics.inc('diagora_rule_answers_total', intent, reason)
+        return fallback
+
+    def _chunk_text(self, chunk, usage: dict):
+        self._read_usage(usage, chunk)
+        # Azure sends a leading chunk without choices for content filter results
+        if not chunk.choices:
+            return None
+        if getattr(chunk.choices[0], 'finish_reason', None):
+            usage['finish_reason'] = chunk.choices[0].finish_reason
+        return chunk.choices[0].delta.content
+
+    def _finish_stream(self, usage: dict, started, streamed: list):
+        if 'completion_tokens' not in usage:
+            # Streams do not report usage on this API version: count locally
+            usage['prompt_tokens'] = usage['prompt_estimate']
+            usage['completion_tokens'] = self.token_budget.count(''.join(streamed))
+            usage['estimated'] = True
+        self._finish_usage(usage, started)
+
+    def _format_request(self, question: str, intent: str, db_result: dict, stream: bool = False) -> tuple:
+        messages = self._get_format_messages(question, intent, db_result)
+        over = self.token_budget.overflow(
+            self.token_budget.count_messages(messages), self.token_budget.max_tokens('format', intent)
+        )
+        if over and db_result and 'summary' in db_result:
+            # Too large for the context window: shrink the sample rows, then the summary lists
+            payload_tokens = self.token_budget.count(self._prompt_payload(db_result))
+            db_result = fit_budget(
+                dict(db_result, summary=copy.deepcopy(db_result['summary'])),
+                max(0, payload_tokens - over),
+                lambda payload: self.token_budget.count(self._prompt_payload(payload))
+            )
+            db_result['rows_sent'] = len(db_result['data'])
+            messages = self._get_format_messages(question, intent, db_result)
+        return self._request('format', intent, messages, 0.3, stream)
+
+    @staticmethod
+    def _prompt_payload(db_result: dict) -> str:
+        """JSON for the prompt with the volatile keys last"""
+        ordered = {key: value for key, value in db_result.items() if key not in VOLATILE_RESULT_KEYS}
+        ordered.update((key, db_result[key]) for key in VOLATILE_RESULT_KEYS if key in db_result)
+        return json.dumps(ordered, ensure_ascii=False, default=json_default)
+
+    def _get_format_messages(self, question: str, intent: str, db_result: dict) -> list:
+        # Static text first and the question last: requests for the same intent
+        # and the same cached or snapshot result differ only in the final line,
+        # so provider-side prompt caching can reuse everything before it
+        context = f"""Tespit edilen intent: {intent}
+Veritabanı sonucu (özet ve örnek satırlar): {self._prompt_payload(db_result) if db_result else 'Sorgu çalıştırılmadı'}
+
+Kullanıcı sorusu: {question}"""
+
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": context}
+        ]
+
+    def format_report(self, results: dict, fallbacks: dict = None) -> str:
+        """Summarize several intents' results in one consolidated answer
+
+        fallbacks maps intents to rule-based answers used if the LLM fails.
+        """
+        if not self.client:
+            return self._fallback_format_report(results, fallbacks)
+
+        try:
+            request, usage = self._report_request(results)
+            client = self._bounded(self.client, 'report')
+
+            def complete():
+                started = time.perf_counter()
+                response = client.chat.completions.create(**request)
+                self._record_call(usage, started, response)
+                return response.choices[0].message.content
+
+            return self._guarded('report', complete)
+
+        except Exception as e:
+            print(f"LLM report formatting error: {e}")
+            return self._fallback_format_report(results, fallbacks)
+
+    def _report_request(self, results: dict) -> tuple:
+        messages = self._get_report_messages(results)
+        over = self.token_budget.overflow(
+            self.token_budget.count_messages(messages), self.token_budget.max_tokens('report')
+        )
+        if over:
+            # Take the excess from every intent in proportion to its share of the payload
+            sizes = {
+                intent: self.token_budget.count(self._prompt_payload(result))
+                for intent, result in results.items() if result and 'summary' in result
+            }
+            total = sum(sizes.values())
+            results = dict(results)
+            for intent, size in sizes.items():
+                result = results[intent]
+                result = fit_budget(
+                    dict(result, summary=copy.deepcopy(result['summary'])),
+                    max(0, size - math.ceil(over * size / total)),
+                    lambda payload: self.token_budget.count(self._prompt_payload(payload))
+                )
+                result['rows_sent'] = len(result['data'])
+                results[intent] = result
+            messages = self._get_report_messages(results)
+        return self._request('report', None, messages, 0.3)
+
+    def _get_report_messages(self, results: dict) -> list:
+        payload = ', '.join(
+            f'"{intent}": {self._prompt_payload(result) if result else "null"}' for intent, result in results.items()
+        )
+        context = f"""Kullanıcı isteği: Tam sistem kontrolü
+Tüm alanları tek bir rapor halinde özetle. Önce acil aksiyon gerektiren sorunları listele,
+zaman aşımına uğrayan veya hata veren kontrolleri ayrıca belirt.
+
+Kontrol edilen alanlar: {', '.join(results)}
+Veritabanı sonuçları (alan başına özet ve örnek satırlar): {{{payload}}}"""
+
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": context}
+        ]
+
+    def _fallback_format_report(self, results: dict, fallbacks: dict = None) -> str:
+        """Per-intent fallback summaries joined into one report"""
+        sections = []
+        for intent, result in results.items():
+            section = (fallbacks or {}).get(intent) or self._fallback_format_response(intent, result)
+            if result and result.get('error'):
+                section = f"**{intent.replace('_', ' ').title()}:** {section}"
+            sections.append(section)
+        return "\n\n---\n\n".join(sections)
 
     def _fallback_format_response(self, intent: str, db_result: dict) -> str:
         """Simple response formatting as fallback"""
@@ -168,19 +729,21 @@ Veritabanı sonucu: {json.dumps(db_result, ensure_ascii=False, default=str) if d
 
         data = db_result.get('data', [])
         columns = db_result.get('columns', [])
+        # Compacted results carry only a sample in data; row_count is the full size
+        total = db_result.get('row_count', len(data))
 
         if not data:
             return f"{intent} kontrolü tamamlandı. Herhangi bir sorun tespit edilmedi."
 
         response_lines = [f"**{intent.replace('_', ' ').title()} Sonuçları:**\n"]
-        response_lines.append(f"Toplam {len(data)} kayıt bulundu.\n")
+        response_lines.append(f"Toplam {total} kayıt bulundu.\n")
 
         # Show first 10 results
         for i, row in enumerate(data[:10]):
             row_info = " | ".join(f"{col}: {val}" for col, val in zip(columns, row))
             response_lines.append(f"{i+1}. {row_info}")
 
-        if len(data) > 10:
-            response_lines.append(f"\n... ve {len(data) - 10} kayıt daha.")
+        if total > 10:
+            response_lines.append(f"\n... ve {total - 10} kayıt daha.")
 
         return "\n".join(response_lines)
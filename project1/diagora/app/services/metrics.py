@@ -0,0 +1,257 @@
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+# Seconds; covers cache hits (ms) up to slow LLM calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# name: (type, help, label names[, buckets])
+DEFINITIONS = {
+    'diagora_ask_stage_seconds': (
+        'histogram', 'Time spent in each stage of the ask pipeline', ('stage', 'intent'), LATENCY_BUCKETS
+    ),
+    'diagora_oracle_phase_seconds': (
+        'histogram', 'Oracle time split into pool acquire, execute and fetch', ('instance', 'phase'), LATENCY_BUCKETS
+    ),
+    'diagora_oracle_queries_total': (
+        'counter', 'Oracle queries by outcome (success, demo, error, pool_exhausted)', ('instance', 'outcome')
+    ),
+    'diagora_llm_request_seconds': (
+        'histogram', 'Azure OpenAI request latency', ('call',), LATENCY_BUCKETS
+    ),
+    'diagora_llm_tokens_total': (
+        'counter', 'Azure OpenAI tokens reported in usage', ('call', 'kind')
+    ),
+    'diagora_llm_calls_total': (
+        'counter', 'Azure OpenAI calls by outcome (success, error, timeout, hedged, dropped, rejected)', ('call', 'outcome')
+    ),
+    'diagora_llm_breaker_state': (
+        'gauge', 'LLM circuit breaker state per worker: 0 closed, 1 half open, 2 open', ()
+    ),
+    'diagora_cache_requests_total': (
+        'counter', 'Cache lookups by outcome', ('cache', 'outcome')
+    ),
+    'diagora_rule_answers_total': (
+        'counter', 'Answers built by the rule engine instead of the LLM', ('intent', 'reason')
+    ),
+    'diagora_follow_ups_total': (
+        'counter', 'Follow-up questions answered from the session\'s previous result', ('intent',)
+    ),
+    'diagora_admission_total': (
+        'counter', 'Oracle queries admitted or rejected (queue_full, timeout) by cost class',
+        ('instance', 'cost', 'outcome')
+    ),
+    'diagora_admission_wait_seconds': (
+        'histogram', 'Time a query waited in the admission queue', ('instance', 'cost'), LATENCY_BUCKETS
+    ),
+    'diagora_admission_active': (
+        'gauge', 'Oracle queries running per cost class per worker', ('instance', 'cost')
+    ),
+    'diagora_admission_queue_depth': (
+        'gauge', 'Oracle queries waiting for admission per cost class per worker', ('instance', 'cost')
+    ),
+    'diagora_oracle_pool_sessions': (
+        'gauge', 'Session pool size per worker', ('instance', 'state')
+    ),
+    'diagora_cache_entries': (
+        'gauge', 'Entries held per cache per worker', ('cache',)
+    ),
+    'diagora_startup_seconds': (
+        'gauge', 'Start-up time per worker by stage and step', ('stage', 'step')
+    ),
+    'diagora_first_request_seconds': (
+        'gauge', 'Latency of the first request a worker served', ()
+    ),
+}
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(pairs) -> str:
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+class Metrics:
+    """Process-local counters and histograms rendered in Prometheus text format
+
+    With METRICS_DIR set every worker writes its values to <pid>.json in that
+    directory and /metrics merges all files, so any gunicorn worker can answer
+    a scrape for the whole server.
+    """
+
+    def __init__(self, directory: str = None, enabled: bool = None):
+        self.enabled = enabled if enabled is not None else \
+            os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+        self.directory = directory if directory is not None else os.getenv('METRICS_DIR', '')
+        self.flush_interval = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._thread = None
+
+    def inc(self, name: str, *labels, amount: float = 1):
+        """Increment a counter; labels are values in DEFINITIONS order"""
+        if not self.enabled:
+            return
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, *labels):
+        """Add one observation to a histogram"""
+        if not self.enabled:
+            return
+        key = (name, labels)
+        with self._lock:
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = self._histograms[key] = [[0] * (len(DEFINITIONS[name][3]) + 1), 0.0, 0]
+            entry[0][bisect.bisect_left(DEFINITIONS[name][3], value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def add_collector(self, collector):
+        """Register a callable returning [(gauge name, labels tuple, value)] read at flush/scrape time"""
+        self._collectors.append(collector)
+
+    def _gauges(self) -> list:
+        gauges = []
+        for collector in self._collectors:
+            try:
+                gauges.extend(collector())
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+        return gauges
+
+    def snapshot(self) -> dict:
+        """This worker's values in the on-disk JSON layout"""
+        with self._lock:
+            counters = [[name, list(labels), value] for (name, labels), value in self._counters.items()]
+            histograms = [
+                [name, list(labels), list(buckets), total, count]
+                for (name, labels), (buckets, total, count) in self._histograms.items()
+            ]
+        gauges = [[name, list(labels), value] for name, labels, value in self._gauges()]
+        return {
+            'pid': os.getpid(),
+            'ts': time.time(),
+            'counters': counters,
+            'histograms': histograms,
+            'gauges': gauges
+        }
+
+    def flush(self):
+        """Write this worker's snapshot to METRICS_DIR"""
+        if not self.directory or not self.enabled:
+            return
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Metrics flush error: {e}")
+
+    def start(self):
+        """Start the background flusher (only needed with METRICS_DIR)"""
+        if not self.directory or not self.enabled:
+            return
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='metrics-flusher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self.flush()
+            time.sleep(self.flush_interval)
+
+    def _load_snapshots(self) -> list:
+        if not self.directory:
+            return [self.snapshot()]
+
+        self.flush()
+        snapshots = []
+        stale_after = self.flush_interval * 3
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            # Counters of exited workers stay in the totals; their gauges do not
+            if time.time() - snapshot.get('ts', 0) > stale_after and not _pid_alive(snapshot.get('pid', 0)):
+                snapshot['gauges'] = []
+            snapshots.append(snapshot)
+        return snapshots
+
+    def render(self) -> str:
+        """Merge every worker's values into Prometheus text exposition format"""
+        counters, histograms, gauges = {}, {}, {}
+        for snapshot in self._load_snapshots():
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, buckets, total, count in snapshot['histograms']:
+                key = (name, tuple(labels))
+                merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += total
+                merged[2] += count
+            for name, labels, value in snapshot['gauges']:
+                gauges[(name, tuple(labels) + (snapshot['pid'],))] = value
+
+        lines = []
+        for name, definition in DEFINITIONS.items():
+            kind, help_text, label_names = definition[:3]
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{_format_labels(zip(label_names, labels))} {value}')
+
+            elif kind == 'gauge':
+                for (metric, labels), value in sorted(gauges.items()):
+                    if metric == name:
+                        pairs = list(zip(label_names + ('pid',), labels))
+                        lines.append(f'{name}{_format_labels(pairs)} {value}')
+
+            else:
+                edges = [str(edge) for edge in definition[3]] + ['+Inf']
+                for (metric, labels), (buckets, total, count) in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    pairs = list(zip(label_names, labels))
+                    cumulative = 0
+                    for edge, bucket in zip(edges, buckets):
+                        cumulative += bucket
+                        lines.append(f'{name}_bucket{_format_labels(pairs + [("le", edge)])} {cumulative}')
+                    lines.append(f'{name}_sum{_format_labels(pairs)} {round(total, 6)}')
+                    lines.append(f'{name}_count{_format_labels(pairs)} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
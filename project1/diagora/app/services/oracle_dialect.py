@@ -0,0 +1,166 @@
+"""Oracle SQL -> SQLite translation for the synthetic EBS backend
+
+Covers the Oracle-isms used in queries/ebs_queries.py:
+    SYSDATE                   SYSDATE() returning a Julian day number, so
+                              date arithmetic in days works unchanged
+    DECODE, NVL, TO_CHAR      registered as SQLite functions
+    a.col = b.col(+)          comma joins rewritten to LEFT JOIN ... ON
+    FETCH FIRST n ROWS ONLY   LIMIT n
+
+Dates are stored as Julian day numbers (REAL) in local time.
+"""
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+UNIX_EPOCH_JULIAN = 2440587.5
+_EPOCH = datetime(1970, 1, 1)
+
+CLAUSE_RE = re.compile(r'\b(SELECT|FROM|WHERE|GROUP\s+BY|HAVING|ORDER\s+BY|FETCH\s+FIRST|LIMIT)\b', re.I)
+FETCH_FIRST_RE = re.compile(r'\bFETCH\s+FIRST\s+(\d+)\s+ROWS?\s+ONLY\b', re.I)
+SYSDATE_RE = re.compile(r'\bSYSDATE\b(?!\s*\()', re.I)
+OUTER_MARK_RE = re.compile(r'(\w+)\.\w+\s*\(\+\)')
+
+# Oracle datetime format elements -> strftime
+DATE_FORMATS = [
+    ('YYYY', '%Y'), ('HH24', '%H'), ('MON', '%b'), ('DD', '%d'), ('MM', '%m'), ('MI', '%M'), ('SS', '%S')
+]
+DATE_FORMAT_RE = re.compile('|'.join(token for token, _ in DATE_FORMATS))
+
+
+def to_julian(value: datetime) -> float:
+    return (value - _EPOCH).total_seconds() / 86400 + UNIX_EPOCH_JULIAN
+
+
+def from_julian(value: float) -> datetime:
+    return _EPOCH + timedelta(days=value - UNIX_EPOCH_JULIAN)
+
+
+def sysdate() -> float:
+    return to_julian(datetime.now())
+
+
+def decode(expr, *args):
+    """DECODE(expr, search1, result1, ..., default); NULL matches NULL as in Oracle"""
+    for i in range(0, len(args) - 1, 2):
+        if expr == args[i] or (expr is None and args[i] is None):
+            return args[i + 1]
+    return args[-1] if len(args) % 2 else None
+
+
+def nvl(value, default):
+    return default if value is None else value
+
+
+def to_char(value, fmt: str = None):
+    if value is None:
+        return None
+    if fmt is None or not isinstance(value, (int, float)):
+        return str(value)
+    date = from_julian(value)
+    mapping = dict(DATE_FORMATS)
+    text = DATE_FORMAT_RE.sub(lambda m: mapping[m.group(0)], fmt.upper())
+    return date.strftime(text).upper()
+
+
+FUNCTIONS = [
+    ('SYSDATE', 0, sysdate),
+    ('DECODE', -1, decode),
+    ('NVL', 2, nvl),
+    ('TO_CHAR', 1, to_char),
+    ('TO_CHAR', 2, to_char)
+]
+
+
+def register_functions(connection):
+    """Make the Oracle functions available on a sqlite3 connection"""
+    for name, arity, function in FUNCTIONS:
+        connection.create_function(name, arity, function, deterministic=name != 'SYSDATE')
+
+
+def _depths(sql: str) -> list:
+    """Parenthesis depth of every character; -1 inside string literals"""
+    depths = []
+    depth, quoted = 0, False
+    for char in sql:
+        if char == "'":
+            quoted = not quoted
+            depths.append(-1)
+            continue
+        if quoted:
+            depths.append(-1)
+            continue
+        if char == '(':
+            depth += 1
+        depths.append(depth)
+        if char == ')':
+            depth -= 1
+    return depths
+
+
+def _split_top(text: str, separator: str) -> list:
+    """Split on a separator regex only where it is outside parentheses and quotes"""
+    depths = _depths(text)
+    parts, start = [], 0
+    for match in re.finditer(separator, text, re.I):
+        if depths[match.start()] == 0:
+            parts.append(text[start:match.start()].strip())
+            start = match.end()
+    parts.append(text[start:].strip())
+    return [part for part in parts if part]
+
+
+def _clauses(sql: str) -> list:
+    """[(keyword, body)] for the top-level clauses of a SELECT"""
+    depths = _depths(sql)
+    marks = [m for m in CLAUSE_RE.finditer(sql) if depths[m.start()] == 0]
+    clauses = []
+    for i, match in enumerate(marks):
+        end = marks[i + 1].start() if i + 1 < len(marks) else len(sql)
+        clauses.append((re.sub(r'\s+', ' ', match.group(1).upper()), sql[match.end():end]))
+    return clauses
+
+
+def _rewrite_outer_joins(sql: str) -> str:
+    """Turn Oracle (+) joins of a comma-separated FROM list into LEFT JOINs"""
+    clauses = _clauses(sql)
+    keywords = [keyword for keyword, _ in clauses]
+    if 'FROM' not in keywords or 'WHERE' not in keywords:
+        return sql
+
+    from_items = _split_top(dict(clauses)['FROM'], ',')
+    outer, inner = {}, []
+    for condition in _split_top(dict(clauses)['WHERE'], r'\bAND\b'):
+        match = OUTER_MARK_RE.search(condition)
+        if match:
+            outer.setdefault(match.group(1).upper(), []).append(re.sub(r'\s*\(\+\)', '', condition))
+        else:
+            inner.append(condition)
+
+    joined = [item for item in from_items if item.split()[-1].upper() not in outer]
+    from_text = ', '.join(joined)
+    for item in from_items:
+        alias = item.split()[-1].upper()
+        if alias in outer:
+            from_text += f"\nLEFT JOIN {item} ON {' AND '.join(outer[alias])}"
+
+    rebuilt = []
+    for keyword, body in clauses:
+        if keyword == 'FROM':
+            rebuilt.append(f'FROM {from_text}\n')
+        elif keyword == 'WHERE':
+            if inner:
+                rebuilt.append(f"WHERE {' AND '.join(inner)}\n")
+        else:
+            rebuilt.append(f'{keyword} {body}')
+    return sql[:sql.upper().index(clauses[0][0].split()[0])] + ''.join(rebuilt)
+
+
+@lru_cache(maxsize=256)
+def translate(sql: str) -> str:
+    """Rewrite an Oracle query so SQLite can run it (cached per SQL text)"""
+    sql = FETCH_FIRST_RE.sub(r'LIMIT \1', sql)
+    sql = SYSDATE_RE.sub('SYSDATE()', sql)
+    if '(+)' in sql:
+        sql = _rewrite_outer_joins(sql)
+    return sql
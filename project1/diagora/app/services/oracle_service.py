@@ -1,84 +1,435 @@
+import asyncio
 import os
+import threading
+import time
+from app.services import columnar
+from app.services.metrics import metrics
+
+
+class PoolExhaustedError(Exception):
+    """A session pool exists but no connection could be checked out of it"""
 
 
 class OracleService:
-    def __init__(self):
-        self._connection = None
+    def __init__(self, name: str = 'default', settings: dict = None):
+        self.name = name
+        self.settings = settings
+        self._pool = None
+        self._driver_missing = False
+        self._stand_in = False
+        self._async_pool = None
+        self._async_unavailable = False
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._acquire_count = 0
+        self._acquire_wait_total = 0.0
+        self._acquire_wait_max = 0.0
+        self._acquire_timeouts = 0
 
-    def _get_connection(self):
-        """Get Oracle database connection"""
-        try:
-            import cx_Oracle
+    @staticmethod
+    def env_settings(prefix: str = 'ORACLE_') -> dict:
+        """Connection settings from ORACLE_* (or ORACLE_<INSTANCE>_*) variables"""
+        return {
+            'host': os.getenv(f'{prefix}HOST'),
+            'port': os.getenv(f'{prefix}PORT', os.getenv('ORACLE_PORT', '1521')),
+            'service_name': os.getenv(f'{prefix}SERVICE_NAME'),
+            'user': os.getenv(f'{prefix}USER', os.getenv('ORACLE_USER')),
+            'password': os.getenv(f'{prefix}PASSWORD', os.getenv('ORACLE_PASSWORD')),
+            'backend': os.getenv(f'{prefix}BACKEND', os.getenv('ORACLE_BACKEND', 'oracle')).lower()
+        }
+
+    def use_pool(self, pool):
+        """Use an existing session pool (or a compatible stand-in) instead of creating one"""
+        with self._pool_lock:
+            self._pool = pool
+            self._driver_missing = False
+            self._stand_in = True
+
+    def _get_pool(self):
+        """Create the Oracle session pool on first use"""
+        if self._pool is not None or self._driver_missing:
+            return self._pool
 
-            host = os.getenv('ORACLE_HOST')
-            port = os.getenv('ORACLE_PORT', '1521')
-            service = os.getenv('ORACLE_SERVICE_NAME')
-            user = os.getenv('ORACLE_USER')
-            password = os.getenv('ORACLE_PASSWORD')
+        with self._pool_lock:
+            if self._pool is not None:
+                return self._pool
 
-            if not all([host, service, user, password]):
+            settings = self.settings or self.env_settings()
+            if settings.get('backend') == 'synthetic':
+                from app.services.synthetic_backend import SyntheticDatabase, SyntheticPool
+                self._pool = SyntheticPool(SyntheticDatabase())
+                return self._pool
+
+            try:
+                import cx_Oracle
+
+                host = settings.get('host')
+                port = settings.get('port') or '1521'
+                service = settings.get('service_name')
+                user = settings.get('user')
+                password = settings.get('password')
+
+                if not all([host, service, user, password]):
+                    return None
+
+                dsn = cx_Oracle.makedsn(host, port, service_name=service)
+                self._pool = cx_Oracle.SessionPool(
+                    user,
+                    password,
+                    dsn,
+                    min=int(os.getenv('ORACLE_POOL_MIN', 1)),
+                    max=int(os.getenv('ORACLE_POOL_MAX', 4)),
+                    increment=int(os.getenv('ORACLE_POOL_INCREMENT', 1)),
+                    threaded=True,
+                    getmode=cx_Oracle.SPOOL_ATTRVAL_TIMEDWAIT,
+                    wait_timeout=int(os.getenv('ORACLE_POOL_WAIT_TIMEOUT_MS', 5000)),
+                    ping_interval=int(os.getenv('ORACLE_POOL_PING_INTERVAL', 60)),
+                    stmtcachesize=int(os.getenv('ORACLE_STMT_CACHE_SIZE', 40)),
+                    encoding='UTF-8'
+                )
+                return self._pool
+
+            except ImportError:
+                print("cx_Oracle not installed. Running in demo mode.")
+                self._driver_missing = True
                 return None
+            except Exception as e:
+                print(f"Oracle pool creation error ({self.name}): {e}")
+                raise
 
-            dsn = cx_Oracle.makedsn(host, port, service_name=service)
-            connection = cx_Oracle.connect(user, password, dsn)
-            return connection
+    def _get_connection(self):
+        """Check a connection out of the session pool
 
-        except ImportError:
-            print("cx_Oracle not installed. Running in demo mode.")
+        None means demo mode (no driver or no connection settings); a pool
+        that is configured but cannot hand out a session raises, so callers
+        report an error instead of answering with demo data.
+        """
+        pool = self._get_pool()
+        if pool is None:
             return None
+
+        started = time.perf_counter()
+        try:
+            connection = pool.acquire()
         except Exception as e:
-            print(f"Oracle connection error: {e}")
-            return None
+            raise self._acquire_failed(e) from e
+
+        waited = time.perf_counter() - started
+        metrics.observe('diagora_oracle_phase_seconds', waited, self.name, 'acquire')
+        with self._stats_lock:
+            self._acquire_count += 1
+            self._acquire_wait_total += waited
+            self._acquire_wait_max = max(self._acquire_wait_max, waited)
+        return connection
+
+    def _acquire_failed(self, error: Exception) -> PoolExhaustedError:
+        """Count a failed checkout and build the error reported for it"""
+        with self._stats_lock:
+            self._acquire_timeouts += 1
+        metrics.inc('diagora_oracle_queries_total', self.name, 'pool_exhausted')
+        print(f"Oracle connection error ({self.name}): {error}")
+        return PoolExhaustedError(f'connection pool exhausted ({self.name}): {error}')
+
+    def _release_connection(self, connection):
+        """Return a connection to the pool, dropping it if it is broken"""
+        try:
+            self._pool.release(connection)
+        except Exception as e:
+            print(f"Oracle connection release error: {e}")
+
+    def warm_up(self) -> bool:
+        """Create the pool and log a session on, so the first query does not pay for it"""
+        try:
+            connection = self._get_connection()
+        except Exception:
+            return False
+        if connection is None:
+            return False
+        self._release_connection(connection)
+        return True
+
+    async def warm_up_async(self) -> bool:
+        """warm_up() for the asyncio serving mode: opens the async pool (on the running loop) instead"""
+        pool = self._get_async_pool()
+        if pool is None:
+            return await asyncio.to_thread(self.warm_up)
+        try:
+            connection = await pool.acquire()
+        except Exception as e:
+            print(f"Oracle async warm-up error ({self.name}): {e}")
+            return False
+        await pool.release(connection)
+        return True
+
+    def get_pool_stats(self) -> dict:
+        """Return session pool statistics for this worker process"""
+        with self._stats_lock:
+            stats = {
+                'acquire_count': self._acquire_count,
+                'acquire_timeouts': self._acquire_timeouts,
+                'wait_avg_ms': round(self._acquire_wait_total / self._acquire_count * 1000, 2)
+                if self._acquire_count else 0.0,
+                'wait_max_ms': round(self._acquire_wait_max * 1000, 2),
+            }
+
+        pool = self._pool or self._async_pool
+        if pool is None:
+            stats.update({'enabled': False, 'instance': self.name, 'pid': os.getpid()})
+            return stats
+
+        stats.update({
+            'enabled': True,
+            'instance': self.name,
+            'pid': os.getpid(),
+            'min': pool.min,
+            'max': pool.max,
+            'increment': pool.increment,
+            'open': pool.opened,
+            'busy': pool.busy,
+        })
+        return stats
 
     def test_connection(self) -> bool:
         """Test database connection"""
         try:
             conn = self._get_connection()
             if conn:
-                conn.close()
+                try:
+                    conn.ping()
+                finally:
+                    self._release_connection(conn)
                 return True
             return False
         except Exception:
             return False
 
-    def execute_query(self, query: str, params: dict = None) -> dict:
-        """Execute SQL query and return results"""
+    def fetch_options(self, fetch: dict = None) -> dict:
+        """Merge per-query fetch settings over the environment defaults"""
+        options = {
+            'arraysize': int(os.getenv('ORACLE_FETCH_ARRAYSIZE', 200)),
+            'prefetchrows': None,
+            'max_rows': int(os.getenv('ORACLE_MAX_ROWS', 10000)),
+            'call_timeout_ms': 0
+        }
+        options.update({key: value for key, value in (fetch or {}).items() if value is not None})
+        deadline = options.pop('deadline', None)
+        if deadline is not None:
+            # A time.perf_counter() deadline of the caller: the call gets whatever is left of it
+            remaining_ms = max(1, int((deadline - time.perf_counter()) * 1000))
+            options['call_timeout_ms'] = min(options['call_timeout_ms'] or remaining_ms, remaining_ms)
+        if options['prefetchrows'] is None:
+            # One extra row lets small results complete in a single round-trip
+            options['prefetchrows'] = options['arraysize'] + 1
+        return options
+
+    def iter_query(self, query: str, params: dict = None, fetch: dict = None):
+        """Open a QueryStream that yields rows in fetchmany batches
+
+        Use it as a context manager so the pooled connection is always
+        released, even when the caller stops iterating early.
+        """
+        options = self.fetch_options(fetch)
         connection = self._get_connection()
 
         if not connection:
-            # Return demo data when no connection
-            return self._get_demo_data(query)
+            # Demo mode: no driver or no connection settings
+            return QueryStream.from_result(self._get_demo_data(query), options['max_rows'])
+
+        stream = None
+
+        def release():
+            if stream is not None:
+                metrics.observe('diagora_oracle_phase_seconds', stream.fetch_seconds, self.name, 'fetch')
+            try:
+                if options['call_timeout_ms']:
+                    connection.callTimeout = 0
+            finally:
+                self._release_connection(connection)
 
         try:
+            if options['call_timeout_ms']:
+                # Server-side round-trip limit; reset before the session goes back to the pool
+                connection.callTimeout = options['call_timeout_ms']
+
             cursor = connection.cursor()
+            cursor.arraysize = options['arraysize']
+            if hasattr(cursor, 'prefetchrows'):
+                cursor.prefetchrows = options['prefetchrows']
 
+            started = time.perf_counter()
             if params:
                 cursor.execute(query, params)
             else:
                 cursor.execute(query)
+            metrics.observe('diagora_oracle_phase_seconds', time.perf_counter() - started, self.name, 'execute')
+
+            stream = QueryStream(cursor, options['max_rows'], release)
+            return stream
+
+        except Exception:
+            release()
+            raise
 
+    def execute_query(self, query: str, params: dict = None, fetch: dict = None) -> dict:
+        """Execute SQL query and return at most max_rows results"""
+        try:
+            with self.iter_query(query, params, fetch) as stream:
+                data = columnar.collect(stream.columns, stream.batches())
+                result = {
+                    'success': True,
+                    'columns': stream.columns,
+                    'data': data,
+                    'row_count': len(data),
+                    'truncated': stream.truncated
+                }
+                if stream.demo:
+                    result['demo'] = True
+            metrics.inc('diagora_oracle_queries_total', self.name, 'demo' if stream.demo else 'success')
+            return result
+
+        except PoolExhaustedError as e:
+            # Already counted as pool_exhausted
+            return {
+                'success': False,
+                'error': str(e),
+                'columns': [],
+                'data': []
+            }
+        except Exception as e:
+            metrics.inc('diagora_oracle_queries_total', self.name, 'error')
+            return {
+                'success': False,
+                'error': str(e),
+                'columns': [],
+                'data': []
+            }
+
+    def _get_async_pool(self):
+        """python-oracledb asyncio pool (thin mode), None when it cannot be used"""
+        if self._async_pool is not None or self._async_unavailable:
+            return self._async_pool
+
+        with self._pool_lock:
+            if self._async_pool is not None or self._async_unavailable:
+                return self._async_pool
+
+            settings = self.settings or self.env_settings()
+            # Stand-in pools (synthetic backend, benchmarks) only speak the sync interface;
+            # a sync SessionPool opened by warm-up or the health prober does not count
+            if self._stand_in or settings.get('backend') != 'oracle':
+                self._async_unavailable = True
+                return None
+
+            try:
+                import oracledb
+
+                if not all([settings.get('host'), settings.get('service_name'),
+                            settings.get('user'), settings.get('password')]):
+                    self._async_unavailable = True
+                    return None
+
+                self._async_pool = oracledb.create_pool_async(
+                    user=settings['user'],
+                    password=settings['password'],
+                    dsn=f"{settings['host']}:{settings.get('port') or '1521'}/{settings['service_name']}",
+                    min=int(os.getenv('ORACLE_POOL_MIN', 1)),
+                    max=int(os.getenv('ORACLE_ASYNC_POOL_MAX', os.getenv('ORACLE_POOL_MAX', 4))),
+                    increment=int(os.getenv('ORACLE_POOL_INCREMENT', 1)),
+                    getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+                    wait_timeout=int(os.getenv('ORACLE_POOL_WAIT_TIMEOUT_MS', 5000)),
+                    ping_interval=int(os.getenv('ORACLE_POOL_PING_INTERVAL', 60)),
+                    stmtcachesize=int(os.getenv('ORACLE_STMT_CACHE_SIZE', 40))
+                )
+                return self._async_pool
+
+            except ImportError:
+                print("python-oracledb not installed. Async queries run the sync driver in threads.")
+                self._async_unavailable = True
+                return None
+            except Exception as e:
+                print(f"Oracle async pool creation error ({self.name}): {e}")
+                return None
+
+    async def execute_query_async(self, query: str, params: dict = None, fetch: dict = None) -> dict:
+        """execute_query for the asyncio serving mode"""
+        pool = self._get_async_pool()
+        if pool is None:
+            # No asyncio driver: the sync path in a worker thread, still bounded by the pool size
+            return await asyncio.to_thread(self.execute_query, query, params, fetch)
+
+        options = self.fetch_options(fetch)
+        max_rows = options['max_rows']
+
+        started = time.perf_counter()
+        try:
+            connection = await pool.acquire()
+        except Exception as e:
+            return {'success': False, 'error': str(self._acquire_failed(e)), 'columns': [], 'data': []}
+
+        waited = time.perf_counter() - started
+        metrics.observe('diagora_oracle_phase_seconds', waited, self.name, 'acquire')
+        with self._stats_lock:
+            self._acquire_count += 1
+            self._acquire_wait_total += waited
+            self._acquire_wait_max = max(self._acquire_wait_max, waited)
+
+        try:
+            if options['call_timeout_ms']:
+                connection.call_timeout = options['call_timeout_ms']
+
+            cursor = connection.cursor()
+            cursor.arraysize = options['arraysize']
+            cursor.prefetchrows = options['prefetchrows']
+
+            started = time.perf_counter()
+            await cursor.execute(query, params or {})
+            metrics.observe('diagora_oracle_phase_seconds', time.perf_counter() - started, self.name, 'execute')
             columns = [desc[0] for desc in cursor.description] if cursor.description else []
-            data = cursor.fetchall()
 
+            started = time.perf_counter()
+            batches, row_count, truncated = [], 0, False
+            while True:
+                batch = await cursor.fetchmany()
+                if not batch:
+                    break
+                remaining = max_rows - row_count
+                if len(batch) > remaining:
+                    batches.append(batch[:remaining])
+                    row_count = max_rows
+                    truncated = True
+                    break
+                batches.append(batch)
+                row_count += len(batch)
+                if row_count >= max_rows:
+                    truncated = await cursor.fetchone() is not None
+                    break
+            metrics.observe('diagora_oracle_phase_seconds', time.perf_counter() - started, self.name, 'fetch')
             cursor.close()
-            connection.close()
+            data = columnar.collect(columns, batches)
 
+            metrics.inc('diagora_oracle_queries_total', self.name, 'success')
             return {
                 'success': True,
                 'columns': columns,
                 'data': data,
-                'row_count': len(data)
+                'row_count': len(data),
+                'truncated': truncated
             }
 
         except Exception as e:
-            if connection:
-                connection.close()
+            metrics.inc('diagora_oracle_queries_total', self.name, 'error')
             return {
                 'success': False,
                 'error': str(e),
                 'columns': [],
                 'data': []
             }
+        finally:
+            try:
+                if options['call_timeout_ms']:
+                    connection.call_timeout = 0
+            finally:
+                await pool.release(connection)
 
     def _get_demo_data(self, query: str) -> dict:
         """Return demo data when no database connection"""
@@ -147,3 +498,97 @@ class OracleService:
                 'row_count': 1,
                 'demo': True
             }
+
+
+class QueryStream:
+    """Iterator over a query result that never holds more than one fetch batch"""
+
+    def __init__(self, cursor, max_rows: int, on_close=None):
+        self._cursor = cursor
+        self._on_close = on_close
+        self.max_rows = max_rows
+        self.columns = [desc[0] for desc in cursor.description] if cursor and cursor.description else []
+        self.row_count = 0
+        self.truncated = False
+        self.demo = False
+        self.fetch_seconds = 0.0
+        self._closed = False
+        self._close_callbacks = []
+
+    @classmethod
+    def from_result(cls, result: dict, max_rows: int):
+        """Wrap an already materialized result (demo data) in the stream interface"""
+        stream = cls(None, max_rows)
+        stream.columns = result.get('columns', [])
+        stream.demo = result.get('demo', False)
+        stream._rows = result.get('data', [])
+        return stream
+
+    def batches(self):
+        """Yield lists of rows, stopping at max_rows"""
+        try:
+            if self._cursor is None:
+                rows = self._rows[:self.max_rows]
+                self.truncated = len(self._rows) > self.max_rows
+                self.row_count = len(rows)
+                if rows:
+                    yield rows
+                return
+
+            while True:
+                started = time.perf_counter()
+                batch = self._cursor.fetchmany()
+                self.fetch_seconds += time.perf_counter() - started
+                if not batch:
+                    return
+                remaining = self.max_rows - self.row_count
+                if len(batch) > remaining:
+                    batch = batch[:remaining]
+                    self.truncated = True
+                self.row_count += len(batch)
+                if batch:
+                    yield batch
+                if self.truncated:
+                    return
+                if self.row_count >= self.max_rows:
+                    # Probe for one more row to report truncation accurately
+                    started = time.perf_counter()
+                    self.truncated = self._cursor.fetchone() is not None
+                    self.fetch_seconds += time.perf_counter() - started
+                    return
+        finally:
+            self.close()
+
+    def __iter__(self):
+        for batch in self.batches():
+            yield from batch
+
+    def add_close_callback(self, callback):
+        """Also call callback when the stream closes (at once if it already has)"""
+        if self._closed:
+            callback()
+        else:
+            self._close_callbacks.append(callback)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self._cursor is not None:
+                try:
+                    self._cursor.close()
+                except Exception:
+                    pass
+            if self._on_close:
+                self._on_close()
+        finally:
+            for callback in self._close_callbacks:
+                callback()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
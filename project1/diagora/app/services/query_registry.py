@@ -0,0 +1,127 @@
+import itertools
+import re
+
+FILTER_MARKER = '{filters}'
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_BIND = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+# Filter value used for bind-variable filters in a variant key
+BOUND = '*'
+
+
+class QueryRegistryError(ValueError):
+    """Raised at load time when an EBS_QUERIES entry cannot be compiled"""
+
+
+def bind_names(sql: str) -> set:
+    """Bind variables referenced by a statement, ignoring string literals"""
+    return set(_BIND.findall(_STRING_LITERAL.sub("''", sql)))
+
+
+class QueryRegistry:
+    """Every intent x filter variant compiled once into fixed SQL text
+
+    Entity values only ever reach Oracle as bind variables, so each variant is
+    one shared-pool cursor and one client statement-cache entry.
+    """
+
+    def __init__(self, queries: dict):
+        self.variants = {}
+        self.filters = {}
+        for intent, info in queries.items():
+            self._compile_intent(intent, info)
+
+    def _compile_intent(self, intent: str, info: dict):
+        filters = info.get('filters', {})
+        query = info.get('query', '')
+        self.filters[intent] = filters
+
+        if filters and FILTER_MARKER not in query:
+            raise QueryRegistryError(f"{intent}: filters declared but query has no {FILTER_MARKER} marker")
+        if not filters and FILTER_MARKER in query:
+            raise QueryRegistryError(f"{intent}: {FILTER_MARKER} marker without filters")
+
+        options = []
+        for name, spec in filters.items():
+            if 'values' in spec:
+                options.append([(name, None)] + [(name, value) for value in spec['values']])
+            elif 'condition' in spec and 'bind' in spec:
+                options.append([(name, None), (name, BOUND)])
+            else:
+                raise QueryRegistryError(f"{intent}.{name}: filter needs 'values' or 'condition' and 'bind'")
+
+        for combination in itertools.product(*options) if options else [()]:
+            chosen = tuple((name, value) for name, value in combination if value is not None)
+            self.variants[(intent, chosen)] = self._render(intent, info, dict(chosen))
+
+    def _render(self, intent: str, info: dict, chosen: dict) -> dict:
+        filters = info.get('filters', {})
+        conditions, binds = [], {}
+        for name, value in chosen.items():
+            spec = filters[name]
+            if value == BOUND:
+                conditions.append(spec['condition'])
+                binds[name] = spec
+            else:
+                conditions.append(spec['values'][value])
+
+        sql = info.get('query', '').replace(
+            FILTER_MARKER,
+            ''.join(f"AND {condition}\n                " for condition in conditions).rstrip()
+        )
+
+        expected = {spec['bind'] for spec in binds.values()} | set(info.get('params', {}))
+        found = bind_names(sql)
+        if found != expected:
+            raise QueryRegistryError(
+                f"{intent} {sorted(chosen)}: binds in SQL {sorted(found)} do not match declared {sorted(expected)}"
+            )
+        if '{' in sql or '}' in sql:
+            raise QueryRegistryError(f"{intent} {sorted(chosen)}: unrendered placeholder in SQL")
+
+        variant = {key: value for key, value in info.items() if key != 'filters'}
+        variant['query'] = sql
+        variant['binds'] = binds
+        return variant
+
+    def base(self, intent: str) -> dict:
+        """The unfiltered variant of an intent"""
+        return self.variants.get((intent, ()))
+
+    def base_queries(self) -> dict:
+        """{intent: unfiltered variant} for every registered intent"""
+        return {intent: variant for (intent, chosen), variant in self.variants.items() if not chosen}
+
+    def get(self, intent: str, entities: dict = None) -> dict:
+        """Look up the precompiled variant for the entities and assemble its binds"""
+        base = self.base(intent)
+        if base is None:
+            return None
+
+        entities = entities or {}
+        chosen = []
+        for name, spec in self.filters[intent].items():
+            value = entities.get(name)
+            if not value or not isinstance(value, (str, int, float)):
+                continue
+            if 'values' in spec:
+                # Unknown values leave the query unfiltered
+                if str(value).upper() in spec['values']:
+                    chosen.append((name, str(value).upper()))
+            else:
+                chosen.append((name, BOUND))
+
+        variant = self.variants[(intent, tuple(chosen))]
+
+        params = dict(base.get('params', {}))
+        for name, spec in variant['binds'].items():
+            value = str(entities[name])
+            if spec.get('upper'):
+                value = value.upper()
+            if spec.get('pattern'):
+                value = spec['pattern'].format(value)
+            params[spec['bind']] = value
+
+        query_info = dict(variant)
+        query_info['params'] = params
+        return query_info
@@ -0,0 +1,90 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class ReportRunner:
+    """Runs several intents' queries concurrently over a bounded worker pool
+
+    The checks are admitted as the 'report' cost class instead of their own
+    (often heavy) class, so they are not serialized behind the one heavy slot.
+    """
+
+    def __init__(self, run_query, max_workers: int = None, timeout: float = None):
+        self.run_query = run_query
+        self.max_workers = max_workers or int(os.getenv('REPORT_MAX_WORKERS', 4))
+        self.timeout = timeout or float(os.getenv('REPORT_QUERY_TIMEOUT', 30))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='report'
+                )
+            return self._executor
+
+    @staticmethod
+    def _timed_out(timeout: float, elapsed: float) -> dict:
+        return {
+            'success': False,
+            'error': f'Sorgu {timeout:g} saniye içinde tamamlanmadı',
+            'timed_out': True,
+            'columns': [],
+            'data': [],
+            'elapsed_ms': round(elapsed * 1000, 1)
+        }
+
+    def _timed(self, query_info: dict, intent: str, deadline: float):
+        started = time.perf_counter()
+        remaining = deadline - started
+        if remaining <= 0:
+            # Queued behind slower checks until the report gave up: do not start it
+            return None, 0.0
+        # Neither the admission wait nor the Oracle call may outlive the report,
+        # so an abandoned query frees its pool session and admission slot by the deadline
+        query_info = dict(query_info, cost='report')
+        query_info['fetch'] = dict(query_info.get('fetch') or {}, deadline=deadline)
+        query_info['max_wait'] = remaining
+        result = self.run_query(query_info, intent)
+        return result, time.perf_counter() - started
+
+    def run(self, queries: dict, timeout: float = None) -> dict:
+        """Run {intent: query_info} and return {intent: result}
+
+        Every result carries `elapsed_ms`. Queries still running when the
+        timeout expires are reported with `timed_out` instead of holding up
+        the others.
+        """
+        timeout = timeout or self.timeout
+        executor = self._get_executor()
+        started = time.perf_counter()
+        deadline = started + timeout
+
+        futures = {executor.submit(self._timed, query_info, intent, deadline): intent
+                   for intent, query_info in queries.items()}
+
+        done, _ = wait(futures, timeout=timeout)
+
+        results = {}
+        for future, intent in futures.items():
+            if future not in done:
+                future.cancel()
+                results[intent] = self._timed_out(timeout, time.perf_counter() - started)
+                continue
+
+            try:
+                result, elapsed = future.result()
+                if result is None:
+                    results[intent] = self._timed_out(timeout, time.perf_counter() - started)
+                    continue
+                result = dict(result)
+            except Exception as e:
+                result, elapsed = {'success': False, 'error': str(e), 'columns': [], 'data': []}, None
+            result['elapsed_ms'] = round(elapsed * 1000, 1) if elapsed is not None else None
+            results[intent] = result
+
+        return results
@@ -0,0 +1,235 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from app.services.admission import AdmissionController, AdmissionRejected
+from app.services.metrics import metrics
+
+BUSY_ERROR = 'Veritabanı şu anda yoğun, sorgu sıraya alınamadı. Lütfen biraz sonra tekrar deneyin.'
+
+
+class _Flight:
+    """A database round-trip that concurrent callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class ResultCache:
+    """TTL cache with single-flight coalescing in front of OracleService.execute_query
+
+    Queries that reach the database go through the admission controller; a
+    rejected query is answered with the last cached result, however old (up
+    to ADMISSION_STALE_MAX_AGE), when there is one.
+    """
+
+    def __init__(self, oracle_service, max_entries: int = None, admission: AdmissionController = None):
+        self.oracle_service = oracle_service
+        self.admission = admission or AdmissionController(oracle_service.name)
+        self.max_entries = max_entries or int(os.getenv('RESULT_CACHE_MAX_ENTRIES', 256))
+        self.stale_max_age = float(os.getenv('ADMISSION_STALE_MAX_AGE', 3600))
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._async_inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale = 0
+
+    @staticmethod
+    def make_key(query: str, params: dict = None) -> tuple:
+        """Build a cache key from the rendered SQL text and its bind values"""
+        binds = tuple(sorted((name, repr(value)) for name, value in (params or {}).items()))
+        return query, binds
+
+    def execute_query(self, query: str, params: dict = None, ttl: float = 0, fetch: dict = None,
+                      cost: str = None, max_wait: float = None) -> dict:
+        """Serve a fresh cached result or run the query once for all concurrent callers
+
+        max_wait caps the admission wait below the cost class's own limit.
+        """
+        if ttl <= 0:
+            return self._annotate(self._admitted_query(None, query, params, fetch, cost, max_wait), None)
+
+        key = self.make_key(query, params)
+
+        with self._lock:
+            fresh = self._fresh(key, ttl)
+            if fresh is not None:
+                return fresh
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+        self._count_miss(leader)
+
+        if not leader:
+            flight.done.wait()
+            return self._shared(flight.result)
+
+        result = None
+        try:
+            result = self._admitted_query(key, query, params, fetch, cost, max_wait)
+            if result.get('success') and not result.get('stale'):
+                self._store(key, result)
+        finally:
+            flight.result = result or {
+                'success': False,
+                'error': 'Sorgu çalıştırılamadı',
+                'columns': [],
+                'data': []
+            }
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+        return result if result.get('stale') else self._annotate(result, None)
+
+    async def execute_query_async(self, query: str, params: dict = None, ttl: float = 0, fetch: dict = None,
+                                  cost: str = None, max_wait: float = None) -> dict:
+        """execute_query for the asyncio serving mode; followers await the leader's future"""
+        if ttl <= 0:
+            return self._annotate(await self._admitted_query_async(None, query, params, fetch, cost, max_wait), None)
+
+        key = self.make_key(query, params)
+
+        with self._lock:
+            fresh = self._fresh(key, ttl)
+            if fresh is not None:
+                return fresh
+
+            future = self._async_inflight.get(key)
+            leader = future is None
+            if leader:
+                future = asyncio.get_running_loop().create_future()
+                self._async_inflight[key] = future
+        self._count_miss(leader)
+
+        if not leader:
+            return self._shared(await asyncio.shield(future))
+
+        result = None
+        try:
+            result = await self._admitted_query_async(key, query, params, fetch, cost, max_wait)
+            if result.get('success') and not result.get('stale'):
+                self._store(key, result)
+        finally:
+            with self._lock:
+                self._async_inflight.pop(key, None)
+            future.set_result(result or {
+                'success': False,
+                'error': 'Sorgu çalıştırılamadı',
+                'columns': [],
+                'data': []
+            })
+
+        return result if result.get('stale') else self._annotate(result, None)
+
+    def _admitted_query(self, key, query: str, params: dict, fetch: dict, cost: str,
+                        max_wait: float = None) -> dict:
+        try:
+            cost = self.admission.acquire(cost, max_wait)
+        except AdmissionRejected as e:
+            return self._rejected(key, e)
+        try:
+            return self.oracle_service.execute_query(query, params, fetch)
+        finally:
+            self.admission.release(cost)
+
+    async def _admitted_query_async(self, key, query: str, params: dict, fetch: dict, cost: str,
+                                    max_wait: float = None) -> dict:
+        try:
+            cost = await self.admission.acquire_async(cost, max_wait)
+        except AdmissionRejected as e:
+            return self._rejected(key, e)
+        try:
+            return await self.oracle_service.execute_query_async(query, params, fetch)
+        finally:
+            self.admission.release(cost)
+
+    def _rejected(self, key, error: AdmissionRejected) -> dict:
+        """The last cached result marked stale, or a 'database busy' failure"""
+        with self._lock:
+            entry = self._entries.get(key) if key is not None else None
+            if entry is not None and time.time() - entry[0] <= self.stale_max_age:
+                self.stale += 1
+            else:
+                entry = None
+        if entry is not None:
+            metrics.inc('diagora_cache_requests_total', 'result', 'stale')
+            stale = self._annotate(entry[1], time.time() - entry[0])
+            stale['stale'] = True
+            return stale
+        return {
+            'success': False,
+            'error': BUSY_ERROR,
+            'rejected': error.reason,
+            'columns': [],
+            'data': []
+        }
+
+    def _shared(self, result: dict) -> dict:
+        """A leader's result as handed to the callers that waited on it"""
+        if result.get('stale'):
+            return result
+        return self._annotate(result, 0.0 if result.get('success') else None)
+
+    def _fresh(self, key, ttl: float):
+        """Annotated cached result younger than ttl (call with the lock held)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        age = time.time() - stored_at
+        if age > ttl:
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        metrics.inc('diagora_cache_requests_total', 'result', 'hit')
+        return self._annotate(result, age)
+
+    def _count_miss(self, leader: bool):
+        with self._lock:
+            if leader:
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        metrics.inc('diagora_cache_requests_total', 'result', 'miss' if leader else 'coalesced')
+
+    def _store(self, key, result: dict):
+        with self._lock:
+            self._entries[key] = (time.time(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _annotate(self, result: dict, age) -> dict:
+        annotated = dict(result)
+        annotated['cached'] = age is not None
+        annotated['cache_age'] = round(age, 2) if age is not None else None
+        return annotated
+
+    def invalidate(self, query: str = None, params: dict = None):
+        """Drop one cached result, or everything when no query is given"""
+        with self._lock:
+            if query is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self.make_key(query, params), None)
+
+    def get_stats(self) -> dict:
+        """Return cache counters for this worker process"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'stale': self.stale
+            }
@@ -0,0 +1,289 @@
+import heapq
+import json
+import os
+from collections import Counter
+
+from app.services.columnar import ColumnarResult, json_default, np
+
+# Per-intent summaries computed before rows are handed to the LLM.
+#   group_by:  row counts per value of each column
+#   top:       (column, n) rows with the highest values
+#   sum:       column totals
+#   breaches:  threshold levels on a numeric column, highest first
+#   histogram: bucket edges for a numeric column
+INTENT_SUMMARIES = {
+    'concurrent_manager': {
+        'group_by': ['STATUS'],
+        'top': [('RUNNING', 5)],
+        'sum': ['RUNNING', 'MAX_PROCESSES']
+    },
+    'concurrent_requests': {
+        'group_by': ['PROGRAM_NAME', 'REQUESTED_BY', 'STATUS_CODE'],
+        'top': [('RUNNING_MINUTES', 10)]
+    },
+    'workflow': {
+        'top': [('STUCK_COUNT', 10)],
+        'sum': ['ITEM_COUNT', 'ACTIVE_COUNT', 'STUCK_COUNT']
+    },
+    'workflow_stuck': {
+        'group_by': ['ITEM_TYPE'],
+        'top': [('DAYS_STUCK', 10)],
+        'histogram': ('DAYS_STUCK', [7, 14, 30, 90, 365])
+    },
+    'invalid_objects': {
+        'group_by': ['OWNER', 'OBJECT_TYPE']
+    },
+    'tablespace': {
+        'group_by': ['STATUS'],
+        'top': [('USED_PERCENT', 10)],
+        'breaches': ('USED_PERCENT', [('CRITICAL', 90), ('WARNING', 80)])
+    },
+    'tablespace_detail': {
+        'top': [('USED_PCT', 10), ('USED_GB', 5)],
+        'sum': ['TOTAL_GB', 'USED_GB', 'FREE_GB'],
+        'breaches': ('USED_PCT', [('CRITICAL', 90), ('WARNING', 80)])
+    },
+    'alerts': {
+        'group_by': ['APPLICATION_NAME', 'FREQUENCY_TYPE']
+    },
+    'user_sessions': {
+        'group_by': ['RESPONSIBILITY_NAME'],
+        'top': [('SESSION_HOURS', 10)]
+    },
+    'trend': {
+        'group_by': ['SERIES']
+    }
+}
+
+# Upper bound of distinct values reported per group_by column
+MAX_GROUPS = 20
+# Rough characters per token for the JSON payload
+CHARS_PER_TOKEN = 4
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(payload) -> int:
+    """Approximate token count of a payload once serialized to JSON"""
+    return len(json.dumps(payload, ensure_ascii=False, default=json_default)) // CHARS_PER_TOKEN + 1
+
+
+class ResultCompactor:
+    """Summarizes database results so the LLM prompt stays within a token budget"""
+
+    def __init__(self, token_budget: int = None, max_sample_rows: int = None):
+        self.token_budget = token_budget or int(os.getenv('LLM_CONTEXT_TOKEN_BUDGET', 3000))
+        self.max_sample_rows = max_sample_rows or int(os.getenv('RESULT_SAMPLE_ROWS', 50))
+
+    def compact(self, intent: str, db_result: dict, token_budget: int = None) -> dict:
+        """Return a prompt-sized version of db_result
+
+        The returned dict keeps the `columns`/`data` layout (with `data` reduced
+        to a bounded sample) and adds `summary`, `rows_sent` and
+        `rows_summarized`. `row_count` always holds the full result size.
+        token_budget overrides LLM_CONTEXT_TOKEN_BUDGET (a report's share of it).
+        """
+        if not db_result or not db_result.get('success', True) or db_result.get('error'):
+            return db_result
+
+        columns = list(db_result.get('columns', []))
+        summary, sample, total = self.summarize(intent, columns, db_result.get('data', []))
+
+        compacted = {key: value for key, value in db_result.items() if key != 'data'}
+        compacted['row_count'] = total
+        compacted['summary'] = summary
+        compacted['data'] = sample
+        compacted['rows_sent'] = compacted['rows_summarized'] = total
+
+        self._fit_budget(compacted, token_budget)
+        compacted['rows_sent'] = len(compacted['data'])
+        compacted['rows_summarized'] = total - compacted['rows_sent']
+        return compacted
+
+    def summarize(self, intent: str, columns: list, rows):
+        """Single pass over rows: returns (summary, sample_rows, total_rows)
+
+        rows may be any iterable, so a streaming fetch never has to be
+        materialized to be summarized. A ColumnarResult is summarized with
+        whole-column operations instead.
+        """
+        spec = INTENT_SUMMARIES.get(intent, {})
+        index = {name.upper(): i for i, name in enumerate(columns)}
+
+        group_cols = [c for c in spec.get('group_by', []) if c in index]
+        if 'INSTANCE' in index:
+            # Merged multi-instance results
+            group_cols.insert(0, 'INSTANCE')
+        top_specs = [(c, n) for c, n in spec.get('top', []) if c in index]
+        sum_cols = [c for c in spec.get('sum', []) if c in index]
+        breach = spec.get('breaches') if spec.get('breaches', (None,))[0] in index else None
+        histogram = spec.get('histogram') if spec.get('histogram', (None,))[0] in index else None
+
+        if isinstance(rows, ColumnarResult):
+            names = {name.upper(): name for name in rows.columns}
+            return self._summarize_columns(rows, names, group_cols, top_specs, sum_cols, breach, histogram)
+
+        groups = {c: Counter() for c in group_cols}
+        tops = {c: [] for c, _ in top_specs}
+        sums = {c: 0.0 for c in sum_cols}
+        breach_counts = Counter()
+        breach_rows = []
+        buckets = Counter()
+        sample = []
+        total = 0
+
+        for row in rows:
+            if len(sample) < self.max_sample_rows:
+                sample.append(row)
+
+            for c in group_cols:
+                groups[c][row[index[c]]] += 1
+
+            for c, n in top_specs:
+                value = _number(row[index[c]])
+                if value is None:
+                    continue
+                entry = (value, total, row)
+                if len(tops[c]) < n:
+                    heapq.heappush(tops[c], entry)
+                elif value > tops[c][0][0]:
+                    heapq.heapreplace(tops[c], entry)
+
+            for c in sum_cols:
+                value = _number(row[index[c]])
+                if value is not None:
+                    sums[c] += value
+
+            if breach:
+                value = _number(row[index[breach[0]]])
+                if value is not None:
+                    for level, limit in breach[1]:
+                        if value >= limit:
+                            breach_counts[level] += 1
+                            if len(breach_rows) < self.max_sample_rows:
+                                breach_rows.append(row)
+                            break
+
+            if histogram:
+                value = _number(row[index[histogram[0]]])
+                if value is not None:
+                    buckets[self._bucket(value, histogram[1])] += 1
+
+            total += 1
+
+        summary = {'total_rows': total}
+        for c in group_cols:
+            summary[f'count_by_{c.lower()}'] = dict(groups[c].most_common(MAX_GROUPS))
+        for c, _ in top_specs:
+            ranked = sorted(tops[c], key=lambda e: (-e[0], e[1]))
+            summary[f'top_by_{c.lower()}'] = [list(e[2]) for e in ranked]
+        for c in sum_cols:
+            summary[f'sum_{c.lower()}'] = round(sums[c], 2)
+        if breach:
+            summary['threshold_breaches'] = {
+                'column': breach[0],
+                'levels': {level: f'>= {limit}' for level, limit in breach[1]},
+                'counts': dict(breach_counts),
+                'rows': [list(r) for r in breach_rows]
+            }
+        if histogram:
+            labels = self._bucket_labels(histogram[1])
+            summary[f'histogram_{histogram[0].lower()}'] = {
+                label: buckets.get(label, 0) for label in labels
+            }
+
+        return summary, sample, total
+
+    def _summarize_columns(self, rows: ColumnarResult, names: dict, group_cols: list, top_specs: list,
+                           sum_cols: list, breach, histogram):
+        """summarize() over a ColumnarResult, producing the same summary"""
+        total = len(rows)
+        summary = {'total_rows': total}
+        for c in group_cols:
+            summary[f'count_by_{c.lower()}'] = dict(rows.count_by(names[c]).most_common(MAX_GROUPS))
+        for c, n in top_specs:
+            summary[f'top_by_{c.lower()}'] = [list(row) for row in rows.take(rows.top(names[c], n))]
+        for c in sum_cols:
+            summary[f'sum_{c.lower()}'] = round(rows.sum(names[c]), 2)
+
+        if breach:
+            values, remaining = rows.numbers(names[breach[0]])
+            breached = np.zeros(total, dtype=bool)
+            first_seen = {}
+            for level, limit in breach[1]:
+                hits = remaining & (values >= limit)
+                if hits.any():
+                    first_seen[level] = (int(np.argmax(hits)), int(hits.sum()))
+                breached |= hits
+                remaining = remaining & ~hits
+            summary['threshold_breaches'] = {
+                'column': breach[0],
+                'levels': {level: f'>= {limit}' for level, limit in breach[1]},
+                # Levels in order of their first breaching row, as the row-by-row pass reports them
+                'counts': {level: count for level, (_, count) in sorted(first_seen.items(), key=lambda e: e[1][0])},
+                'rows': [list(row) for row in rows.take(np.flatnonzero(breached)[:self.max_sample_rows])]
+            }
+
+        if histogram:
+            values, valid = rows.numbers(names[histogram[0]])
+            labels = self._bucket_labels(histogram[1])
+            counts = np.bincount(np.searchsorted(histogram[1], values[valid], side='right'), minlength=len(labels))
+            summary[f'histogram_{histogram[0].lower()}'] = {
+                label: int(count) for label, count in zip(labels, counts)
+            }
+
+        return summary, rows[:self.max_sample_rows].to_rows(), total
+
+    @staticmethod
+    def _bucket_labels(edges: list) -> list:
+        labels = [f'<{edges[0]}']
+        labels += [f'{low}-{high}' for low, high in zip(edges, edges[1:])]
+        labels.append(f'{edges[-1]}+')
+        return labels
+
+    @classmethod
+    def _bucket(cls, value: float, edges: list) -> str:
+        labels = cls._bucket_labels(edges)
+        for i, edge in enumerate(edges):
+            if value < edge:
+                return labels[i]
+        return labels[-1]
+
+    def _fit_budget(self, compacted: dict, token_budget: int = None):
+        fit_budget(compacted, token_budget or self.token_budget)
+
+
+def fit_budget(compacted: dict, token_budget: int, count_tokens=estimate_tokens) -> dict:
+    """Shrink the verbatim sample, then the summary lists, until the payload fits
+
+    count_tokens maps the payload to a token count; LLMService passes its
+    tokenizer when a finished prompt turns out too large.
+    """
+    if count_tokens(compacted) <= token_budget:
+        return compacted
+
+    sample = compacted['data']
+    low, high = 0, len(sample)
+    while low < high:
+        mid = (low + high + 1) // 2
+        compacted['data'] = sample[:mid]
+        if count_tokens(compacted) <= token_budget:
+            low = mid
+        else:
+            high = mid - 1
+    compacted['data'] = sample[:low]
+
+    if low == 0:
+        # Even the summary alone is too large: trim its row lists
+        summary = compacted['summary']
+        for key, value in summary.items():
+            if isinstance(value, list):
+                summary[key] = value[:3]
+            elif isinstance(value, dict) and isinstance(value.get('rows'), list):
+                value['rows'] = value['rows'][:3]
+    return compacted
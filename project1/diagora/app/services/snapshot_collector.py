@@ -0,0 +1,280 @@
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no election, every process collects
+    fcntl = None
+
+from app.services.admission import AdmissionRejected
+from app.services.result_cache import ResultCache
+
+
+class SnapshotStore:
+    """Latest collected result per query, shared by every worker on the host
+
+    The collecting worker writes each result to a small SQLite file
+    (SNAPSHOT_STORE_PATH); any worker can then answer from it. Results are
+    pickled so column arrays and dates come back unchanged, and each process
+    keeps the last one it decoded per query until a newer one is written.
+    ':memory:' keeps snapshots inside the process.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS snapshots (
+        key TEXT PRIMARY KEY,
+        collected_at REAL NOT NULL,
+        result BLOB NOT NULL
+    )
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv('SNAPSHOT_STORE_PATH') or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'snapshots.db'
+        )
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self, create: bool = False):
+        """Connection of this process, None when no snapshot was written yet (call with the lock held)"""
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+        if self.path != ':memory:':
+            if create:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            elif not os.path.exists(self.path):
+                return None
+        # A connection inherited over fork must not be used
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(self.SCHEMA)
+        self._pid = os.getpid()
+        return self._connection
+
+    @staticmethod
+    def _key(query: str, params: dict) -> str:
+        return repr(ResultCache.make_key(query, params))
+
+    def put(self, query: str, params: dict, result: dict):
+        key, collected_at = self._key(query, params), time.time()
+        with self._lock:
+            self._snapshots[key] = (collected_at, result)
+            try:
+                conn = self._connect(create=True)
+                with conn:
+                    conn.execute('INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)',
+                                 (key, collected_at, pickle.dumps(result, pickle.HIGHEST_PROTOCOL)))
+            except (OSError, sqlite3.Error, pickle.PicklingError) as e:
+                print(f"Snapshot store write error: {e}")
+
+    def _latest(self, key: str):
+        """(collected_at, result) of the newest snapshot of any worker (call with the lock held)"""
+        local = self._snapshots.get(key)
+        try:
+            conn = self._connect()
+            row = conn.execute('SELECT collected_at FROM snapshots WHERE key = ?', (key,)).fetchone() \
+                if conn is not None else None
+            if row is None or (local is not None and local[0] >= row[0]):
+                return local
+            blob = conn.execute('SELECT collected_at, result FROM snapshots WHERE key = ?', (key,)).fetchone()
+            local = (blob[0], pickle.loads(blob[1]))
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError) as e:
+            print(f"Snapshot store read error: {e}")
+            return local
+        self._snapshots[key] = local
+        return local
+
+    def get(self, query: str, params: dict = None, max_age: float = 0):
+        """Return the snapshot annotated with its age, or None if missing or too old"""
+        key = self._key(query, params)
+        with self._lock:
+            entry = self._latest(key) if max_age > 0 else None
+            if entry is None or time.time() - entry[0] > max_age:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        collected_at, result = entry
+        snapshot = dict(result)
+        snapshot['snapshot'] = True
+        snapshot['cached'] = True
+        snapshot['cache_age'] = round(time.time() - collected_at, 2)
+        return snapshot
+
+    def get_stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                count, oldest = conn.execute('SELECT COUNT(*), MIN(collected_at) FROM snapshots').fetchone() \
+                    if conn is not None else (0, None)
+            except sqlite3.Error:
+                count, oldest = len(self._snapshots), min((e[0] for e in self._snapshots.values()), default=None)
+            return {
+                'snapshots': count,
+                'hits': self.hits,
+                'misses': self.misses,
+                'oldest_age': round(now - (oldest or now), 2),
+                'path': self.path
+            }
+
+
+class SnapshotCollector:
+    """Background thread that runs each EBS query on its own jittered schedule
+
+    Under gunicorn every worker builds a collector, but only the process holding
+    an exclusive lock on SNAPSHOT_COLLECTOR_LOCK collects (one Oracle load and one
+    writer to the history store) and publishes to the shared SnapshotStore that
+    every worker answers from. The other workers' collector threads call elect()
+    again every SNAPSHOT_ELECTION_RETRY seconds and take over when the collecting
+    worker exits.
+    """
+
+    def __init__(self, oracle_service, store: SnapshotStore, queries: dict, admission=None, jitter: float = None,
+                 lock_path: str = None):
+        self.oracle_service = oracle_service
+        self.admission = admission
+        self.store = store
+        self.jitter = jitter if jitter is not None else float(os.getenv('SNAPSHOT_JITTER', 0.2))
+        self.schedule = {
+            intent: info for intent, info in queries.items()
+            if info.get('refresh_interval', 0) > 0
+        }
+        self.lock_path = lock_path or os.getenv('SNAPSHOT_COLLECTOR_LOCK') or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'snapshot_collector.lock'
+        )
+        self.election_retry = float(os.getenv('SNAPSHOT_ELECTION_RETRY', 30))
+        self.leader = False
+        self._lock_file = None
+        self._elect_lock = threading.Lock()
+        self.listeners = []
+        self.runs = 0
+        self.errors = 0
+        self.last_duration = {}
+        self._next_run = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_listener(self, callback):
+        """Call callback(intent, result, collected_at) after every successful collection"""
+        self.listeners.append(callback)
+
+    def start(self):
+        if self._thread is not None or not self.schedule:
+            return
+        self._thread = threading.Thread(target=self._run, name='snapshot-collector', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def elect(self) -> bool:
+        """Try to become this host's collecting process (non-blocking)"""
+        with self._elect_lock:
+            if not self.leader:
+                self.leader = fcntl is None or self._lock()
+            return self.leader
+
+    def _lock(self) -> bool:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+            lock_file = open(self.lock_path, 'a')
+        except OSError as e:
+            print(f"Snapshot collector lock error: {e}")
+            return False
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # Held until the process exits
+        self._lock_file = lock_file
+        print(f"Snapshot collector elected (pid {os.getpid()})")
+        return True
+
+    def _run(self):
+        # Not elected: keep retrying until the collecting worker goes away
+        while not self.elect():
+            if self._stop.wait(self.election_retry):
+                return
+        now = time.time()
+        # Spread first runs over each interval so heavy queries don't align
+        for intent, info in self.schedule.items():
+            self._next_run[intent] = now + random.uniform(0, info['refresh_interval'] * self.jitter)
+        while not self._stop.is_set():
+            intent = min(self._next_run, key=self._next_run.get)
+            delay = self._next_run[intent] - time.time()
+            if delay > 0 and self._stop.wait(delay):
+                return
+            self.collect(intent)
+            interval = self.schedule[intent]['refresh_interval']
+            self._next_run[intent] = time.time() + interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def prime(self) -> bool:
+        """Collect every scheduled query once now, in the elected worker only
+
+        The other workers read its snapshots from the shared store, so the
+        database sees one collection at boot, not one per worker.
+        """
+        if not self.elect():
+            return False
+        for intent in self.schedule:
+            self.collect(intent)
+        return True
+
+    def collect(self, intent: str):
+        """Run one query now and publish its result"""
+        info = self.schedule[intent]
+        params = info.get('params', {})
+        started = time.time()
+        try:
+            result = self._execute(info, params)
+        except AdmissionRejected as e:
+            # Busy with user queries; the next scheduled run tries again
+            print(f"Snapshot collection skipped ({intent}): {e}")
+            return
+        self.last_duration[intent] = round(time.time() - started, 3)
+        self.runs += 1
+
+        if not result.get('success'):
+            self.errors += 1
+            print(f"Snapshot collection error ({intent}): {result.get('error')}")
+            return
+
+        self.store.put(info['query'], params, result)
+        for listener in self.listeners:
+            try:
+                listener(intent, result, started)
+            except Exception as e:
+                print(f"Snapshot listener error ({intent}): {e}")
+
+    def _execute(self, info: dict, params: dict) -> dict:
+        if self.admission is None:
+            return self.oracle_service.execute_query(info['query'], params, info.get('fetch'))
+        with self.admission.slot(info.get('cost')):
+            return self.oracle_service.execute_query(info['query'], params, info.get('fetch'))
+
+    def max_age(self, intent: str) -> float:
+        """How old a snapshot may be and still answer a question"""
+        info = self.schedule.get(intent)
+        if not info:
+            return 0
+        return info['refresh_interval'] * float(os.getenv('SNAPSHOT_STALENESS_FACTOR', 2))
+
+    def get_stats(self) -> dict:
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'leader': self.leader,
+            'scheduled': {intent: info['refresh_interval'] for intent, info in self.schedule.items()},
+            'runs': self.runs,
+            'errors': self.errors,
+            'last_duration': dict(self.last_duration)
+        }
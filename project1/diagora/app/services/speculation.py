@@ -0,0 +1,75 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SpeculativeExecutor:
+    """Runs a guessed database query while the LLM intent call is in flight"""
+
+    def __init__(self, enabled: bool = None, max_workers: int = None):
+        if enabled is None:
+            enabled = os.getenv('SPECULATIVE_EXECUTION', 'False').lower() == 'true'
+        self.enabled = enabled
+        self.max_workers = max_workers or int(os.getenv('SPECULATION_MAX_WORKERS', 4))
+        self._executor = None
+        self._lock = threading.Lock()
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.cancelled = 0
+
+    def submit(self, fn, *args):
+        """Start fn(*args) in the background and return its future"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='speculation'
+                )
+            self.started += 1
+        return self._executor.submit(fn, *args)
+
+    def resolve(self, future, matched: bool):
+        """Return the speculative result if the guess was right, otherwise discard it"""
+        if matched:
+            result = future.result()
+            with self._lock:
+                self.hits += 1
+            return result
+
+        # Not started yet: drop it. Already running: let it finish and ignore
+        # the result (it still warms the result cache for the guessed query).
+        cancelled = future.cancel()
+        with self._lock:
+            self.misses += 1
+            if cancelled:
+                self.cancelled += 1
+        return None
+
+    def start_task(self, coro):
+        """Start a coroutine as an asyncio task (async serving mode)"""
+        with self._lock:
+            self.started += 1
+        return asyncio.ensure_future(coro)
+
+    async def resolve_async(self, task, matched: bool):
+        """resolve() for tasks; a wrong guess keeps running to warm the result cache"""
+        with self._lock:
+            if matched:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return await task if matched else None
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            resolved = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'started': self.started,
+                'hits': self.hits,
+                'misses': self.misses,
+                'cancelled': self.cancelled,
+                'hit_rate': round(self.hits / resolved, 3) if resolved else None
+            }
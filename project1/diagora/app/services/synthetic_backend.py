@@ -0,0 +1,424 @@
+"""Synthetic EBS database: the EBS_QUERIES SQL run against a generated SQLite copy
+
+Select it with ORACLE_BACKEND=synthetic (or ORACLE_<INSTANCE>_BACKEND). The
+SyntheticPool has the cx_Oracle SessionPool interface, so fetch batching,
+call timeouts, caching and compaction all run their real code paths.
+
+Volume is set by SYNTHETIC_SCALE (1 = a small EBS: ~10k requests, ~20k
+workflow items, ~50k objects; 0.01 gives hundreds of rows, 100 gives
+millions) and SYNTHETIC_ROWS, a JSON object overriding single tables
+(e.g. {"WF_ITEMS": 2000000}). The database file is reused while its scale,
+row overrides and seed are unchanged.
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from app.services.oracle_dialect import register_functions, to_julian, from_julian, translate
+
+SCHEMA_VERSION = 1
+
+# Rows at SYNTHETIC_SCALE=1 for the tables that grow with the scale
+BASE_ROWS = {
+    'FND_USER': 500,
+    'FND_CONCURRENT_PROGRAMS_VL': 800,
+    'FND_CONCURRENT_REQUESTS': 10000,
+    'WF_ITEMS': 20000,
+    'DBA_OBJECTS': 50000,
+    'FND_LOGINS': 1000,
+    'ALR_ALERTS_V': 300,
+    'FND_PROFILE_OPTIONS': 2000
+}
+
+SCHEMA = """
+CREATE TABLE FND_APPLICATION (APPLICATION_ID INTEGER PRIMARY KEY, APPLICATION_SHORT_NAME TEXT);
+CREATE TABLE FND_CONCURRENT_QUEUES (
+    CONCURRENT_QUEUE_ID INTEGER PRIMARY KEY, CONCURRENT_QUEUE_NAME TEXT, APPLICATION_ID INTEGER,
+    RUNNING_PROCESSES INTEGER, MAX_PROCESSES INTEGER, ENABLED_FLAG TEXT, CONTROL_CODE TEXT,
+    LAST_UPDATE_DATE REAL
+);
+CREATE TABLE FND_USER (USER_ID INTEGER PRIMARY KEY, USER_NAME TEXT);
+CREATE TABLE FND_CONCURRENT_PROGRAMS_VL (
+    CONCURRENT_PROGRAM_ID INTEGER, APPLICATION_ID INTEGER, USER_CONCURRENT_PROGRAM_NAME TEXT,
+    PRIMARY KEY (CONCURRENT_PROGRAM_ID, APPLICATION_ID)
+);
+CREATE TABLE FND_CONCURRENT_REQUESTS (
+    REQUEST_ID INTEGER PRIMARY KEY, CONCURRENT_PROGRAM_ID INTEGER, PROGRAM_APPLICATION_ID INTEGER,
+    PHASE_CODE TEXT, STATUS_CODE TEXT, REQUESTED_BY INTEGER, REQUEST_DATE REAL, ACTUAL_START_DATE REAL
+);
+CREATE TABLE WF_ITEM_TYPES_TL (NAME TEXT, LANGUAGE TEXT, DISPLAY_NAME TEXT, PRIMARY KEY (NAME, LANGUAGE));
+CREATE TABLE WF_ITEMS (
+    ITEM_TYPE TEXT, ITEM_KEY TEXT, USER_KEY TEXT, BEGIN_DATE REAL, END_DATE REAL, ROOT_ACTIVITY TEXT
+);
+CREATE TABLE DBA_OBJECTS (
+    OWNER TEXT, OBJECT_NAME TEXT, OBJECT_TYPE TEXT, STATUS TEXT, CREATED REAL, LAST_DDL_TIME REAL
+);
+CREATE TABLE DBA_TABLESPACE_USAGE_METRICS (
+    TABLESPACE_NAME TEXT, USED_SPACE REAL, TABLESPACE_SIZE REAL, USED_PERCENT REAL
+);
+CREATE TABLE DBA_DATA_FILES (TABLESPACE_NAME TEXT, FILE_ID INTEGER, BYTES REAL);
+CREATE TABLE DBA_FREE_SPACE (TABLESPACE_NAME TEXT, FILE_ID INTEGER, BYTES REAL);
+CREATE TABLE ALR_ALERTS_V (
+    ALERT_NAME TEXT, APPLICATION_NAME TEXT, ENABLED_FLAG TEXT, FREQUENCY_TYPE TEXT,
+    START_DATE_ACTIVE REAL, END_DATE_ACTIVE REAL
+);
+CREATE TABLE FND_PROFILE_OPTIONS (PROFILE_OPTION_ID INTEGER PRIMARY KEY, PROFILE_OPTION_NAME TEXT);
+CREATE TABLE FND_PROFILE_OPTIONS_TL (PROFILE_OPTION_ID INTEGER, LANGUAGE TEXT, USER_PROFILE_OPTION_NAME TEXT);
+CREATE TABLE FND_PROFILE_OPTION_VALUES (PROFILE_OPTION_NAME TEXT, PROFILE_OPTION_VALUE TEXT, LEVEL_ID INTEGER);
+CREATE TABLE FND_RESPONSIBILITY_TL (RESPONSIBILITY_ID INTEGER PRIMARY KEY, RESPONSIBILITY_NAME TEXT);
+CREATE TABLE FND_LOGINS (LOGIN_ID INTEGER PRIMARY KEY, USER_ID INTEGER, END_TIME REAL);
+CREATE TABLE FND_LOGIN_RESP_FORMS (LOGIN_ID INTEGER, RESPONSIBILITY_ID INTEGER, START_TIME REAL, END_TIME REAL);
+CREATE TABLE SYNTHETIC_META (KEY TEXT PRIMARY KEY, VALUE TEXT);
+"""
+
+INDEXES = """
+CREATE INDEX fcr_phase ON FND_CONCURRENT_REQUESTS (PHASE_CODE, ACTUAL_START_DATE);
+CREATE INDEX wi_open ON WF_ITEMS (END_DATE, BEGIN_DATE);
+CREATE INDEX wi_type ON WF_ITEMS (ITEM_TYPE);
+CREATE INDEX obj_status ON DBA_OBJECTS (STATUS, OWNER, OBJECT_TYPE, OBJECT_NAME);
+CREATE INDEX fls_open ON FND_LOGIN_RESP_FORMS (END_TIME, START_TIME);
+"""
+
+# Output columns that are DATE values in Oracle (converted back from Julian days)
+DATE_COLUMNS = {'OLDEST_ITEM', 'START_TIME', 'LAST_UPDATE_DATE'}
+
+APPLICATIONS = [(0, 'FND'), (101, 'SQLGL'), (200, 'SQLAP'), (201, 'PO'), (222, 'AR'),
+                (401, 'INV'), (660, 'ONT'), (800, 'PER')]
+
+QUEUES = ['STANDARD', 'FNDICM', 'FNDCRM', 'FNDSCH', 'FNDCPOPP', 'WFMLRSVC', 'WFALSNRSVC', 'INVMGR',
+          'PODAMGR', 'RCVOLTM', 'INVTMRPM', 'FNDSM', 'OAMGCS', 'AMSDMIN', 'C_AQCT_SVC', 'IEU_WL_CS']
+
+PROGRAM_NAMES = ['Journal Import', 'Create Accounting', 'Payables Open Interface Import',
+                 'Autoinvoice Import Program', 'Gather Schema Statistics', 'Purge Concurrent Request',
+                 'Workflow Background Process', 'Order Import', 'Receiving Transaction Processor',
+                 'Cost Manager', 'Purchasing Documents Open Interface', 'Payment Process Request',
+                 'General Ledger Transfer Program', 'Submit Single Request', 'XX Custom Interface']
+
+ITEM_TYPES = [('POAPPRV', 'PO Approval'), ('REQAPPRV', 'PO Requisition Approval'),
+              ('OEOH', 'OM Order Header'), ('OEOL', 'OM Order Line'), ('WFERROR', 'System: Error'),
+              ('APINVAPR', 'AP Invoice Approval'), ('HRSSA', 'HR Self Service'),
+              ('GLBATCH', 'GL Journal Approval'), ('CREATEPO', 'PO Create Documents'),
+              ('ARAMECM', 'AR Credit Memo Approval'), ('WFMAIL', 'Notification Mailer'),
+              ('XXAPPR', 'XX Custom Approval')]
+
+SCHEMAS = ['APPS', 'AR', 'AP', 'GL', 'INV', 'ONT', 'PO', 'HR', 'SYS', 'SYSTEM', 'APPLSYS', 'XXCUST']
+OBJECT_TYPES = ['PACKAGE', 'PACKAGE BODY', 'VIEW', 'SYNONYM', 'TRIGGER', 'TABLE', 'INDEX',
+                'PROCEDURE', 'FUNCTION', 'MATERIALIZED VIEW']
+
+TABLESPACES = ['APPS_TS_TX_DATA', 'APPS_TS_TX_IDX', 'APPS_TS_SEED', 'APPS_TS_INTERFACE',
+               'APPS_TS_SUMMARY', 'APPS_TS_NOLOGGING', 'APPS_TS_QUEUES', 'APPS_TS_MEDIA',
+               'APPS_TS_ARCHIVE', 'APPS_UNDOTS1', 'SYSTEM', 'SYSAUX', 'TEMP1', 'USERS', 'XXCUST_DATA']
+
+RESPONSIBILITIES = ['System Administrator', 'Application Developer', 'General Ledger Super User',
+                    'Payables Manager', 'Receivables Manager', 'Purchasing Super User',
+                    'Order Management Super User', 'Inventory', 'Human Resources', 'XX Custom Reports']
+
+
+def _rows_for(table: str, scale: float, overrides: dict) -> int:
+    if table in overrides:
+        return int(overrides[table])
+    return max(int(BASE_ROWS[table] * scale), 1)
+
+
+def _seed(connection, scale: float, overrides: dict, seed: int):
+    """Fill every table with generated rows"""
+    rng = random.Random(seed)
+    now = to_julian(datetime.now())
+    hour = 1 / 24
+    count = lambda table: _rows_for(table, scale, overrides)
+
+    def insert(table, rows):
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return
+        placeholders = ', '.join('?' * len(first))
+        connection.execute(f'INSERT INTO {table} VALUES ({placeholders})', first)
+        connection.executemany(f'INSERT INTO {table} VALUES ({placeholders})', rows)
+
+    insert('FND_APPLICATION', APPLICATIONS)
+
+    queues = QUEUES + [f'XX_CUSTOM_MGR_{i}' for i in range(1, max(int(10 * scale ** 0.5), 1))]
+    insert('FND_CONCURRENT_QUEUES', (
+        (i, name, rng.choice(APPLICATIONS)[0],
+         running, max(running, rng.choice([1, 2, 4, 8, 10, 20])),
+         'Y' if rng.random() < 0.9 else 'N', rng.choice([None] * 8 + ['D', 'E']), now - rng.random() * 30)
+        for i, name in enumerate(queues, 1)
+        for running in [rng.randint(0, 10)]
+    ))
+
+    users = count('FND_USER')
+    insert('FND_USER', ((i, 'SYSADMIN' if i == 0 else f'USER{i:06d}') for i in range(users)))
+
+    programs = count('FND_CONCURRENT_PROGRAMS_VL')
+    insert('FND_CONCURRENT_PROGRAMS_VL', (
+        (i, APPLICATIONS[i % len(APPLICATIONS)][0], f'{PROGRAM_NAMES[i % len(PROGRAM_NAMES)]} {i // len(PROGRAM_NAMES) or ""}'.strip())
+        for i in range(programs)
+    ))
+
+    def request(i):
+        program = rng.randrange(programs)
+        requested = now - rng.random() ** 2 * 30
+        phase = rng.choices(['C', 'R', 'P'], [95, 1, 4])[0]
+        if phase == 'R':
+            # Mostly short runs with a long tail
+            started = now - rng.expovariate(1 / 20) / 1440
+            status = 'R'
+        elif phase == 'P':
+            started, status = None, rng.choice(['Q', 'I'])
+        else:
+            started = requested + rng.random() * hour
+            status = rng.choices(['C', 'E', 'G'], [92, 5, 3])[0]
+        return (i, program, APPLICATIONS[program % len(APPLICATIONS)][0], phase, status,
+                rng.randrange(users), requested, started)
+
+    insert('FND_CONCURRENT_REQUESTS', (request(i) for i in range(1000000, 1000000 + count('FND_CONCURRENT_REQUESTS'))))
+
+    insert('WF_ITEM_TYPES_TL', ((name, language, display) for name, display in ITEM_TYPES for language in ('US', 'TR')))
+
+    def wf_item(i):
+        item_type = ITEM_TYPES[int(rng.random() ** 2 * len(ITEM_TYPES))][0]
+        begin = now - rng.random() ** 3 * 365
+        end = None if rng.random() < 0.12 else begin + rng.random() * 3
+        return (item_type, str(i), f'{item_type}-{i}', begin, end, f'{item_type}_TOP')
+
+    insert('WF_ITEMS', (wf_item(i) for i in range(count('WF_ITEMS'))))
+
+    def dba_object(i):
+        owner = SCHEMAS[int(rng.random() ** 1.5 * len(SCHEMAS))]
+        created = now - 400 - rng.random() * 3000
+        return (owner, f'{rng.choice(["XX", "FND", "AP", "AR", "GL", "PO"])}_OBJ_{i:07d}', rng.choice(OBJECT_TYPES),
+                'INVALID' if rng.random() < 0.005 else 'VALID', created, created + rng.random() * 400)
+
+    insert('DBA_OBJECTS', (dba_object(i) for i in range(count('DBA_OBJECTS'))))
+
+    block = 8192
+    tablespaces = TABLESPACES + [f'XX_DATA_{i:02d}' for i in range(1, max(int(10 * scale ** 0.5), 1))]
+    file_id = 0
+    for name in tablespaces:
+        files = []
+        for _ in range(rng.randint(1, 8)):
+            file_id += 1
+            files.append((name, file_id, float(rng.choice([2, 4, 8, 16, 30, 32]) * 2 ** 30)))
+        insert('DBA_DATA_FILES', files)
+        free = [(name, fid, size * rng.random() * 0.6) for _, fid, size in files if rng.random() < 0.85]
+        insert('DBA_FREE_SPACE', free)
+        total = sum(size for _, _, size in files)
+        used = total - sum(size for _, _, size in free)
+        insert('DBA_TABLESPACE_USAGE_METRICS', [(name, used / block, total / block, used / total * 100)])
+
+    insert('ALR_ALERTS_V', (
+        (f'XX Alert {i}', rng.choice(APPLICATIONS)[1], 'Y' if rng.random() < 0.7 else 'N',
+         rng.choice(['ON DEMAND', 'DAILY', 'EVERY N DAYS', 'WEEKLY']), now - rng.random() * 1000,
+         None if rng.random() < 0.8 else now + rng.uniform(-200, 200))
+        for i in range(count('ALR_ALERTS_V'))
+    ))
+
+    options = count('FND_PROFILE_OPTIONS')
+    insert('FND_PROFILE_OPTIONS', ((i, f'XX_PROFILE_OPTION_{i}') for i in range(options)))
+    insert('FND_PROFILE_OPTIONS_TL', ((i, 'US', f'XX: Profile Option {i}') for i in range(options)))
+    insert('FND_PROFILE_OPTION_VALUES', (
+        (f'XX_PROFILE_OPTION_{i}', rng.choice(['Y', 'N', '10', 'AMERICAN']), rng.choice([10001, 10002, 10003, 10004]))
+        for i in range(options)
+    ))
+
+    insert('FND_RESPONSIBILITY_TL', enumerate(RESPONSIBILITIES, 1))
+
+    def login(i):
+        active = rng.random() < 0.3
+        start = now - (rng.expovariate(1 / 3) if active else rng.random() * 240) * hour
+        return (i, rng.randrange(users), None if active else start + rng.random() * hour), \
+            (i, rng.randint(1, len(RESPONSIBILITIES)), start, None if active else start + rng.random() * hour)
+
+    logins = [login(i) for i in range(count('FND_LOGINS'))]
+    insert('FND_LOGINS', (row for row, _ in logins))
+    insert('FND_LOGIN_RESP_FORMS', (row for _, row in logins))
+
+    connection.executescript(INDEXES)
+
+
+class SyntheticDatabase:
+    """Builds (or reuses) the seeded SQLite file shared by all sessions"""
+
+    def __init__(self, path: str = None, scale: float = None, overrides: dict = None, seed: int = None):
+        self.path = path or os.getenv('SYNTHETIC_DB_PATH') or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'synthetic.db'
+        )
+        self.scale = scale if scale is not None else float(os.getenv('SYNTHETIC_SCALE', 1))
+        self.overrides = overrides if overrides is not None else json.loads(os.getenv('SYNTHETIC_ROWS') or '{}')
+        self.seed = seed if seed is not None else int(os.getenv('SYNTHETIC_SEED', 42))
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _signature(self) -> str:
+        return json.dumps({'version': SCHEMA_VERSION, 'scale': self.scale,
+                           'rows': self.overrides, 'seed': self.seed}, sort_keys=True)
+
+    def _is_current(self) -> bool:
+        try:
+            connection = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+            try:
+                row = connection.execute("SELECT VALUE FROM SYNTHETIC_META WHERE KEY = 'signature'").fetchone()
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            return False
+        return row is not None and row[0] == self._signature()
+
+    def ensure(self):
+        """Seed the database file unless an identical one already exists"""
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready or self._is_current():
+                self._ready = True
+                return
+
+            started = time.perf_counter()
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # Build under a private name so concurrent workers never read a half-seeded file
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            connection = sqlite3.connect(tmp_path)
+            try:
+                connection.execute('PRAGMA journal_mode=OFF')
+                connection.execute('PRAGMA synchronous=OFF')
+                connection.executescript(SCHEMA)
+                with connection:
+                    _seed(connection, self.scale, self.overrides, self.seed)
+                    connection.execute("INSERT INTO SYNTHETIC_META VALUES ('signature', ?)", (self._signature(),))
+                connection.execute('ANALYZE')
+            finally:
+                connection.close()
+            os.replace(tmp_path, self.path)
+            print(f"Synthetic EBS database seeded in {time.perf_counter() - started:.1f}s: {self.path}")
+            self._ready = True
+
+    def connect(self):
+        self.ensure()
+        connection = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, check_same_thread=False)
+        register_functions(connection)
+        return connection
+
+
+class SyntheticCursor:
+    """cx_Oracle cursor look-alike over a sqlite3 cursor"""
+
+    def __init__(self, session):
+        self._session = session
+        self._cursor = session.connection.cursor()
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self.description = None
+        self._date_indexes = []
+
+    def execute(self, query: str, params: dict = None):
+        self._session.start_call()
+        try:
+            self._cursor.execute(translate(query), params or {})
+        except sqlite3.OperationalError as e:
+            raise self._session.translate_error(e)
+        self.description = [(desc[0].upper(),) + tuple(desc[1:]) for desc in self._cursor.description or []]
+        self._date_indexes = [i for i, desc in enumerate(self.description) if desc[0] in DATE_COLUMNS]
+
+    def _convert(self, rows: list) -> list:
+        if not self._date_indexes:
+            return rows
+        converted = []
+        for row in rows:
+            row = list(row)
+            for i in self._date_indexes:
+                if isinstance(row[i], float):
+                    row[i] = from_julian(row[i]).replace(microsecond=0)
+            converted.append(tuple(row))
+        return converted
+
+    def fetchmany(self, size: int = None):
+        self._session.start_call()
+        try:
+            return self._convert(self._cursor.fetchmany(size or self.arraysize))
+        except sqlite3.OperationalError as e:
+            raise self._session.translate_error(e)
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def fetchall(self):
+        return self._convert(self._cursor.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+
+class SyntheticSession:
+    """One pooled SQLite connection; callTimeout interrupts long statements like Oracle's"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.callTimeout = 0
+        self._deadline = None
+        connection.set_progress_handler(self._check_deadline, 10000)
+
+    def _check_deadline(self):
+        return 1 if self._deadline is not None and time.perf_counter() > self._deadline else 0
+
+    def start_call(self):
+        self._deadline = time.perf_counter() + self.callTimeout / 1000 if self.callTimeout else None
+
+    def translate_error(self, error):
+        if 'interrupted' in str(error):
+            return TimeoutError(f'DPI-1067: call timeout of {self.callTimeout} ms exceeded')
+        return error
+
+    def cursor(self):
+        return SyntheticCursor(self)
+
+    def ping(self):
+        self.connection.execute('SELECT 1').fetchone()
+
+
+class SyntheticPool:
+    """cx_Oracle.SessionPool look-alike handing out SQLite sessions"""
+
+    def __init__(self, database: SyntheticDatabase, max_sessions: int = None, wait_timeout_ms: int = None):
+        self.database = database
+        self.min = 1
+        self.max = max_sessions or int(os.getenv('ORACLE_POOL_MAX', 4))
+        self.increment = 1
+        self.opened = 0
+        self.busy = 0
+        self.wait_timeout = (wait_timeout_ms or int(os.getenv('ORACLE_POOL_WAIT_TIMEOUT_MS', 5000))) / 1000
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(self.max)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            raise TimeoutError('ORA-24459: timeout waiting for pool to create new connections')
+        try:
+            with self._lock:
+                session = self._idle.pop() if self._idle else None
+                self.busy += 1
+            if session is None:
+                session = SyntheticSession(self.database.connect())
+                with self._lock:
+                    self.opened += 1
+            return session
+        except Exception:
+            with self._lock:
+                self.busy -= 1
+            self._slots.release()
+            raise
+
+    def release(self, session):
+        session.callTimeout = 0
+        with self._lock:
+            self.busy -= 1
+            self._idle.append(session)
+        self._slots.release()
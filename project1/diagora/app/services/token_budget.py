@@ -0,0 +1,130 @@
+"""Local token accounting for Azure OpenAI calls
+
+Prompts are counted before they are sent (tiktoken when installed, a
+characters-per-token estimate otherwise), max_tokens is sized per call and
+intent from the completion lengths seen so far, and every request's usage
+can be appended to LLM_USAGE_LOG_PATH.
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+# Used when tiktoken is not installed. Lower than ResultCompactor's 4: Turkish
+# text and JSON punctuation take fewer characters per token than English
+CHARS_PER_TOKEN = 3
+# Chat format overhead: per message, and for priming the reply
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+
+class TokenBudgetExceeded(Exception):
+    """The prompt plus the completion allowance does not fit the context window"""
+
+
+class TokenBudget:
+    """Counts prompt tokens and picks max_tokens from observed completion lengths"""
+
+    def __init__(self):
+        self.context_window = int(os.getenv('LLM_CONTEXT_WINDOW', 8192))
+        # Kept free in every request: local counts are never exact
+        self.safety_tokens = int(os.getenv('LLM_CONTEXT_SAFETY_TOKENS', 256))
+        # Starting (and highest) max_tokens per call until enough completions are seen
+        self.defaults = {
+            'intent': int(os.getenv('LLM_MAX_TOKENS_INTENT', 500)),
+            'format': int(os.getenv('LLM_MAX_TOKENS_FORMAT', 1000)),
+            'report': int(os.getenv('LLM_MAX_TOKENS_REPORT', 1500))
+        }
+        self.min_tokens = int(os.getenv('LLM_MAX_TOKENS_MIN', 64))
+        self.headroom = float(os.getenv('LLM_MAX_TOKENS_HEADROOM', 1.25))
+        self.min_samples = int(os.getenv('LLM_MAX_TOKENS_MIN_SAMPLES', 20))
+        self.usage_log_path = os.getenv('LLM_USAGE_LOG_PATH')
+        self._observed = {}
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self._encoding = None
+        self.tokenizer = None
+
+    def _get_encoding(self):
+        if self.tokenizer is None:
+            try:
+                import tiktoken
+                name = os.getenv('LLM_TOKENIZER_ENCODING', 'cl100k_base')
+                self._encoding = tiktoken.get_encoding(name)
+                self.tokenizer = name
+            except ImportError:
+                self.tokenizer = 'estimate'
+            except Exception as e:
+                print(f"Tokenizer load error: {e}")
+                self.tokenizer = 'estimate'
+        return self._encoding
+
+    def count(self, text: str) -> int:
+        encoding = self._get_encoding()
+        if encoding is None:
+            return len(text) // CHARS_PER_TOKEN + 1
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def count_messages(self, messages: list) -> int:
+        """Prompt tokens of a chat request, including the chat format overhead"""
+        return sum(self.count(m['content']) + TOKENS_PER_MESSAGE for m in messages) + TOKENS_PER_REPLY
+
+    def max_tokens(self, call: str, intent: str = None) -> int:
+        """p95 of recent completions for (call, intent) plus headroom, capped at the default"""
+        default = self.defaults.get(call, self.defaults['format'])
+        with self._lock:
+            observed = sorted(self._observed.get((call, intent), ()))
+        if len(observed) < self.min_samples:
+            return default
+        p95 = observed[min(len(observed) - 1, int(len(observed) * 0.95))]
+        return max(self.min_tokens, min(default, math.ceil(p95 * self.headroom)))
+
+    def observe(self, call: str, intent: str, completion_tokens: int, max_tokens: int, truncated: bool):
+        if completion_tokens is None:
+            return
+        if truncated:
+            # Cut off by max_tokens: the real length is unknown, so push the estimate up
+            completion_tokens = max(completion_tokens, max_tokens) * 2
+        with self._lock:
+            self._observed.setdefault((call, intent), deque(maxlen=200)).append(completion_tokens)
+
+    def overflow(self, prompt_tokens: int, max_tokens: int) -> int:
+        """Tokens over the context window less the safety margin (0 when the request fits)"""
+        return max(0, prompt_tokens + max_tokens + self.safety_tokens - self.context_window)
+
+    def check(self, prompt_tokens: int, max_tokens: int):
+        over = self.overflow(prompt_tokens, max_tokens)
+        if over:
+            raise TokenBudgetExceeded(
+                f"{prompt_tokens} prompt + {max_tokens} completion tokens exceed the "
+                f"{self.context_window} token context window ({self.safety_tokens} kept free) by {over}"
+            )
+
+    def log(self, record: dict):
+        """Append one request's token usage to LLM_USAGE_LOG_PATH"""
+        if not self.usage_log_path:
+            return
+        record = dict(record, ts=round(time.time(), 3))
+        try:
+            with self._log_lock, open(self.usage_log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"LLM usage log write error: {e}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            keys = list(self._observed)
+            samples = {key: len(values) for key, values in self._observed.items()}
+        return {
+            'tokenizer': self.tokenizer,
+            'context_window': self.context_window,
+            'max_tokens': {
+                f'{call}:{intent}' if intent else call: {
+                    'samples': samples[(call, intent)],
+                    'current': self.max_tokens(call, intent)
+                }
+                for call, intent in keys
+            }
+        }
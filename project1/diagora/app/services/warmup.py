@@ -0,0 +1,84 @@
+"""Worker start-up phases and their timings
+
+    preload  fork-safe work: heavy imports, the system prompt file and the
+             compiled query registry. Runs once in the gunicorn master with
+             preload_app, so workers share the pages.
+    worker   per-process work: LLM clients, Oracle logons, background threads
+             and optional cache priming. Runs in gunicorn's post_fork hook,
+             before the worker accepts connections, so no request waits on it.
+"""
+import os
+import threading
+import time
+
+
+class StartupTracker:
+    """Step timings of the start-up stages and the latency of the first request"""
+
+    def __init__(self):
+        self.enabled = os.getenv('WARMUP_ENABLED', 'True').lower() == 'true'
+        self.oracle = os.getenv('WARMUP_ORACLE', 'True').lower() == 'true'
+        self.prime_caches = os.getenv('WARMUP_PRIME_CACHES', 'False').lower() == 'true'
+        self.stages = {}
+        self.first_request_seconds = None
+        self._first_started = None
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, step: str, seconds: float):
+        self.stages.setdefault(stage, {})[step] = round(seconds, 4)
+
+    def run(self, stage: str, steps: list) -> float:
+        """Run (step, callable) pairs in order; a failing step is logged and skipped"""
+        started = time.perf_counter()
+        for step, function in steps:
+            step_started = time.perf_counter()
+            try:
+                function()
+            except Exception as e:
+                print(f"Warm-up error ({stage}/{step}): {e}")
+            self.record(stage, step, time.perf_counter() - step_started)
+        return time.perf_counter() - started
+
+    def total(self, stage: str) -> float:
+        return sum(self.stages.get(stage, {}).values())
+
+    def report(self, stage: str):
+        steps = ', '.join(f'{step} {seconds:.3f}s' for step, seconds in self.stages.get(stage, {}).items())
+        print(f"Worker {os.getpid()} {stage} done in {self.total(stage):.3f}s ({steps})")
+
+    def request_started(self):
+        if self._first_started is None:
+            with self._lock:
+                if self._first_started is None:
+                    self._first_started = time.perf_counter()
+
+    def request_finished(self, response=None):
+        """after_request hook; times the first request this process answered"""
+        if self.first_request_seconds is None and self._first_started is not None:
+            with self._lock:
+                if self.first_request_seconds is None:
+                    self.first_request_seconds = round(time.perf_counter() - self._first_started, 4)
+                    print(f"Worker {os.getpid()} first request took {self.first_request_seconds * 1000:.0f} ms")
+        return response
+
+    def gauges(self) -> list:
+        """Metrics collector: start-up steps and first-request latency"""
+        gauges = [
+            ('diagora_startup_seconds', (stage, step), seconds)
+            for stage, steps in self.stages.items()
+            for step, seconds in steps.items()
+        ]
+        if self.first_request_seconds is not None:
+            gauges.append(('diagora_first_request_seconds', (), self.first_request_seconds))
+        return gauges
+
+    def get_stats(self) -> dict:
+        return {
+            'stages': self.stages,
+            'preload_seconds': round(self.total('preload'), 4),
+            'worker_seconds': round(self.total('worker'), 4),
+            'first_request_seconds': self.first_request_seconds
+        }
+
+
+startup = StartupTracker()
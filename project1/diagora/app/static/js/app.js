@@ -5,6 +5,9 @@ document.addEventListener('DOMContentLoaded', function() {
     const sendBtn = document.getElementById('send-btn');
     const quickQuestions = document.querySelectorAll('.quick-question');
 
+    // Conversation id: lets the server answer follow-up questions from the previous result
+    const sessionId = getSessionId();
+
     // Check system status on load
     checkHealth();
 
@@ -29,6 +32,57 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    // Full system check
+    const fullReport = document.getElementById('full-report');
+    if (fullReport) {
+        fullReport.addEventListener('click', function(e) {
+            e.preventDefault();
+            runReport();
+        });
+    }
+
+    function runReport() {
+        const welcomeMsg = chatMessages.querySelector('.welcome-message');
+        if (welcomeMsg) {
+            welcomeMsg.remove();
+        }
+
+        addMessage('Tam sistem kontrolu', 'user');
+        const typingId = showTypingIndicator();
+        setInputState(false);
+
+        fetch('/api/report', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ intents: 'all' })
+        })
+        .then(response => response.json())
+        .then(data => {
+            removeTypingIndicator(typingId);
+
+            if (data.error) {
+                addMessage(data.answer || data.error, 'assistant', { error: true });
+                return;
+            }
+
+            const timings = Object.entries(data.intents)
+                .map(([intent, info]) => `${formatIntent(intent)}: ${info.timed_out ? 'zaman asimi' : Math.round(info.elapsed_ms) + ' ms'}`)
+                .join(' · ');
+            addMessage(data.answer + `\n\n<small>${timings}</small>`, 'assistant');
+        })
+        .catch(error => {
+            removeTypingIndicator(typingId);
+            addMessage('Bir hata olustu. Lutfen tekrar deneyin.', 'assistant', { error: true });
+            console.error('Error:', error);
+        })
+        .finally(() => {
+            setInputState(true);
+            questionInput.focus();
+        });
+    }
+
     function askQuestion(question) {
         // Remove welcome message if present
         const welcomeMsg = chatMessages.querySelector('.welcome-message');
@@ -45,27 +99,44 @@ document.addEventListener('DOMContentLoaded', function() {
         // Disable input while processing
         setInputState(false);
 
-        // Send to API
-        fetch('/api/ask', {
+        // Send to API and render the answer as it streams in
+        let streamed = null;
+
+        fetch('/api/ask/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({ question: question })
+            body: JSON.stringify({ question: question, session_id: sessionId })
         })
-        .then(response => response.json())
-        .then(data => {
-            removeTypingIndicator(typingId);
-
-            if (data.error) {
-                addMessage(data.answer || data.error, 'assistant', { error: true });
-            } else {
-                addMessage(data.answer, 'assistant', {
-                    intent: data.intent,
-                    queryExecuted: data.query_executed,
-                    rowCount: data.row_count
+        .then(response => {
+            if (!response.ok) {
+                return response.json().then(data => {
+                    throw new Error(data.error || response.statusText);
                 });
             }
+            return readEventStream(response, (event, data) => {
+                if (event === 'meta') {
+                    removeTypingIndicator(typingId);
+                    streamed = startStreamingMessage({
+                        intent: data.intent,
+                        queryExecuted: data.query_executed,
+                        rowCount: data.row_count,
+                        cached: data.cached,
+                        cacheAge: data.cache_age,
+                        stale: data.stale,
+                        followUp: data.follow_up
+                    });
+                } else if (event === 'token' && streamed) {
+                    streamed.append(data.text);
+                } else if (event === 'error') {
+                    removeTypingIndicator(typingId);
+                    if (streamed) {
+                        streamed.remove();
+                    }
+                    addMessage(data.answer || data.error, 'assistant', { error: true });
+                }
+            });
         })
         .catch(error => {
             removeTypingIndicator(typingId);
@@ -73,11 +144,86 @@ document.addEventListener('DOMContentLoaded', function() {
             console.error('Error:', error);
         })
         .finally(() => {
+            removeTypingIndicator(typingId);
             setInputState(true);
             questionInput.focus();
         });
     }
 
+    function getSessionId() {
+        // One id per browser tab, kept across page reloads
+        let id = sessionStorage.getItem('diagora-session-id');
+        if (!id) {
+            id = window.crypto && crypto.randomUUID
+                ? crypto.randomUUID()
+                : Date.now().toString(36) + Math.random().toString(36).slice(2);
+            sessionStorage.setItem('diagora-session-id', id);
+        }
+        return id;
+    }
+
+    function readEventStream(response, onEvent) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        function dispatch(block) {
+            let event = 'message';
+            const dataLines = [];
+            block.split('\n').forEach(line => {
+                if (line.startsWith('event:')) {
+                    event = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    dataLines.push(line.slice(5).trim());
+                }
+            });
+            if (dataLines.length) {
+                onEvent(event, JSON.parse(dataLines.join('\n')));
+            }
+        }
+
+        function pump() {
+            return reader.read().then(({ done, value }) => {
+                buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    dispatch(buffer.slice(0, boundary));
+                    buffer = buffer.slice(boundary + 2);
+                }
+                if (done) {
+                    if (buffer.trim()) {
+                        dispatch(buffer);
+                    }
+                    return;
+                }
+                return pump();
+            });
+        }
+
+        return pump();
+    }
+
+    function startStreamingMessage(meta) {
+        const messageDiv = addMessage('', 'assistant', meta);
+        const contentDiv = messageDiv.querySelector('.message-content');
+        let text = '';
+
+        return {
+            append(chunk) {
+                text += chunk;
+                if (typeof marked !== 'undefined') {
+                    contentDiv.innerHTML = marked.parse(text);
+                } else {
+                    contentDiv.textContent = text;
+                }
+                scrollToBottom();
+            },
+            remove() {
+                messageDiv.remove();
+            }
+        };
+    }
+
     function addMessage(content, type, meta = {}) {
         const messageDiv = document.createElement('div');
         messageDiv.className = `message ${type}`;
@@ -110,6 +256,13 @@ document.addEventListener('DOMContentLoaded', function() {
             if (meta.queryExecuted && meta.rowCount !== undefined) {
                 metaText += ` <small>${meta.rowCount} kayit</small>`;
             }
+            if (meta.followUp) {
+                metaText += ` <small class="text-muted">(onceki sonuctan, ${meta.followUp.base_row_count} kayit icinde)</small>`;
+            } else if (meta.stale) {
+                metaText += ` <small class="text-warning">(veritabani yogun, ${Math.round(meta.cacheAge)} sn onceki sonuc)</small>`;
+            } else if (meta.cached) {
+                metaText += ` <small class="text-muted">(onbellek, ${Math.round(meta.cacheAge)} sn once)</small>`;
+            }
 
             if (metaText) {
                 metaDiv.innerHTML = metaText;
@@ -119,6 +272,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
         chatMessages.appendChild(messageDiv);
         scrollToBottom();
+        return messageDiv;
     }
 
     function showTypingIndicator() {
@@ -168,7 +322,8 @@ document.addEventListener('DOMContentLoaded', function() {
             'invalid_objects': 'Invalid Objects',
             'tablespace': 'Tablespace',
             'concurrent_requests': 'Requests',
-            'alerts': 'Alerts'
+            'alerts': 'Alerts',
+            'trend': 'Trend'
         };
         return labels[intent] || intent;
     }
@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+"""
+Diagora - asyncio serving mode (ASGI)
+
+    pip install -r requirements-async.txt
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+One worker process awaits LLM calls and Oracle queries instead of holding a
+thread per question. run.py / gunicorn keep serving the sync Flask app.
+"""
+import os
+import sys
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_async_app
+
+app = create_async_app()
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(
+        app,
+        host=os.getenv('FLASK_HOST', '0.0.0.0'),
+        port=int(os.getenv('FLASK_PORT', 5000)),
+        timeout_keep_alive=30
+    )
@@ -0,0 +1,8 @@
+"""ASGI entry point with fake backends, for benchmark.py --server asgi
+
+    BENCH_PROFILE='{"llm": {"latency_ms": 800}}' uvicorn bench.asgi:app
+"""
+from app import create_async_app
+from bench.fakes import build_backends
+
+app = create_async_app(**build_backends(asynchronous=True))
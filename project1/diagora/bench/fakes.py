@@ -0,0 +1,307 @@
+"""Stand-in Oracle session pool and Azure OpenAI client for offline benchmarks
+
+Both are configured by a profile dict (see DEFAULT_PROFILE) that can be
+passed through the BENCH_PROFILE environment variable as JSON, so gunicorn
+workers build the same backends as an in-process run.
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from app.services.intent_classifier import IntentClassifier
+from app.services.oracle_service import OracleService
+from queries.ebs_queries import EBS_QUERIES
+
+DEFAULT_PROFILE = {
+    'oracle': {
+        'latency_ms': 20,       # cursor.execute time
+        'jitter': 0.2,          # +/- fraction applied to every latency
+        'fetch_ms': 1,          # per fetchmany round-trip
+        'rows': 50,
+        'pool_max': 4,
+        'intents': {},          # per-intent overrides, e.g. {"tablespace": {"latency_ms": 80, "rows": 500}}
+        'backend': 'fake'       # 'synthetic' runs the real SQL on the SQLite EBS (SYNTHETIC_SCALE)
+    },
+    'llm': {
+        'latency_ms': 400,      # time to first token / full non-streamed answer
+        'jitter': 0.2,
+        'token_ms': 10,         # per streamed chunk
+        'completion_tokens': 120,
+        'error_rate': 0.0,
+        'slow_rate': 0.0,       # fraction of calls that take slow_ms instead (tail latency)
+        'slow_ms': 0
+    }
+}
+
+
+def load_profile(overrides: dict = None) -> dict:
+    """DEFAULT_PROFILE updated with BENCH_PROFILE and the given overrides"""
+    profile = json.loads(json.dumps(DEFAULT_PROFILE))
+    for source in (json.loads(os.getenv('BENCH_PROFILE') or '{}'), overrides or {}):
+        for section, values in source.items():
+            profile.setdefault(section, {}).update(values)
+    return profile
+
+
+# Only used for its demo result shapes
+_DEMO = OracleService('bench')
+
+
+def _sleep(ms: float, jitter: float):
+    if ms > 0:
+        time.sleep(ms / 1000 * random.uniform(1 - jitter, 1 + jitter))
+
+
+def _query_intents():
+    """SQL prefix (text before any filter marker) -> intent"""
+    return {info['query'].split('{filters}')[0].strip(): intent for intent, info in EBS_QUERIES.items()}
+
+
+class FakeCursor:
+    def __init__(self, settings: dict, prefixes: dict):
+        self.settings = settings
+        self.prefixes = prefixes
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self.description = None
+        self._rows = []
+
+    def _intent_settings(self, query: str) -> dict:
+        text = query.strip()
+        for prefix, intent in self.prefixes.items():
+            if text.startswith(prefix):
+                return dict(self.settings, **self.settings['intents'].get(intent, {}))
+        return self.settings
+
+    def execute(self, query, params=None):
+        settings = self._intent_settings(query)
+        _sleep(settings['latency_ms'], settings['jitter'])
+        # Reuse the demo result shapes so compaction and formatting see realistic columns
+        demo = _DEMO._get_demo_data(query)
+        rows = demo['data'] or [tuple(None for _ in demo['columns'])]
+        self.description = [(name, None, None, None, None, None, None) for name in demo['columns']]
+        self._rows = [rows[i % len(rows)] for i in range(settings['rows'])]
+        self._fetch_ms = settings['fetch_ms']
+        self._jitter = settings['jitter']
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        if not self._rows:
+            return []
+        _sleep(self._fetch_ms, self._jitter)
+        batch, self._rows = self._rows[:size], self._rows[size:]
+        return batch
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def close(self):
+        self._rows = []
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+        self.callTimeout = 0
+
+    def cursor(self):
+        return FakeCursor(self.pool.settings, self.pool.prefixes)
+
+    def ping(self):
+        _sleep(self.pool.settings['fetch_ms'], 0)
+
+
+class FakePool:
+    """cx_Oracle.SessionPool look-alike with a bounded number of sessions"""
+
+    def __init__(self, settings: dict):
+        self.settings = settings
+        self.prefixes = _query_intents()
+        self.min = 1
+        self.max = settings['pool_max']
+        self.increment = 1
+        self.opened = 0
+        self.busy = 0
+        self._slots = threading.BoundedSemaphore(self.max)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=int(os.getenv('ORACLE_POOL_WAIT_TIMEOUT_MS', 5000)) / 1000):
+            raise RuntimeError('ORA-24459: timeout waiting for pool to create new connections')
+        with self._lock:
+            self.busy += 1
+            self.opened = max(self.opened, self.busy)
+        return FakeConnection(self)
+
+    def release(self, connection):
+        with self._lock:
+            self.busy -= 1
+        self._slots.release()
+
+
+class _Completions:
+    def __init__(self, client):
+        self.client = client
+        self.classifier = IntentClassifier()
+
+    def _answer(self, messages, max_tokens) -> dict:
+        """Decide the fake reply: latency, content or tokens, or an injected error"""
+        settings = self.client.settings
+        if random.random() < settings['error_rate']:
+            return {'error': True, 'latency_ms': settings['latency_ms'] / 2}
+        latency_ms = settings['latency_ms']
+        if settings.get('slow_rate') and random.random() < settings['slow_rate']:
+            latency_ms = settings['slow_ms']
+
+        answer = {'error': False, 'prompt_tokens': sum(len(m['content']) for m in messages) // 4 + 1}
+        if '"intent"' in messages[0]['content']:
+            # Intent detection: answer like the real model would, from the keyword classifier
+            result = self.classifier.classify(messages[-1]['content'])
+            answer['content'] = json.dumps({
+                'intent': result['intent'],
+                'entities': result.get('entities', {}),
+                'confidence': 0.95
+            })
+            answer['words'] = [answer['content']]
+            answer['latency_ms'] = latency_ms
+            answer['finish_reason'] = 'stop'
+            return answer
+
+        tokens = min(settings['completion_tokens'], max_tokens or settings['completion_tokens'])
+        answer['words'] = [f'kelime{i} ' for i in range(tokens)]
+        answer['content'] = ''.join(answer['words'])
+        answer['first_token_ms'] = latency_ms
+        answer['latency_ms'] = latency_ms + tokens * settings['token_ms']
+        answer['finish_reason'] = 'length' if tokens < settings['completion_tokens'] else 'stop'
+        return answer
+
+    def _timeout_ms(self, answer: dict, stream: bool):
+        """Milliseconds after which the client's timeout fires for this answer, or None"""
+        timeout = self.client.timeout
+        if timeout is None or answer['error']:
+            return None
+        # A stream only has to start (first chunk) within the timeout
+        waited = answer.get('first_token_ms', answer['latency_ms']) if stream else answer['latency_ms']
+        return timeout * 1000 if waited > timeout * 1000 else None
+
+    def create(self, model=None, messages=None, temperature=None, max_tokens=None, stream=False, **kwargs):
+        settings = self.client.settings
+        answer = self._answer(messages, max_tokens)
+        if answer['error']:
+            _sleep(answer['latency_ms'], settings['jitter'])
+            raise RuntimeError('Fake LLM error (injected)')
+        timeout_ms = self._timeout_ms(answer, stream)
+        if timeout_ms is not None:
+            _sleep(timeout_ms, 0)
+            raise TimeoutError('Request timed out.')
+        if stream:
+            return self._stream(answer, settings)
+        _sleep(answer['latency_ms'], settings['jitter'])
+        return _response(answer)
+
+    @staticmethod
+    def _stream(answer: dict, settings: dict):
+        _sleep(answer['first_token_ms'], settings['jitter'])
+        for chunk in _chunks(answer):
+            if chunk.choices:
+                _sleep(settings['token_ms'], settings['jitter'])
+            yield chunk
+
+
+class _AsyncCompletions(_Completions):
+    async def create(self, model=None, messages=None, temperature=None, max_tokens=None, stream=False, **kwargs):
+        settings = self.client.settings
+        answer = self._answer(messages, max_tokens)
+        if answer['error']:
+            await _async_sleep(answer['latency_ms'], settings['jitter'])
+            raise RuntimeError('Fake LLM error (injected)')
+        timeout_ms = self._timeout_ms(answer, stream)
+        if timeout_ms is not None:
+            await _async_sleep(timeout_ms, 0)
+            raise TimeoutError('Request timed out.')
+        if stream:
+            return self._async_stream(answer, settings)
+        await _async_sleep(answer['latency_ms'], settings['jitter'])
+        return _response(answer)
+
+    @staticmethod
+    async def _async_stream(answer: dict, settings: dict):
+        await _async_sleep(answer['first_token_ms'], settings['jitter'])
+        for chunk in _chunks(answer):
+            if chunk.choices:
+                await _async_sleep(settings['token_ms'], settings['jitter'])
+            yield chunk
+
+
+async def _async_sleep(ms: float, jitter: float):
+    if ms > 0:
+        await asyncio.sleep(ms / 1000 * random.uniform(1 - jitter, 1 + jitter))
+
+
+def _response(answer: dict):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=answer['content']),
+                                 finish_reason=answer['finish_reason'])],
+        usage=SimpleNamespace(prompt_tokens=answer['prompt_tokens'], completion_tokens=len(answer['words']))
+    )
+
+
+def _chunks(answer: dict):
+    # Azure's leading content filter chunk has no choices; usage comes last
+    yield SimpleNamespace(choices=[], usage=None)
+    for word in answer['words']:
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word), finish_reason=None)],
+                              usage=None)
+    yield SimpleNamespace(
+        choices=[SimpleNamespace(delta=SimpleNamespace(content=None), finish_reason=answer['finish_reason'])],
+        usage=None
+    )
+    yield SimpleNamespace(
+        choices=[],
+        usage=SimpleNamespace(prompt_tokens=answer['prompt_tokens'], completion_tokens=len(answer['words']))
+    )
+
+
+class FakeLLMClient:
+    """AzureOpenAI look-alike: chat.completions.create (plain and streamed) and models.list"""
+
+    completions_class = _Completions
+
+    def __init__(self, settings: dict, timeout: float = None):
+        self.settings = settings
+        self.timeout = timeout
+        self.chat = SimpleNamespace(completions=self.completions_class(self))
+        self.models = SimpleNamespace(list=lambda: [])
+
+    def with_options(self, timeout: float = None, **kwargs):
+        """Copy that fails like the SDK once a call takes longer than timeout"""
+        return type(self)(self.settings, timeout if timeout is not None else self.timeout)
+
+
+class FakeAsyncLLMClient(FakeLLMClient):
+    """AsyncAzureOpenAI look-alike for the asyncio serving mode"""
+
+    completions_class = _AsyncCompletions
+
+
+def build_backends(profile: dict = None, asynchronous: bool = False) -> dict:
+    """Keyword arguments for create_app() (or create_async_app()) that plug in the fake backends"""
+    profile = profile or load_profile()
+    if profile['oracle'].get('backend') == 'synthetic':
+        from app.services.synthetic_backend import SyntheticDatabase, SyntheticPool
+        database = SyntheticDatabase()
+        database.ensure()
+        pool_factory = lambda name: SyntheticPool(database, profile['oracle']['pool_max'])
+    else:
+        pool_factory = lambda name: FakePool(profile['oracle'])
+    backends = {
+        'oracle_pool_factory': pool_factory,
+        'llm_client': FakeLLMClient(profile['llm'])
+    }
+    if asynchronous:
+        backends['async_llm_client'] = FakeAsyncLLMClient(profile['llm'])
+    return backends
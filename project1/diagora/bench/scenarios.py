@@ -0,0 +1,32 @@
+"""Request mixes for benchmark.py
+
+Each scenario is a list of (weight, method, path, json body). New endpoints
+are benchmarked by adding entries here.
+"""
+
+QUESTIONS = [
+    'Concurrent manager durumu nedir?',
+    'Çalışan concurrent requestleri göster',
+    'Standard Manager çalışıyor mu?',
+    'Workflow durumu nasıl?',
+    'Takılı kalan workflow var mı?',
+    'Invalid objeler hangileri?',
+    'APPS şemasında geçersiz obje var mı?',
+    'Tablespace doluluk oranları nedir?',
+    'Disk alanı yeterli mi?',
+    'Hangi tablespace dolmak üzere?'
+]
+
+SCENARIOS = {
+    # Interactive users: mostly questions, some streamed, health polling from the UI
+    'default': (
+        [(6, 'POST', '/api/ask', {'question': q}) for q in QUESTIONS]
+        + [(2, 'POST', '/api/ask/stream', {'question': q}) for q in QUESTIONS[::2]]
+        + [(10, 'GET', '/api/health', None)]
+    ),
+    'ask': [(1, 'POST', '/api/ask', {'question': q}) for q in QUESTIONS],
+    'stream': [(1, 'POST', '/api/ask/stream', {'question': q}) for q in QUESTIONS],
+    'health': [(1, 'GET', '/api/health', None)],
+    'report': [(1, 'POST', '/api/report', {'intents': 'all'})],
+    'metrics': [(1, 'GET', '/metrics', None)]
+}
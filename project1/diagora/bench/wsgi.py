@@ -0,0 +1,8 @@
+"""WSGI entry point with fake backends, for benchmark.py --server gunicorn
+
+    BENCH_PROFILE='{"llm": {"latency_ms": 200}}' gunicorn -w 4 bench.wsgi:app
+"""
+from app import create_app
+from bench.fakes import build_backends
+
+app = create_app(**build_backends())
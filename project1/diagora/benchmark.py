@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+"""
+Diagora - offline load test with fake Oracle and Azure OpenAI backends
+
+    python benchmark.py --scenario default --concurrency 16 --duration 30
+    python benchmark.py --server gunicorn --workers 4 --llm-latency-ms 800
+    python benchmark.py --server asgi --concurrency 300 --llm-latency-ms 800
+    python benchmark.py --synthetic-scale 10 --scenario ask
+    python benchmark.py --compare latest --tolerance 10
+
+Results (p50/p95/p99 latency, throughput, RSS) are written to bench/results/
+so runs can be compared; --compare exits with status 1 on a regression.
+Backend latencies and sizes are described in bench/fakes.py, request mixes
+in bench/scenarios.py.
+"""
+import argparse
+import glob
+import http.client
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Add the project root to Python path
+sys.path.insert(0, ROOT)
+
+from bench.fakes import load_profile
+from bench.scenarios import SCENARIOS
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _rss(pid: int) -> int:
+    """Resident set size in bytes (Linux /proc), 0 when unavailable"""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def _children(pid: int) -> list:
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class InProcessClient:
+    """Drives create_app() through Flask's test client"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method: str, path: str, body):
+        response = self.client.open(path, method=method, json=body)
+        response.get_data()
+        return response.status_code
+
+
+class HttpClient:
+    """Keep-alive HTTP client for a gunicorn server"""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.connection = None
+
+    def request(self, method: str, path: str, body):
+        payload = json.dumps(body) if body is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=120)
+            try:
+                self.connection.request(method, path, payload, headers)
+                response = self.connection.getresponse()
+                response.read()
+                if response.getheader('Connection', '').lower() == 'close':
+                    self.connection.close()
+                    self.connection = None
+                return response.status
+            except (http.client.HTTPException, OSError):
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+
+class Server:
+    """A gunicorn master running bench.wsgi:app, or one uvicorn process running bench.asgi:app"""
+
+    def __init__(self, kind: str, workers: int, threads: int, env: dict):
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            self.port = s.getsockname()[1]
+        if kind == 'asgi':
+            command = ['uvicorn', '--port', str(self.port), '--log-level', 'warning', 'bench.asgi:app']
+        else:
+            command = ['gunicorn', '--workers', str(workers), '--threads', str(threads),
+                       '--bind', f'127.0.0.1:{self.port}', '--log-level', 'warning', 'bench.wsgi:app']
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.startup_seconds = None
+        self.process = subprocess.Popen([sys.executable, '-m'] + command, cwd=ROOT, env=env)
+
+    def wait_ready(self, timeout: float = 60):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                sys.exit(f'{self.kind} server exited during startup')
+            try:
+                if HttpClient(self.port).request('GET', '/api/health', None) == 200:
+                    self.startup_seconds = round(time.perf_counter() - self.started, 3)
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        sys.exit(f'{self.kind} server did not become ready')
+
+    def rss(self) -> int:
+        return _rss(self.process.pid) + sum(_rss(child) for child in _children(self.process.pid))
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def drive(make_client, scenario: list, concurrency: int, duration: float, warmup: float,
+          seed: int, rss_probe) -> dict:
+    """Run the request mix from `concurrency` threads; returns samples and timing"""
+    weights = [entry[0] for entry in scenario]
+    samples = []
+    samples_lock = threading.Lock()
+    peak_rss = [rss_probe()]
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    def worker(index: int):
+        rng = random.Random(seed + index)
+        client = make_client()
+        local = []
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                break
+            _, method, path, body = rng.choices(scenario, weights)[0]
+            try:
+                status = client.request(method, path, body)
+            except Exception:
+                status = 0
+            finished = time.perf_counter()
+            if now >= measure_from:
+                local.append((f'{method} {path}', finished - now, 0 < status < 400))
+        with samples_lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        peak_rss[0] = max(peak_rss[0], rss_probe())
+        time.sleep(0.5)
+    for thread in threads:
+        thread.join()
+
+    return {'samples': samples, 'elapsed': time.perf_counter() - measure_from, 'peak_rss': peak_rss[0]}
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    def stats(entries):
+        latencies = sorted(latency for _, latency, _ in entries)
+        return {
+            'requests': len(entries),
+            'errors': sum(1 for _, _, ok in entries if not ok),
+            'throughput': round(len(entries) / elapsed, 2) if elapsed > 0 else 0.0,
+            'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2)
+        }
+
+    by_endpoint = {}
+    for sample in samples:
+        by_endpoint.setdefault(sample[0], []).append(sample)
+    return {
+        'overall': stats(samples),
+        'endpoints': {name: stats(entries) for name, entries in sorted(by_endpoint.items())}
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def _find_baseline(args, current_path: str):
+    if args.compare != 'latest':
+        return args.compare
+    pattern = os.path.join(args.out_dir, f'*-{args.scenario}-{args.server}.json')
+    previous = sorted(path for path in glob.glob(pattern) if path != current_path)
+    return previous[-1] if previous else None
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list:
+    """Print deltas against a baseline run and return the regressions found"""
+    regressions = []
+    print(f"\nCompared with {baseline['timestamp']} ({baseline.get('commit') or 'unknown commit'}):")
+    for name, current in [('overall', result['overall'])] + list(result['endpoints'].items()):
+        before = baseline['overall'] if name == 'overall' else baseline['endpoints'].get(name)
+        if not before:
+            continue
+        for key, higher_is_worse in (('p50_ms', True), ('p95_ms', True), ('p99_ms', True), ('throughput', False)):
+            if not before[key]:
+                continue
+            change = (current[key] - before[key]) / before[key] * 100
+            worse = change > tolerance if higher_is_worse else change < -tolerance
+            flag = '  REGRESSION' if worse else ''
+            print(f"  {name:28} {key:10} {before[key]:>10} -> {current[key]:>10} ({change:+.1f}%){flag}")
+            if worse:
+                regressions.append((name, key, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test Diagora against fake Oracle/LLM backends')
+    parser.add_argument('--scenario', default='default', choices=sorted(SCENARIOS))
+    parser.add_argument('--server', default='inprocess', choices=['inprocess', 'gunicorn', 'asgi'])
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads')
+    parser.add_argument('--duration', type=float, default=20, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=3, help='unmeasured seconds before measuring')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--profile', help='JSON file or string overriding bench.fakes.DEFAULT_PROFILE')
+    parser.add_argument('--synthetic-scale', type=float,
+                        help='run the real SQL on the synthetic SQLite EBS at this SYNTHETIC_SCALE')
+    parser.add_argument('--oracle-latency-ms', type=float)
+    parser.add_argument('--oracle-rows', type=int)
+    parser.add_argument('--llm-latency-ms', type=float)
+    parser.add_argument('--llm-token-ms', type=float)
+    parser.add_argument('--llm-error-rate', type=float)
+    parser.add_argument('--label', default='', help='free text stored with the result')
+    parser.add_argument('--out-dir', default=os.path.join(ROOT, 'bench', 'results'))
+    parser.add_argument('--compare', nargs='?', const='latest',
+                        help="baseline result file, or 'latest' for the previous matching run")
+    parser.add_argument('--tolerance', type=float, default=10, help='allowed change in percent')
+    args = parser.parse_args()
+
+    overrides = {}
+    if args.profile:
+        text = args.profile
+        if os.path.exists(text):
+            with open(text, encoding='utf-8') as f:
+                text = f.read()
+        overrides = json.loads(text)
+    for section, key, value in (
+        ('oracle', 'latency_ms', args.oracle_latency_ms),
+        ('oracle', 'rows', args.oracle_rows),
+        ('llm', 'latency_ms', args.llm_latency_ms),
+        ('llm', 'token_ms', args.llm_token_ms),
+        ('llm', 'error_rate', args.llm_error_rate)
+    ):
+        if value is not None:
+            overrides.setdefault(section, {})[key] = value
+    if args.synthetic_scale is not None:
+        os.environ['SYNTHETIC_SCALE'] = str(args.synthetic_scale)
+        overrides.setdefault('oracle', {})['backend'] = 'synthetic'
+    profile = load_profile(overrides)
+    os.environ['BENCH_PROFILE'] = json.dumps(profile)
+
+    scenario = SCENARIOS[args.scenario]
+    server = None
+    if args.server != 'inprocess':
+        server = Server(args.server, args.workers, args.threads, dict(os.environ))
+        server.wait_ready()
+        startup_seconds = server.startup_seconds
+        make_client = lambda: HttpClient(server.port)
+        rss_probe = server.rss
+    else:
+        from app import create_app
+        from bench.fakes import build_backends
+        started = time.perf_counter()
+        app = create_app(**build_backends(profile))
+        startup_seconds = round(time.perf_counter() - started, 3)
+        make_client = lambda: InProcessClient(app)
+        rss_probe = lambda: _rss(os.getpid())
+
+    try:
+        run = drive(make_client, scenario, args.concurrency, args.duration, args.warmup, args.seed, rss_probe)
+        final_rss = rss_probe()
+    finally:
+        if server:
+            server.stop()
+
+    result = summarize(run['samples'], run['elapsed'])
+    result.update({
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'label': args.label,
+        'scenario': args.scenario,
+        'server': args.server,
+        'workers': args.workers if args.server == 'gunicorn' else 1,
+        'threads': args.threads if args.server == 'gunicorn' else None,
+        'concurrency': args.concurrency,
+        'duration': round(run['elapsed'], 2),
+        'startup_seconds': startup_seconds,
+        'profile': profile,
+        'rss_mb': round(final_rss / 2 ** 20, 1),
+        'peak_rss_mb': round(run['peak_rss'] / 2 ** 20, 1),
+        'max_rss_self_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    })
+
+    overall = result['overall']
+    print(f"{args.scenario} / {args.server}: {overall['requests']} requests in {result['duration']}s, "
+          f"{overall['throughput']} req/s, {overall['errors']} errors, RSS {result['rss_mb']} MB "
+          f"(peak {result['peak_rss_mb']} MB), ready after {startup_seconds}s")
+    print(f"  {'endpoint':28} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, stats in [('overall', overall)] + list(result['endpoints'].items()):
+        print(f"  {name:28} {stats['requests']:>8} {stats['errors']:>6} {stats['throughput']:>8} "
+              f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8}")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    path = os.path.join(args.out_dir, f"{datetime.now():%Y%m%d-%H%M%S}-{args.scenario}-{args.server}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"Saved {path}")
+
+    if args.compare:
+        baseline_path = _find_baseline(args, path)
+        if not baseline_path:
+            print('No earlier result to compare with')
+            return
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+"""gunicorn settings: gunicorn -c gunicorn.conf.py run:app
+
+With preload_app the master imports the app once (services, compiled
+queries, openai, the system prompt) and the forked workers share it. Each
+worker then opens its own Azure OpenAI client and Oracle sessions and starts
+its background threads in post_fork, before it accepts connections, so a
+freshly scaled-out worker's first request does not pay for them.
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('FLASK_PORT', 5000)}")
+workers = int(os.getenv('GUNICORN_WORKERS', 4))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() == 'true'
+# Covers post_fork warm-up (Oracle logons, WARMUP_PRIME_CACHES) as well as slow LLM calls
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+
+# create_app() leaves per-worker start-up to post_fork (threads do not survive fork)
+os.environ['DIAGORA_DEFER_WORKER_START'] = 'True'
+
+
+def post_fork(server, worker):
+    from app import start_worker
+    start_worker(worker.app.wsgi())
@@ -1,5 +1,15 @@
 """
 Oracle EBS R12.2.9 SQL Queries for Diagora
+
+cache_ttl: seconds a result may be served from the result cache (0 disables caching)
+fetch: cursor arraysize and the maximum number of rows kept per request
+refresh_interval: seconds between background snapshot collections (0 = always live)
+cost: admission class, 'light' (live lookups, served first), 'medium' or
+    'heavy' (large dictionary scans and aggregations); see ADMISSION_* settings
+filters: optional entity filters rendered at the {filters} marker. A filter is
+    either a bind-variable condition ('condition' + 'bind', optional 'pattern'
+    or 'upper' applied to the bind value) or a fixed set of conditions chosen
+    by value ('values'). Every combination is compiled once by QueryRegistry.
 """
 
 EBS_QUERIES = {
@@ -20,10 +30,22 @@ EBS_QUERIES = {
             WHERE
                 fcq.APPLICATION_ID = fa.APPLICATION_ID
                 AND fcq.ENABLED_FLAG = 'Y'
+                {filters}
             ORDER BY
                 fcq.RUNNING_PROCESSES DESC
         """,
-        'params': {}
+        'params': {},
+        'filters': {
+            'manager_name': {
+                'condition': "UPPER(fcq.CONCURRENT_QUEUE_NAME) LIKE UPPER(:manager_name)",
+                'bind': 'manager_name',
+                'pattern': '%{}%'
+            }
+        },
+        'cache_ttl': 30,
+        'fetch': {'arraysize': 100, 'max_rows': 500},
+        'refresh_interval': 60,
+        'cost': 'light'
     },
 
     'concurrent_requests': {
@@ -51,7 +73,11 @@ EBS_QUERIES = {
             ORDER BY
                 fcr.ACTUAL_START_DATE
         """,
-        'params': {}
+        'params': {},
+        'cache_ttl': 5,
+        'fetch': {'arraysize': 200, 'max_rows': 2000},
+        'refresh_interval': 0,
+        'cost': 'light'
     },
 
     'workflow': {
@@ -71,6 +97,7 @@ EBS_QUERIES = {
             WHERE
                 wi.ITEM_TYPE = wit.NAME
                 AND wit.LANGUAGE = 'US'
+                {filters}
             GROUP BY
                 wi.ITEM_TYPE,
                 wit.DISPLAY_NAME
@@ -79,7 +106,20 @@ EBS_QUERIES = {
             ORDER BY
                 stuck_count DESC
         """,
-        'params': {}
+        'params': {},
+        'filters': {
+            'status_filter': {
+                'values': {
+                    'STUCK': "wi.END_DATE IS NULL AND wi.BEGIN_DATE < SYSDATE - 7",
+                    'ACTIVE': "wi.END_DATE IS NULL",
+                    'COMPLETED': "wi.END_DATE IS NOT NULL"
+                }
+            }
+        },
+        'cache_ttl': 120,
+        'fetch': {'arraysize': 200, 'max_rows': 1000},
+        'refresh_interval': 300,
+        'cost': 'heavy'
     },
 
     'workflow_stuck': {
@@ -106,7 +146,11 @@ EBS_QUERIES = {
                 wi.BEGIN_DATE
             FETCH FIRST 100 ROWS ONLY
         """,
-        'params': {}
+        'params': {},
+        'cache_ttl': 300,
+        'fetch': {'arraysize': 100, 'max_rows': 100},
+        'refresh_interval': 600,
+        'cost': 'heavy'
     },
 
     'invalid_objects': {
@@ -125,12 +169,24 @@ EBS_QUERIES = {
             WHERE
                 status = 'INVALID'
                 AND owner IN ('APPS', 'AR', 'AP', 'GL', 'INV', 'ONT', 'PO', 'HR')
+                {filters}
             ORDER BY
                 owner,
                 object_type,
                 object_name
         """,
-        'params': {}
+        'params': {},
+        'filters': {
+            'schema_name': {
+                'condition': "owner = :owner",
+                'bind': 'owner',
+                'upper': True
+            }
+        },
+        'cache_ttl': 300,
+        'fetch': {'arraysize': 500, 'max_rows': 5000},
+        'refresh_interval': 600,
+        'cost': 'heavy'
     },
 
     'tablespace': {
@@ -152,7 +208,11 @@ EBS_QUERIES = {
             ORDER BY
                 used_percent DESC
         """,
-        'params': {}
+        'params': {},
+        'cache_ttl': 120,
+        'fetch': {'arraysize': 100, 'max_rows': 500},
+        'refresh_interval': 300,
+        'cost': 'medium'
     },
 
     'tablespace_detail': {
@@ -179,7 +239,11 @@ EBS_QUERIES = {
             ORDER BY
                 used_pct DESC
         """,
-        'params': {}
+        'params': {},
+        'cache_ttl': 600,
+        'fetch': {'arraysize': 100, 'max_rows': 500},
+        'refresh_interval': 900,
+        'cost': 'heavy'
     },
 
     'alerts': {
@@ -202,7 +266,11 @@ EBS_QUERIES = {
                 application_name,
                 alert_name
         """,
-        'params': {}
+        'params': {},
+        'cache_ttl': 600,
+        'fetch': {'arraysize': 200, 'max_rows': 1000},
+        'refresh_interval': 1800,
+        'cost': 'medium'
     },
 
     'profile_options': {
@@ -232,7 +300,11 @@ EBS_QUERIES = {
             ORDER BY
                 fpo.PROFILE_OPTION_NAME
         """,
-        'params': {}
+        'params': {},
+        'cache_ttl': 1800,
+        'fetch': {'arraysize': 500, 'max_rows': 2000},
+        'refresh_interval': 3600,
+        'cost': 'medium'
     },
 
     'user_sessions': {
@@ -260,6 +332,10 @@ EBS_QUERIES = {
                 fls.START_TIME DESC
             FETCH FIRST 50 ROWS ONLY
         """,
-        'params': {}
+        'params': {},
+        'cache_ttl': 30,
+        'fetch': {'arraysize': 50, 'max_rows': 50},
+        'refresh_interval': 0,
+        'cost': 'light'
     }
 }
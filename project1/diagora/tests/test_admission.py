@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionRejected
+
+
+@pytest.fixture
+def admission(monkeypatch):
+    """One slot in total, so every second query has to queue"""
+    monkeypatch.setenv('ADMISSION_ENABLED', 'True')
+    monkeypatch.setenv('ADMISSION_MAX_ACTIVE', '1')
+    return AdmissionController('test')
+
+
+def _wait_queued(admission, cost, count):
+    deadline = time.time() + 2
+    while admission.get_stats()['classes'][cost]['queued'] < count:
+        assert time.time() < deadline, f'{cost} waiter never queued'
+        time.sleep(0.005)
+
+
+def test_waiters_are_admitted_cheapest_class_first(admission):
+    held = admission.acquire('light')
+    order = []
+
+    def worker(cost):
+        with admission.slot(cost):
+            order.append(cost)
+
+    threads = []
+    for cost in ('heavy', 'medium', 'light'):
+        thread = threading.Thread(target=worker, args=(cost,))
+        thread.start()
+        threads.append(thread)
+        _wait_queued(admission, cost, 1)
+
+    admission.release(held)
+    for thread in threads:
+        thread.join(2)
+
+    assert order == ['light', 'medium', 'heavy']
+
+
+def test_full_queue_rejects_at_once(admission, monkeypatch):
+    monkeypatch.setitem(admission.queue_sizes, 'heavy', 0)
+    held = admission.acquire('light')
+
+    with pytest.raises(AdmissionRejected) as error:
+        admission.acquire('heavy')
+
+    assert error.value.reason == 'queue_full'
+    assert admission.get_stats()['classes']['heavy']['rejected'] == 1
+    admission.release(held)
+
+
+def test_waiting_too_long_is_rejected_and_leaves_the_queue(admission, monkeypatch):
+    monkeypatch.setitem(admission.max_waits, 'medium', 0.05)
+    held = admission.acquire('light')
+
+    with pytest.raises(AdmissionRejected) as error:
+        admission.acquire('medium')
+
+    assert error.value.reason == 'timeout'
+    assert admission.get_stats()['classes']['medium']['queued'] == 0
+    admission.release(held)
+
+
+def test_cancelled_async_waiter_gives_up_its_place(admission):
+    async def scenario():
+        held = await admission.acquire_async('light')
+        task = asyncio.ensure_future(admission.acquire_async('medium'))
+        await asyncio.sleep(0.01)
+        assert admission.get_stats()['classes']['medium']['queued'] == 1
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        admission.release(held)
+
+        # The freed slot is not handed to the cancelled waiter
+        assert await admission.acquire_async('light') == 'light'
+        admission.release('light')
+
+    asyncio.run(scenario())
+    classes = admission.get_stats()['classes']
+    assert all(stats['active'] == 0 and stats['queued'] == 0 for stats in classes.values())
+
+
+def test_slot_is_released_when_the_query_fails(admission):
+    with pytest.raises(RuntimeError):
+        with admission.slot('heavy'):
+            raise RuntimeError('ORA-01013')
+
+    assert admission.get_stats()['classes']['heavy']['active'] == 0
+    with admission.slot('heavy'):
+        pass
+
+
+def test_unknown_cost_uses_the_default_class(admission):
+    assert admission.acquire('gigantic') == 'medium'
+    admission.release('medium')
+
+
+def test_caller_deadline_shortens_the_wait(admission):
+    held = admission.acquire('light')
+    started = time.perf_counter()
+
+    with pytest.raises(AdmissionRejected):
+        admission.acquire('heavy', max_wait=0.05)
+
+    assert time.perf_counter() - started < 1
+    admission.release(held)
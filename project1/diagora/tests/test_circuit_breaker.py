@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from app.services.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    monkeypatch.setenv('LLM_BREAKER_ENABLED', 'True')
+    monkeypatch.setenv('LLM_BREAKER_MIN_CALLS', '4')
+    monkeypatch.setenv('LLM_BREAKER_ERROR_RATE', '0.5')
+    monkeypatch.setenv('LLM_BREAKER_P95_SECONDS', '10')
+    monkeypatch.setenv('LLM_BREAKER_P95_INTENT_SECONDS', '3')
+    monkeypatch.setenv('LLM_BREAKER_OPEN_SECONDS', '0.05')
+    return CircuitBreaker('test')
+
+
+def test_opens_on_error_rate(breaker):
+    for ok in (True, True, False):
+        breaker.record(0.5, ok)
+    assert breaker.allow()
+
+    breaker.record(0.5, False)
+
+    assert breaker.is_open()
+    assert not breaker.allow()
+    assert breaker.get_stats()['last_trip']['reason'].startswith('error rate')
+
+
+def test_does_not_open_below_min_calls(breaker):
+    for _ in range(3):
+        breaker.record(0.5, False)
+    assert breaker.get_stats()['state'] == 'closed'
+
+
+def test_opens_on_p95_of_one_call_type(breaker):
+    for _ in range(4):
+        breaker.record(4.0, True, 'report')
+    assert breaker.get_stats()['state'] == 'closed'
+
+    for _ in range(4):
+        breaker.record(4.0, True, 'intent')
+
+    assert breaker.is_open()
+    assert 'intent p95' in breaker.get_stats()['last_trip']['reason']
+
+
+def _trip(breaker):
+    for _ in range(4):
+        breaker.record(0.5, False)
+    assert not breaker.allow()
+    time.sleep(0.06)
+
+
+def test_half_open_lets_one_probe_through_and_closes_on_success(breaker):
+    _trip(breaker)
+
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record(0.5, True)
+
+    assert breaker.get_stats()['state'] == 'closed'
+    assert breaker.allow()
+
+
+def test_failed_probe_opens_again(breaker):
+    _trip(breaker)
+
+    assert breaker.allow()
+    breaker.record(0.5, False)
+
+    assert breaker.is_open()
+    assert breaker.trips == 2
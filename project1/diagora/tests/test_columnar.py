@@ -0,0 +1,70 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app.services import columnar
+from app.services.columnar import ColumnarResult
+
+pytestmark = pytest.mark.skipif(columnar.np is None, reason='numpy is not installed')
+
+COLUMNS = ['REQUEST_ID', 'PROGRAM', 'STATUS', 'ACTUAL_START_DATE', 'RUN_MINUTES']
+ROWS = [
+    (1001, 'XXAR_AGING', 'R', datetime(2024, 3, 5, 14, 7, 9), 12.5),
+    (1002, 'FNDWFBG', 'P', None, None),
+    (1003, 'XXAR_AGING', 'R', datetime(2024, 3, 5, 9, 0, 0, 250000), 3),
+    (1004, None, 'E', datetime(2024, 3, 4, 23, 59, 59), 48.0)
+]
+
+
+@pytest.fixture
+def result():
+    return ColumnarResult.from_batches(COLUMNS, [ROWS[:2], ROWS[2:]])
+
+
+def test_round_trips_to_the_same_rows(result):
+    assert len(result) == len(ROWS)
+    assert result.to_rows() == ROWS
+    assert list(result) == ROWS
+    assert [result[i] for i in range(len(ROWS))] == ROWS
+    assert result[-1] == ROWS[-1]
+
+
+def test_columns_get_typed_arrays_with_null_masks(result):
+    assert result.kinds == ['int', 'object', 'object', 'datetime', 'float']
+    assert result.values('RUN_MINUTES') == [12.5, None, 3.0, 48.0]
+    assert result.values('ACTUAL_START_DATE')[1] is None
+
+
+def test_slices_filters_and_takes_match_the_rows(result):
+    assert result[1:3].to_rows() == ROWS[1:3]
+    assert result.filter([True, False, True, False]).to_rows() == [ROWS[0], ROWS[2]]
+    assert result.take([3, 0]).to_rows() == [ROWS[3], ROWS[0]]
+
+
+def test_aggregates_match_row_by_row(result):
+    assert result.sum('RUN_MINUTES') == sum(row[4] for row in ROWS if row[4] is not None)
+    assert result.count_by('PROGRAM') == {'XXAR_AGING': 2, 'FNDWFBG': 1, None: 1}
+    ranked = sorted((row for row in ROWS if row[4] is not None), key=lambda row: -row[4])
+    assert [ROWS[i] for i in result.top('RUN_MINUTES', 2)] == ranked[:2]
+
+
+def test_json_matches_encoding_the_rows(result):
+    assert json.loads(result.to_json()) == json.loads(json.dumps(ROWS, default=str))
+    lines = list(result.iter_ndjson())
+    assert [json.loads(line) for line in lines] == [
+        json.loads(json.dumps(dict(zip(COLUMNS, row)), default=str)) for row in ROWS
+    ]
+
+
+def test_mixed_types_stay_python_objects():
+    result = ColumnarResult.from_rows(['VALUE'], [(1,), ('1',), (None,)])
+
+    assert result.kinds == ['object']
+    assert result.to_rows() == [(1,), ('1',), (None,)]
+
+
+def test_collect_returns_plain_rows_when_disabled(monkeypatch):
+    monkeypatch.setenv('RESULT_COLUMNAR', 'False')
+
+    assert columnar.collect(COLUMNS, [ROWS[:2], ROWS[2:]]) == ROWS
@@ -0,0 +1,104 @@
+import pytest
+
+from app.services.columnar import ColumnarResult, np
+from app.services.conversation_store import ConversationStore, FollowUpParser, apply_operations
+
+COLUMNS = ['TABLESPACE_NAME', 'USED_PERCENT', 'STATUS']
+ROWS = [
+    ('APPS_TS_TX_DATA', 91.5, 'CRITICAL'),
+    ('SYSTEM', 82.0, 'WARNING'),
+    ('USERS', 10.0, 'OK'),
+    ('APPS_UNDOTS1', None, 'OK')
+]
+
+
+def _result(rows=ROWS):
+    return {'success': True, 'columns': COLUMNS, 'data': rows}
+
+
+@pytest.fixture(scope='module')
+def parser():
+    return FollowUpParser()
+
+
+def test_column_value_becomes_a_filter(parser):
+    operations = parser.parse('sadece CRITICAL olanlar', 'tablespace', _result())
+
+    assert operations == {'filters': {'STATUS': ['CRITICAL']}}
+    assert apply_operations(_result(), operations)['data'] == [ROWS[0]]
+
+
+def test_number_with_above_word_becomes_a_threshold(parser):
+    operations = parser.parse('yüzde 80 üzeri olanlar hangileri', 'tablespace', _result())
+
+    assert operations['thresholds'] == [{'column': 'USED_PERCENT', 'operator': '>', 'value': 80.0}]
+    assert apply_operations(_result(), operations)['data'] == ROWS[:2]
+
+
+def test_below_threshold_skips_rows_without_a_value(parser):
+    operations = parser.parse('85 altında olanlar', 'tablespace', _result())
+
+    assert operations['thresholds'][0]['operator'] == '<'
+    assert apply_operations(_result(), operations)['data'] == [ROWS[1], ROWS[2]]
+
+
+def test_top_n_sorts_by_the_metric(parser):
+    operations = parser.parse('en dolu 2 tanesi', 'tablespace', _result())
+
+    assert operations == {'sort': {'column': 'USED_PERCENT', 'descending': True}, 'limit': 2}
+    assert apply_operations(_result(), operations)['data'] == ROWS[:2]
+
+
+def test_lowest_n_sorts_ascending(parser):
+    operations = parser.parse('en düşük 1 tanesi', 'tablespace', _result())
+
+    assert apply_operations(_result(), operations)['data'] == [ROWS[2]]
+
+
+def test_first_n_keeps_the_original_order(parser):
+    assert parser.parse('ilk 2', 'tablespace', _result()) == {'limit': 2}
+
+
+def test_a_new_question_is_not_a_follow_up(parser):
+    assert parser.parse('tablespace doluluk nedir', 'tablespace', _result()) is None
+
+
+def test_store_answers_follow_ups_of_the_session_only():
+    store = ConversationStore()
+    store.remember('s1', 'tablespace doluluk nedir', 'tablespace', _result())
+
+    assert store.follow_up('s2', 'sadece CRITICAL olanlar') is None
+    intent, result, operations = store.follow_up('s1', 'sadece CRITICAL olanlar')
+    assert intent == 'tablespace'
+    assert result['data'] == [ROWS[0]]
+    assert result['follow_up']['base_row_count'] == len(ROWS)
+
+
+def test_a_question_with_its_own_subject_needs_a_back_reference():
+    store = ConversationStore()
+    store.remember('s1', 'tablespace doluluk nedir', 'tablespace', _result())
+
+    assert store.follow_up('s1', 'which tablespaces are full', 'tablespace') is None
+    assert store.follow_up('s1', 'hangi tablespaceler dolu', 'tablespace') is None
+    assert store.follow_up('s1', 'en dolu 2 tanesi', 'tablespace')[1]['data'] == ROWS[:2]
+    assert store.follow_up('s1', 'ilk 2', 'general')[1]['data'] == ROWS[:2]
+
+
+@pytest.mark.skipif(np is None, reason='numpy is not installed')
+@pytest.mark.parametrize('question', [
+    'sadece CRITICAL olanlar',
+    'sadece ok olanlar',
+    'yüzde 80 üzeri olanlar hangileri',
+    '85 altında olanlar',
+    'en dolu 2 tanesi',
+    'en düşük 3 tanesi',
+    'ilk 2'
+])
+def test_columnar_and_row_results_give_the_same_answer(parser, question):
+    rows = _result()
+    columnar = _result(ColumnarResult.from_rows(COLUMNS, ROWS))
+
+    operations = parser.parse(question, 'tablespace', rows)
+
+    assert parser.parse(question, 'tablespace', columnar) == operations
+    assert list(apply_operations(columnar, operations)['data']) == apply_operations(rows, operations)['data']
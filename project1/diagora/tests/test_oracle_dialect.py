@@ -0,0 +1,92 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from app.services.oracle_dialect import decode, from_julian, nvl, register_functions, to_char, to_julian, translate
+from app.services.query_mapper import QueryMapper
+from app.services.synthetic_backend import SyntheticDatabase
+
+
+def test_fetch_first_becomes_limit():
+    assert translate('SELECT x FROM t FETCH FIRST 10 ROWS ONLY').strip() == 'SELECT x FROM t LIMIT 10'
+
+
+def test_sysdate_becomes_a_function_call():
+    assert translate('SELECT SYSDATE - 1 FROM dual') == 'SELECT SYSDATE() - 1 FROM dual'
+    assert translate('SELECT SYSDATE() FROM dual') == 'SELECT SYSDATE() FROM dual'
+
+
+def test_outer_join_marks_become_left_joins():
+    sql = translate(
+        'SELECT a.id, b.name FROM orders a, customers b '
+        'WHERE a.customer_id = b.id(+) AND a.status = 1'
+    )
+
+    assert '(+)' not in sql
+    assert 'LEFT JOIN customers b ON a.customer_id = b.id' in sql
+    assert 'WHERE a.status = 1' in sql
+
+
+def test_outer_join_keeps_rows_without_a_match():
+    connection = sqlite3.connect(':memory:')
+    connection.executescript(
+        'CREATE TABLE orders (id INTEGER, customer_id INTEGER);'
+        'CREATE TABLE customers (id INTEGER, name TEXT);'
+        "INSERT INTO orders VALUES (1, 10), (2, 20); INSERT INTO customers VALUES (10, 'APPS');"
+    )
+    sql = translate('SELECT a.id, b.name FROM orders a, customers b WHERE a.customer_id = b.id(+) ORDER BY a.id')
+
+    assert connection.execute(sql).fetchall() == [(1, 'APPS'), (2, None)]
+
+
+def test_decode_nvl_and_to_char():
+    assert decode('R', 'R', 'Running', 'P', 'Pending', 'Other') == 'Running'
+    assert decode('X', 'R', 'Running', 'Other') == 'Other'
+    assert decode('X', 'R', 'Running') is None
+    assert decode(None, None, 'null') == 'null'
+    assert nvl(None, 0) == 0 and nvl(5, 0) == 5
+
+    moment = datetime(2024, 3, 5, 14, 7, 9)
+    assert to_char(to_julian(moment), 'YYYY-MM-DD HH24:MI:SS') == '2024-03-05 14:07:09'
+    assert to_char(None, 'YYYY') is None
+    assert to_char(42) == '42'
+
+
+def test_julian_round_trip():
+    moment = datetime(2024, 3, 5, 14, 7, 9)
+    assert abs((from_julian(to_julian(moment)) - moment).total_seconds()) < 0.001
+
+
+def test_registered_functions_run_in_sqlite():
+    connection = sqlite3.connect(':memory:')
+    register_functions(connection)
+
+    row = connection.execute(translate("SELECT DECODE(1, 1, 'a', 'b'), NVL(NULL, 3), SYSDATE - SYSDATE")).fetchone()
+
+    assert row[:2] == ('a', 3)
+    assert abs(row[2]) < 0.001
+
+
+@pytest.fixture(scope='module')
+def synthetic(tmp_path_factory):
+    database = SyntheticDatabase(path=str(tmp_path_factory.mktemp('synthetic') / 'ebs.db'), scale=0.05, seed=7)
+    connection = database.connect()
+    yield connection
+    connection.close()
+
+
+@pytest.mark.parametrize('intent', sorted(QueryMapper().queries))
+def test_every_mapped_query_runs_on_the_synthetic_ebs(synthetic, intent):
+    query_info = QueryMapper().get_query(intent)
+
+    cursor = synthetic.execute(translate(query_info['query']), query_info.get('params', {}))
+
+    assert cursor.description
+    cursor.fetchall()
+
+
+def test_outer_joined_tablespace_detail_returns_rows(synthetic):
+    query_info = QueryMapper().get_query('tablespace_detail')
+
+    assert synthetic.execute(translate(query_info['query']), query_info.get('params', {})).fetchall()
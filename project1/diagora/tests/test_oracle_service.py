@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.oracle_service import OracleService
+
+QUERY = 'SELECT tablespace_name FROM dba_tablespace_usage_metrics'
+
+
+class ExhaustedPool:
+    """Session pool look-alike whose checkout always times out"""
+
+    min, max, increment, opened, busy = 1, 1, 1, 1, 1
+
+    def acquire(self):
+        raise TimeoutError('ORA-24459: timeout waiting for pool to create new connections')
+
+
+def test_no_connection_settings_answer_with_demo_data():
+    service = OracleService('demo', {'backend': 'oracle'})
+
+    result = service.execute_query(QUERY)
+
+    assert result['success'] and result['demo']
+
+
+def test_exhausted_pool_is_an_error_not_demo_data():
+    service = OracleService('test')
+    service.use_pool(ExhaustedPool())
+
+    result = service.execute_query(QUERY)
+
+    assert not result['success']
+    assert 'connection pool exhausted' in result['error']
+    assert 'demo' not in result
+    assert service.get_pool_stats()['acquire_timeouts'] == 1
+
+
+def test_exhausted_pool_fails_warm_up_and_connection_test():
+    service = OracleService('test')
+    service.use_pool(ExhaustedPool())
+
+    assert service.warm_up() is False
+    assert service.test_connection() is False
+
+
+def test_async_query_on_an_exhausted_stand_in_pool_is_an_error():
+    service = OracleService('test', {'backend': 'synthetic'})
+    service.use_pool(ExhaustedPool())
+
+    result = asyncio.run(service.execute_query_async(QUERY))
+
+    assert not result['success']
+    assert 'connection pool exhausted' in result['error']
+
+
+def test_deadline_becomes_the_remaining_call_timeout():
+    service = OracleService('test')
+
+    options = service.fetch_options({'deadline': time.perf_counter() + 2, 'call_timeout_ms': 10000})
+
+    assert 'deadline' not in options
+    assert 1000 < options['call_timeout_ms'] <= 2000
+    assert service.fetch_options({'deadline': time.perf_counter() - 1})['call_timeout_ms'] == 1
+
+
+SETTINGS = {'host': 'ebs-db', 'port': '1521', 'service_name': 'EBSPROD', 'user': 'apps', 'password': 'x',
+            'backend': 'oracle'}
+
+
+class AsyncPool:
+    def __init__(self):
+        self.acquired = 0
+
+    async def acquire(self):
+        self.acquired += 1
+        return object()
+
+    async def release(self, connection):
+        pass
+
+
+def test_async_pool_is_built_after_the_sync_pool_was_opened(monkeypatch):
+    oracledb = pytest.importorskip('oracledb')
+    async_pool = AsyncPool()
+    monkeypatch.setattr(oracledb, 'create_pool_async', lambda **kwargs: async_pool)
+    service = OracleService('test', SETTINGS)
+    # What warm-up or the health prober leave behind
+    service._pool = ExhaustedPool()
+
+    assert asyncio.run(service.warm_up_async())
+    assert service._get_async_pool() is async_pool and async_pool.acquired == 1
+
+
+def test_stand_in_pools_keep_async_queries_on_the_sync_path():
+    service = OracleService('test', SETTINGS)
+    service.use_pool(ExhaustedPool())
+
+    assert service._get_async_pool() is None
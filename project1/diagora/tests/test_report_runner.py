@@ -0,0 +1,73 @@
+import threading
+import time
+
+from app.services.admission import AdmissionController
+from app.services.report_runner import ReportRunner
+
+QUERIES = {intent: {'query': f'SELECT {intent}', 'fetch': {'arraysize': 100}} for intent in ('fast', 'slow', 'queued')}
+
+
+def test_slow_checks_time_out_and_queued_ones_never_start():
+    started = []
+    release = threading.Event()
+
+    def run_query(query_info, intent):
+        started.append(intent)
+        if intent != 'fast':
+            release.wait(1)
+        return {'success': True, 'columns': ['X'], 'data': [(intent,)]}
+
+    # One thread: 'queued' waits behind 'slow'
+    runner = ReportRunner(run_query, max_workers=1)
+    results = runner.run(QUERIES, timeout=0.1)
+    release.set()
+    time.sleep(0.05)
+
+    assert results['fast']['success'] and results['fast']['elapsed_ms'] is not None
+    assert results['slow']['timed_out'] and results['queued']['timed_out']
+    assert 'queued' not in started
+
+
+def test_a_check_picked_up_after_the_deadline_is_not_run():
+    runner = ReportRunner(lambda query_info, intent: {'success': True})
+
+    assert runner._timed(QUERIES['fast'], 'fast', time.perf_counter() - 1) == (None, 0.0)
+
+
+def test_each_query_gets_the_report_deadline():
+    seen = {}
+
+    def run_query(query_info, intent):
+        seen[intent] = query_info
+        return {'success': True, 'columns': [], 'data': []}
+
+    before = time.perf_counter()
+    ReportRunner(run_query).run(QUERIES, timeout=5)
+
+    for query_info in seen.values():
+        assert 0 < query_info['max_wait'] <= 5
+        assert before + 5 <= query_info['fetch']['deadline'] <= time.perf_counter() + 5
+        assert query_info['fetch']['arraysize'] == 100
+    assert 'deadline' not in QUERIES['fast']['fetch']
+
+
+def test_heavy_checks_of_a_report_run_side_by_side(monkeypatch):
+    monkeypatch.setenv('ADMISSION_ENABLED', 'True')
+    monkeypatch.setenv('ADMISSION_MAX_ACTIVE', '4')
+    admission = AdmissionController('test')
+    classes = []
+
+    def run_query(query_info, intent):
+        with admission.slot(query_info['cost'], query_info['max_wait']):
+            classes.append(query_info['cost'])
+            time.sleep(0.2)
+        return {'success': True, 'columns': [], 'data': []}
+
+    heavy = {intent: dict(info, cost='heavy') for intent, info in QUERIES.items()}
+    started = time.perf_counter()
+    results = ReportRunner(run_query, max_workers=3).run(heavy, timeout=5)
+
+    assert all(result['success'] for result in results.values())
+    assert classes == ['report'] * 3
+    # One heavy slot would have taken 0.6s
+    assert time.perf_counter() - started < 0.5
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.admission import AdmissionController
+from app.services.result_cache import BUSY_ERROR, ResultCache
+
+QUERY = 'SELECT tablespace_name, used_percent FROM dba_tablespace_usage_metrics'
+
+
+class FakeOracle:
+    """Counts round-trips; each one blocks until the test opens the gate"""
+
+    name = 'test'
+
+    def __init__(self):
+        self.calls = 0
+        self.gate = threading.Event()
+        self.gate.set()
+        self._lock = threading.Lock()
+
+    def execute_query(self, query, params=None, fetch=None):
+        with self._lock:
+            self.calls += 1
+        self.gate.wait(2)
+        return {'success': True, 'columns': ['TABLESPACE_NAME', 'USED_PERCENT'], 'data': [('APPS_TS_TX_DATA', 91.5)]}
+
+    async def execute_query_async(self, query, params=None, fetch=None):
+        return await asyncio.to_thread(self.execute_query, query, params, fetch)
+
+
+@pytest.fixture
+def admission(monkeypatch):
+    monkeypatch.setenv('ADMISSION_ENABLED', 'True')
+    monkeypatch.setenv('ADMISSION_MAX_ACTIVE', '1')
+    monkeypatch.setenv('ADMISSION_MEDIUM_QUEUE', '0')
+    return AdmissionController('test')
+
+
+def test_concurrent_misses_share_one_round_trip():
+    oracle = FakeOracle()
+    cache = ResultCache(oracle)
+    oracle.gate.clear()
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(cache.execute_query(QUERY, ttl=60)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    deadline = time.time() + 2
+    while cache.get_stats()['coalesced'] < 4 and time.time() < deadline:
+        time.sleep(0.005)
+    oracle.gate.set()
+    for thread in threads:
+        thread.join(2)
+
+    assert oracle.calls == 1
+    assert len(results) == 5 and all(result['success'] for result in results)
+    assert cache.execute_query(QUERY, ttl=60)['cached']
+    assert oracle.calls == 1
+
+
+def test_concurrent_async_misses_share_one_round_trip():
+    oracle = FakeOracle()
+    cache = ResultCache(oracle)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.execute_query_async(QUERY, ttl=60) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+
+    assert oracle.calls == 1
+    assert all(result['data'] == [('APPS_TS_TX_DATA', 91.5)] for result in results)
+
+
+def test_expired_entry_is_fetched_again():
+    oracle = FakeOracle()
+    cache = ResultCache(oracle)
+    cache.execute_query(QUERY, ttl=0.01)
+    time.sleep(0.02)
+
+    result = cache.execute_query(QUERY, ttl=0.01)
+
+    assert result['success'] and not result['cached']
+    assert oracle.calls == 2
+
+
+def test_zero_ttl_is_never_cached():
+    oracle = FakeOracle()
+    cache = ResultCache(oracle)
+
+    cache.execute_query(QUERY)
+    cache.execute_query(QUERY)
+
+    assert oracle.calls == 2
+    assert cache.get_stats()['entries'] == 0
+
+
+def test_rejected_query_is_answered_from_the_expired_entry(admission):
+    oracle = FakeOracle()
+    cache = ResultCache(oracle, admission=admission)
+    cache.execute_query(QUERY, ttl=0.01)
+    time.sleep(0.02)
+
+    held = admission.acquire('light')
+    try:
+        result = cache.execute_query(QUERY, ttl=0.01)
+    finally:
+        admission.release(held)
+
+    assert result['success'] and result['stale']
+    assert result['data'] == [('APPS_TS_TX_DATA', 91.5)]
+    assert oracle.calls == 1
+    assert cache.get_stats()['stale'] == 1
+
+
+def test_rejected_query_without_an_entry_reports_busy(admission):
+    cache = ResultCache(FakeOracle(), admission=admission)
+
+    held = admission.acquire('light')
+    try:
+        result = cache.execute_query(QUERY, ttl=60)
+    finally:
+        admission.release(held)
+
+    assert not result['success']
+    assert result['error'] == BUSY_ERROR
+    assert result['rejected'] == 'queue_full'
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+from app.services.columnar import ColumnarResult, np
+from app.services.snapshot_collector import SnapshotCollector, SnapshotStore
+
+QUERY = 'SELECT tablespace_name, used_percent FROM dba_tablespace_usage_metrics'
+QUERIES = {'tablespace': {'query': QUERY, 'params': {}, 'refresh_interval': 300}}
+
+
+class FakeOracle:
+    name = 'test'
+
+    def __init__(self):
+        self.calls = 0
+
+    def execute_query(self, query, params=None, fetch=None):
+        self.calls += 1
+        return {'success': True, 'columns': ['TABLESPACE_NAME', 'USED_PERCENT'], 'data': [('SYSTEM', float(self.calls))]}
+
+
+def test_snapshots_written_by_one_worker_are_served_by_another(tmp_path):
+    path = str(tmp_path / 'snapshots.db')
+    writer, reader = SnapshotStore(path), SnapshotStore(path)
+
+    assert reader.get(QUERY, {}, 60) is None
+    writer.put(QUERY, {}, {'success': True, 'columns': ['A'], 'data': [(1,)]})
+    assert reader.get(QUERY, {}, 60)['data'] == [(1,)]
+
+    writer.put(QUERY, {}, {'success': True, 'columns': ['A'], 'data': [(2,)]})
+    snapshot = reader.get(QUERY, {}, 60)
+    assert snapshot['data'] == [(2,)] and snapshot['snapshot']
+    assert reader.get(QUERY, {}, 0) is None
+
+
+@pytest.mark.skipif(np is None, reason='numpy is not installed')
+def test_columnar_snapshots_round_trip(tmp_path):
+    path = str(tmp_path / 'snapshots.db')
+    rows = ColumnarResult.from_rows(['NAME', 'USED'], [('SYSTEM', 82.5), ('USERS', None)])
+    SnapshotStore(path).put(QUERY, {}, {'success': True, 'columns': rows.columns, 'data': rows})
+
+    assert SnapshotStore(path).get(QUERY, {}, 60)['data'].to_rows() == rows.to_rows()
+
+
+def _collector(tmp_path, oracle, store):
+    return SnapshotCollector(oracle, store, QUERIES, jitter=0, lock_path=str(tmp_path / 'collector.lock'))
+
+
+def test_only_the_elected_worker_primes(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots.db'))
+    leader_oracle, other_oracle = FakeOracle(), FakeOracle()
+    leader, other = _collector(tmp_path, leader_oracle, store), _collector(tmp_path, other_oracle, store)
+
+    assert leader.prime()
+    assert not other.prime()
+
+    assert (leader_oracle.calls, other_oracle.calls) == (1, 0)
+    assert store.get(QUERY, {}, 60)['data'] == [('SYSTEM', 1.0)]
+
+
+def test_waiting_worker_takes_over_when_the_leader_exits(tmp_path, monkeypatch):
+    monkeypatch.setenv('SNAPSHOT_ELECTION_RETRY', '0.02')
+    store = SnapshotStore(str(tmp_path / 'snapshots.db'))
+    oracle = FakeOracle()
+    leader, other = _collector(tmp_path, FakeOracle(), store), _collector(tmp_path, oracle, store)
+    assert leader.elect()
+
+    other.start()
+    time.sleep(0.1)
+    assert not other.leader and oracle.calls == 0
+
+    # The leader's process exiting drops its lock
+    leader._lock_file.close()
+    deadline = time.time() + 2
+    while oracle.calls == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    other.stop()
+
+    assert other.leader and oracle.calls >= 1
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Diagora - offline training and evaluation for the local intent classifier
+
+    python train_classifier.py train --data intent_log.jsonl --out models/intent_model.npz
+    python train_classifier.py evaluate --model models/intent_model.npz --data labelled.jsonl
+
+Input files are JSON Lines with "question" and "intent" keys, e.g. the
+INTENT_LOG_PATH file written by LLMService.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.intent_classifier import NgramModel, evaluate, load_labelled
+
+
+def train(args):
+    texts, labels = load_labelled(args.data)
+    if not texts:
+        sys.exit(f"No labelled questions found in {args.data}")
+
+    holdout = None
+    if args.holdout > 0:
+        pairs = list(zip(texts, labels))
+        random.Random(args.seed).shuffle(pairs)
+        cut = int(len(pairs) * (1 - args.holdout))
+        holdout = pairs[cut:]
+        texts, labels = [t for t, _ in pairs[:cut]], [l for _, l in pairs[:cut]]
+
+    model = NgramModel.train(texts, labels, dim=args.dim)
+    out_dir = os.path.dirname(os.path.abspath(args.out))
+    os.makedirs(out_dir, exist_ok=True)
+    model.save(args.out)
+    print(f"Trained on {len(texts)} questions, {len(model.labels)} intents, "
+          f"temperature={model.temperature:.3f} -> {args.out}")
+
+    if holdout:
+        report = evaluate(model, [t for t, _ in holdout], [l for _, l in holdout], args.threshold)
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+def run_evaluate(args):
+    texts, labels = load_labelled(args.data)
+    if not texts:
+        sys.exit(f"No labelled questions found in {args.data}")
+
+    model = NgramModel.load(args.model)
+    print(json.dumps(evaluate(model, texts, labels, args.threshold), indent=2, ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train or evaluate the local intent classifier')
+    parser.add_argument('--threshold', type=float,
+                        default=float(os.getenv('LOCAL_INTENT_THRESHOLD', 0.9)),
+                        help='confidence above which the LLM is bypassed')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = commands.add_parser('train', help='train a model from labelled questions')
+    train_parser.add_argument('--data', required=True)
+    train_parser.add_argument('--out', default=os.getenv('INTENT_MODEL_PATH', 'models/intent_model.npz'))
+    train_parser.add_argument('--dim', type=int, default=2 ** 14)
+    train_parser.add_argument('--holdout', type=float, default=0.2,
+                              help='fraction held out for evaluation (0 to train on everything)')
+    train_parser.add_argument('--seed', type=int, default=42)
+    train_parser.set_defaults(func=train)
+
+    eval_parser = commands.add_parser('evaluate', help='evaluate a model against labelled questions')
+    eval_parser.add_argument('--model', default=os.getenv('INTENT_MODEL_PATH', 'models/intent_model.npz'))
+    eval_parser.add_argument('--data', required=True)
+    eval_parser.set_defaults(func=run_evaluate)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()